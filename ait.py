@@ -30,18 +30,35 @@ Author: Abhi Singh
 License: MIT
 """
 #from __future__ import annotations
+import sys
+
+# Must run before anything heavy is imported so the profile sees it all.
+if "--profile-startup" in sys.argv:
+    from modules import startup_profile
+    startup_profile.install()
+
 import argparse
-from typing import Dict, List
-from rich.console import Console
+import contextlib
+from typing import Any, Dict, List, Set, Tuple
 import shutil
 from pathlib import Path
 import subprocess
 import os
-from modules import diagnostics, file_search, file_utils, folder_search, ip_info, net_speed, process_scan, tool_opener, web_search, tools
-import config
+import shlex
+
+from modules import commands    # standard library only; filled in below
 
+# Built-in modules, config (PyYAML) and the LLM SDKs are imported where they
+# are first needed, so `ait update` and `ait -h` don't pay for them.
+class _LazyConsole:
+    def __getattr__(self, name: str):
+        global console
+        from rich.console import Console
+        console = Console()
+        return getattr(console, name)
 
-console = Console()
+
+console = _LazyConsole()
 
 # -----------------------------------------------------------------------
 # ASCII banner
@@ -85,14 +102,23 @@ def print_help_menu() -> None:
     console.print("[yellow] Core Features:[/yellow]")
     console.print("- [blue]health / sys / battery[/blue]         → Show system diagnostics (battery, CPU, memory)")
     console.print("- [blue]ps scan[/blue]                        → Scan and inspect running processes")
+    console.print("- [blue]disk usage \\[dir] [--top N][/blue]      → Heaviest directories and files as a tree (cached by mtime; --fresh)")
+    console.print("- [blue]scan lan [--fresh][/blue]              → Discover hosts on the local subnet (ARP + probe sweep, vendor, reverse DNS)")
+    console.print("- [blue]scan ports <host|cidr> \\[ports][/blue]   → Native TCP port scan (22,80,1-1024 | top | all), --banners to grab banners")
     console.print("- [blue]ip / gateway / dns / ipv4 / ipv6[/blue] → Display network and IP details")
     console.print("- [blue]find file <name>[/blue]               → Find files starting with the given name")
     console.print("- [blue]find folder <name>[/blue]             → Find folders starting with the given name")
     console.print("- [blue]open <file>[/blue]                    → Open and view a specific file")
+    console.print("- [blue]view <file>[/blue]                    → Page any size file here: / search, :N or :N% jump, F follow")
+    console.print("- [blue]analyze <file> \\[question][/blue]      → Analyze a large file or log with the LLM (chunked, deduplicated)")
     console.print("- [blue]net speed / speed test[/blue]         → Run full internet speed test (latency, jitter, download, loss)")
+    console.print("- [blue]http stats[/blue]                     → Per-host HTTP requests, cache hits and bytes saved")
+    console.print("- [blue]stats[/blue]                          → p50/p95/p99 per command, LLM call, HTTP host; byte and token counters")
+    console.print("- [blue]stats export \\[file][/blue]            → Write this session as a Chrome trace (stats profile on|off to sample stacks)")
 
     console.print("\n[yellow] Web + Search Capabilities:[/yellow]")
-    console.print("- [blue]search <query>[/blue]                 → Perform web search")
+    console.print("- [blue]search <query>[/blue]                 → Perform web search (in the terminal when there is no display)")
+    console.print("- [blue]web <query>[/blue]                    → Show ranked web results here; ask a follow-up to use them")
     console.print("- [blue]search google <query>[/blue]          → Search using Google")
     console.print("- [blue]search url/site <domain>[/blue]       → Open a specific website")
 
@@ -100,12 +126,18 @@ def print_help_menu() -> None:
     console.print("- [blue]tools all[/blue]                      → Show all GUI + terminal tools")
     console.print("- [blue]show terminal tools[/blue]            → List installed terminal tools")
     console.print("- [blue]show gui tools[/blue]                 → List installed GUI apps")
-    console.print("- [blue]check tool <name>[/blue]              → Check if a tool is installed")
-    console.print("- [blue]open tool <tool>[/blue]               → Open a tool by name")
+    console.print("- [blue]gui tools <category>[/blue]           → List GUI apps in a category, e.g. gui tools network")
+    console.print("- [blue]gui categories[/blue]                 → List the categories of installed GUI apps")
+    console.print("- [blue]all tools[/blue]                      → List every executable on PATH")
+    console.print("- [blue]tools by package[/blue]               → List installed tools grouped by package")
+    console.print("- [blue]check tool <name>[/blue]              → Check if a tool is installed (suggests close matches)")
+    console.print("- [blue]open tool <tool>[/blue]               → Open a tool by command or app name, e.g. open tool Burp Suite")
 
     console.print("\n[yellow] AI & Coding Assistant:[/yellow]")
     console.print("- [blue]history[/blue]                        → Show past conversation history")
+    console.print("- [blue]index docs[/blue]                     → Index man pages and local docs so answers use your installed versions")
     console.print("- [blue]Ask anything:[/blue] coding, errors, scripting, hashes, cron jobs, Nmap, Wireshark, OSINT queries")
+    console.print("- [blue]Plain questions[/blue] like \"what's my cpu usage?\" or \"is nmap installed?\" are answered locally, without the LLM")
 
     console.print("\n[magenta] Tip: Create ~/.ait.yml and add your OpenAI or Gemini API key to enable chat features.[/magenta]")
 
@@ -115,355 +147,903 @@ def print_help_menu() -> None:
 
 
 
+# -----------------------------------------------------------------------
+# Local documentation index
+# -----------------------------------------------------------------------
+def build_doc_index() -> None:
+    console.print("[yellow]Indexing man pages, --help output and /usr/share/doc ...[/yellow]")
+    from modules import doc_index
+    counts = doc_index.build()
+    console.print(f"[green]✔ Doc index ready: {counts['total']} sources ({counts['read']} read, {counts['reused']} unchanged).[/green]")
+
+
 # -----------------------------------------------------------------------
 # Chat loop
 # -----------------------------------------------------------------------
-def chat() -> None:
-    print_banner()
-    backend, client, model = config.get_llm_client()
+class ChatSession:
+    """Per-conversation state: LLM handles, history and chat settings."""
+
+    def __init__(self, backend: str, client: Any, model: str, cwd: str | None = None) -> None:
+        import config
+        from modules import intent_router, llm_tools
+
+        self.backend, self.client, self.model = backend, client, model
+        # The user's working directory; a daemon session's own cwd is somewhere else.
+        self.cwd = cwd or os.getcwd()
+        self.chat_session: Any = None
+        self.use_tools = bool(config.CONFIG.get("llm_tools", True))
+        self.doc_tokens = int(config.CONFIG.get("doc_context_tokens", 600))
+        self.intent_threshold = float(config.CONFIG.get("intent_threshold", intent_router.DEFAULT_THRESHOLD))
+        # Results of local commands (web search, scans) waiting to go out with the next question.
+        self.pending_context: List[str] = []
+        if backend == "gemini":
+            system_prompt = (
+                "Your name is Abhi AI and you are an AI Terminal Assistant created by Abhi Singh. "
+                "You were developed to help users operate Kali Linux and other Linux-based machines more efficiently, intelligently, and securely from the terminal.\n\n"
+                "You are designed to boost productivity and simplify complex tasks. Whether someone is exploring cybersecurity tools or managing system processes, you're here to assist smoothly.\n"
+                "You reduce the need for memorizing commands and help automate repetitive tasks so users can focus on what matters most.\n\n"
+                "You assist with OSINT, system tools, file handling, process management, ethical hacking tasks, and scripting via the command line.\n\n"
+                "Here are the main things you can do:\n"
+                "- Search for files or folders on the system\n"
+                "- Open and read files\n"
+                "- Show system diagnostics (battery, CPU, memory)\n"
+                "- Scan and analyze running processes\n"
+                "- Search the web and open URLs\n"
+                "- Assist with Python, Bash, and shell scripting\n"
+                "- Debug code and identify script errors\n"
+                "- Create file checksums (SHA1/SHA256)\n"
+                "- Launch tools like Wireshark, Nmap, or any installed app\n"
+                "- Help schedule cron tasks\n"
+                "- Answer system/network/security-related questions\n"
+                "- Be interactive, terminal-native, and context-aware\n\n"
+                "If someone asks about your creator, say:\n"
+                "'I was developed by Abhi Singh to make Linux terminals smarter, more interactive, and tailored for advanced users. My core purpose is to assist with system tasks, ethical hacking, automation, and intelligent tool usage on platforms like Kali Linux, making the command line a more powerful and helpful environment for students, developers, and cybersecurity professionals.'"
+                "If someone asks for your GitHub ID or how to find your source code, say:.\n\n"
+                "'You can find my source code and updates at https://github.com/anodeus. That’s the GitHub profile of my creator, Abhi Singh.'"
+                "If someone asks how to uninstall you, say:\n"
+                "'You can type uninstall or remove assistant. I will confirm before deleting my folder, virtual environment, and launcher. No surprises.'\n\n"
+                "Always respond clearly, respectfully, and helpfully. Your role is to empower users and make terminal life easier."
+            )
+            model_obj = client.GenerativeModel(model, tools=llm_tools.gemini_tools(client) if self.use_tools else None)
+            self.chat_session = model_obj.start_chat(history=[
+                {"role": "user", "parts": [system_prompt]}
+            ])
+
+        else:
+            system_prompt = (
+                "Your name is Abhi AI and you are an AI Terminal Assistant created by Abhi Singh. "
+                "You were developed to help users operate Kali Linux and other Linux-based machines more efficiently, intelligently, and securely from the terminal.\n\n"
+                "You are designed to boost productivity and simplify complex tasks. Whether someone is exploring cybersecurity tools or managing system processes, you're here to assist smoothly.\n"
+                "You reduce the need for memorizing commands and help automate repetitive tasks so users can focus on what matters most.\n\n"
+                "You assist with OSINT, system tools, file handling, process management, ethical hacking tasks, and scripting via the command line.\n\n"
+                "Here are the main things you can do:\n"
+                "- Search for files or folders on the system\n"
+                "- Open and read files\n"
+                "- Show system diagnostics (battery, CPU, memory)\n"
+                "- Scan and analyze running processes\n"
+                "- Search the web and open URLs\n"
+                "- Assist with Python, Bash, and shell scripting\n"
+                "- Debug code and identify script errors\n"
+                "- Create file checksums (SHA1/SHA256)\n"
+                "- Launch tools like Wireshark, Nmap, or any installed app\n"
+                "- Help schedule cron tasks\n"
+                "- Answer system/network/security-related questions\n"
+                "- Be interactive, terminal-native, and context-aware\n\n"
+                "If someone asks about your creator, say:\n"
+                "'I was developed by Abhi Singh to make Linux terminals smarter, more interactive, and tailored for advanced users. My core purpose is to assist with system tasks, ethical hacking, automation, and intelligent tool usage on platforms like Kali Linux, making the command line a more powerful and helpful environment for students, developers, and cybersecurity professionals.'"
+                "If someone asks for your GitHub ID or how to find your source code, say:.\n\n"
+                "'You can find my source code and updates at https://github.com/anodeus. That’s the GitHub profile of my creator, Abhi Singh.'"
+                "If someone asks how to uninstall you, say:\n"
+                "'You can type uninstall or remove assistant. I will confirm before deleting my folder, virtual environment, and launcher. No surprises.'\n\n"
+                "Always respond clearly, respectfully, and helpfully. Your role is to empower users and make terminal life easier."
+            )
+        self.history: List[Dict[str, str]] = [{"role": "system", "content": system_prompt}]
+
+    def path(self, path: str) -> str:
+        """path resolved against the user's working directory."""
+        return os.path.join(self.cwd, os.path.expanduser(path))
+
+    def add_context(self, text: str) -> None:
+        """Attach text to the next question sent to the LLM (then it is dropped)."""
+        self.pending_context.append(text)
+
+    def take_context(self) -> str:
+        text, self.pending_context = "\n\n".join(self.pending_context), []
+        return text
+
+
+_LLM: Tuple[Any, Any, Any] | None = None
+
+
+def open_session(banner: bool = True, cwd: str | None = None) -> ChatSession | None:
+    """Print the greeting and start a session, or explain why we can't."""
+    global _LLM
+    import config
+
+    if banner:
+        print_banner()
+    # One client per process: the daemon shares it across every session.
+    if _LLM is None:
+        _LLM = config.get_llm_client()
+    backend, client, model = _LLM
     if backend is None:
         console.print("[red]No LLM configured in ~/.ait.yml[/red]")
         console.print("[blue]Create ait.yml file.[/blue]")
         console.print("[blue]Add api keys.[/blue]")
+        return None
+    if banner:
+        console.print(f"[green]\nChatting via {backend.upper()} ({model})[/green]")
+    interval = float(config.CONFIG.get("profile_interval_ms", 0) or 0)
+    if interval > 0:
+        from modules import instrument
+        if not instrument.profiling():
+            instrument.start_profiler(interval)
+    return ChatSession(backend, client, model, cwd)
+
+
+# -----------------------------------------------------------------------
+# Built-in commands
+# -----------------------------------------------------------------------
+# Each command is registered in modules/commands.py under the phrases that
+# name it. Handlers take (session, args, fmt): session is None when a daemon
+# client runs a `local` command in its own terminal, args is the rest of the
+# line after the command's words, and fmt is the --json/--plain switch.
+#
+# Command words are ordinary words too, so commands whose arguments are free
+# form check them (`accepts`): "view of experts on systemd?" and "stats about
+# the kernel scheduler" are questions for the LLM, not commands.
+def _path_arg(args: str) -> bool:
+    """An existing path, or one word that looks like a path (a typo then gets "does not exist")."""
+    if not args or os.path.exists(os.path.expanduser(args)):
+        return True
+    return len(args.split()) == 1 and (os.sep in args or args.startswith(("~", ".")) or "." in args.rstrip(".?!"))
+
+
+def _analyze_args(args: str) -> bool:
+    try:
+        words = shlex.split(args)
+    except ValueError:
+        return False
+    return not words or _path_arg(words[0])
+
+
+def _disk_usage_args(args: str) -> bool:
+    words = [w for w in args.split() if w != "--fresh"]
+    if "--top" in words:
+        i = words.index("--top")
+        if not words[i + 1:i + 2] or not words[i + 1].isdigit():
+            return False
+        del words[i:i + 2]
+    return _path_arg(" ".join(words))
+
+
+def _stats_args(args: str) -> bool:
+    words = args.split()
+    if not words or words == ["reset"] or words == ["profile"] or words == ["profile", "off"]:
+        return True
+    if words[0] == "export":
+        return len(words) <= 2
+    if words[:2] == ["profile", "on"]:
+        return len(words) == 2 or (len(words) == 3 and words[2].replace(".", "", 1).isdigit())
+    return False
+
+
+def _history_args(args: str) -> bool:
+    words = args.split()
+    return not words or (words[0] == "last" and (len(words) == 1 or (len(words) == 2 and words[1].isdigit())))
+
+
+# First words that make "web ..." / "search ..." a noun phrase, not a query.
+_WEB_NOUNS = {
+    "server", "servers", "site", "sites", "page", "pages", "app", "apps", "application", "applications",
+    "browser", "browsers", "development", "developer", "developers", "design", "framework", "frameworks",
+    "service", "services", "hosting", "socket", "sockets", "scraping", "scraper", "is", "are", "vs",
+}
+_SEARCH_NOUNS = {"engine", "engines", "result", "results", "algorithm", "algorithms", "bar", "box", "is", "vs"}
+
+
+def _query_arg(nouns: Set[str]) -> commands.Accepts:
+    def accepts(args: str) -> bool:
+        first = args.split(maxsplit=1)[0].lower().strip(",.:;?!") if args else ""
+        return first not in nouns
+    return accepts
+
+
+@commands.command("exit", "quit")
+def _cmd_exit(session: ChatSession | None, args: str, fmt: str | None) -> bool:
+    return False
+
+
+@commands.command("help", "-h")
+def _cmd_help(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    print_help_menu()
+
+
+@commands.command("find file", "file find", args=True, local=True)
+def _cmd_find_file(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    if not args:
+        console.print("[yellow]Please provide a file name to search for.[/yellow]")
+        return
+    from modules import file_search, render
+    if fmt is None:
+        console.print(f"[yellow]Searching for files starting with '{args}' ...[/yellow]")
+    render.show((str(p) for p in file_search.iter_files(args)), fmt=fmt, empty="No files found.")
+
+
+@commands.command("find folder", "folder find", args=True, local=True)
+def _cmd_find_folder(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    if not args:
+        console.print("[yellow]Please provide a folder name to search for.[/yellow]")
+        return
+    from modules import folder_search, render
+    if fmt is None:
+        console.print(f"[cyan]Searching for folders starting with '{args}'...[/cyan]")
+    render.show((str(p) for p in folder_search.iter_folders(args)), fmt=fmt, empty="No folders found.")
+
+
+@commands.command("index docs", "docs index")
+def _cmd_index_docs(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    build_doc_index()
+
+
+@commands.command("health", "battery", "sys")
+def _cmd_health(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    from modules import diagnostics
+    diagnostics.sys_health()
+
+
+def _web_search(session: ChatSession | None, query: str, fmt: str | None, in_terminal: bool) -> None:
+    if not query:
+        console.print("[yellow]Please provide something to search for.[/yellow]")
+        return
+    import config
+    from modules import web_search
+    if in_terminal or web_search.wants_terminal(query):
+        try:
+            with console.status(f"Searching the web for '{query}'..."):
+                results = web_search.search(query)
+        except Exception as e:
+            console.print(f"[red]✖ Web search failed: {e}[/red]")
+            return
+        web_search.show(results, fmt)
+        if session is not None and results:
+            session.add_context(web_search.as_context(
+                query, results, int(config.CONFIG.get("search_context_tokens", 1500))))
+            if fmt in (None, "rich"):
+                console.print("[grey70]Ask a follow-up question to have the LLM use these results.[/grey70]")
+        return
+    result = web_search.open_site_or_search(query)
+    console.print(f"[green]{result}[/green]")
+
+
+@commands.command("search", args=True, accepts=_query_arg(_SEARCH_NOUNS))
+def _cmd_search(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    _web_search(session, args, fmt, in_terminal=False)
+
+
+@commands.command("web", args=True, accepts=_query_arg(_WEB_NOUNS))
+def _cmd_web(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    _web_search(session, args, fmt, in_terminal=True)
+
+
+@commands.command("http stats", "net cache")
+def _cmd_http_stats(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    from modules import http_client, render
+    render.show(http_client.stats_rows(),
+                ["HOST", "REQUESTS", "NETWORK", "CACHE HITS", "304s", "DOWNLOADED", "SAVED", "AVG MS"],
+                fmt=fmt, title="HTTP requests this session:", empty="No HTTP requests yet.")
+
+
+@commands.command("http cache clear")
+def _cmd_http_cache_clear(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    from modules import http_client
+    console.print(f"[green]✔ Removed {http_client.clear_cache()} cached responses.[/green]")
+
+
+@commands.command("stats", args=True, accepts=_stats_args)
+def _cmd_stats(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    show_stats(args, fmt, session.cwd if session is not None else None)
+
+
+@commands.command("disk usage", args=True, local=True, complete="paths", accepts=_disk_usage_args)
+def _cmd_disk_usage(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    disk_usage(session, args.split(), fmt)
+
+
+@commands.command("scan lan", args=True, accepts=lambda args: set(args.split()) <= {"--fresh"})
+def _cmd_scan_lan(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    scan_lan(session, args.split(), fmt)
+
+
+@commands.command("scan ports", args=True)
+def _cmd_scan_ports(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    scan_ports(session, args.split(), fmt)
+
+
+@commands.command("ps scan", "show ps", local=True)
+def _cmd_ps_scan(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    from modules import process_scan
+    process_scan.scan_processes(fmt=fmt)
+
+
+# ip_info function for each group of phrases.
+IP_COMMANDS: Dict[Tuple[str, ...], str] = {
+    ("ip", "my ip", "show ip", "ip all", "what is my ip"): "show_ip_info",
+    ("gateway", "show gateway"): "show_gateway",
+    ("dns", "show dns"): "show_dns",
+    ("ipv4", "show ipv4"): "show_ipv4_info",
+    ("ipv6", "show ipv6"): "show_ipv6_info",
+    ("public ipv4", "show public ipv4"): "show_public_ipv4",
+    ("private ipv4", "show private ipv4"): "show_private_ipv4",
+    ("public ipv6", "show public ipv6"): "show_public_ipv6",
+    ("private ipv6", "show private ipv6"): "show_private_ipv6",
+}
+
+
+def _ip_command(function: str) -> commands.Handler:
+    def run(session: ChatSession | None, args: str, fmt: str | None) -> None:
+        from modules import ip_info
+        console.print(getattr(ip_info, function)())
+    return run
+
+
+for _phrases, _function in IP_COMMANDS.items():
+    commands.register(_phrases, _ip_command(_function))
+
+
+def _show_tools(fmt: str | None, terminal: bool, gui: bool, category: str = "") -> None:
+    from modules import render, tools
+    if terminal:
+        render.show(tools.list_installed_terminal_tools(), fmt=fmt, title="Terminal Tools Found:",
+                    style="green", empty="No terminal tools found.")
+    if gui and category:
+        render.show(tools.list_installed_gui_apps(category), fmt=fmt, title=f"GUI Applications in {category}:",
+                    style="blue", empty=f"No GUI apps found in category '{category}'. Try 'gui categories'.")
+    elif gui:
+        render.show(tools.list_installed_gui_apps(), fmt=fmt, title="GUI Applications Found:",
+                    style="blue", empty="No GUI apps found.")
+
+
+@commands.command("tools all", "tool all", "show tools", local=True)
+def _cmd_tools_all(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    _show_tools(fmt, terminal=True, gui=True)
+
+
+@commands.command("terminal tools", "terminal tool", "show terminal tools", "show terminal tool", local=True)
+def _cmd_terminal_tools(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    _show_tools(fmt, terminal=True, gui=False)
+
+
+@commands.command("gui tools", "gui tool", "show gui tools", "show gui tool", args=True, local=True,
+                  complete="categories")
+def _cmd_gui_tools(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    _show_tools(fmt, terminal=False, gui=True, category=args)
+
+
+@commands.command("gui categories", "app categories")
+def _cmd_gui_categories(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    from modules import render, tools
+    render.show(tools.list_gui_categories(), fmt=fmt, title="GUI App Categories:",
+                style="blue", empty="No categories found.")
+
+
+@commands.command("check tool", args=True, complete="tools")
+def _cmd_check_tool(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    if not args:
+        console.print("[yellow]Please provide a tool name to check.[/yellow]")
+        return
+    from modules import tools
+    path = tools.which(args)
+    if path:
+        console.print(f"[green]✔ Tool '{args}' is installed[/green] [grey70]({path})[/grey70]")
+    else:
+        console.print(f"[red]✖ Tool '{args}' is NOT installed.[/red]")
+        similar = tools.suggest_tools(args)
+        if similar:
+            console.print(f"[yellow]Did you mean:[/yellow] {', '.join(similar)}")
+
+
+@commands.command("all tools", "show all tools", local=True)
+def _cmd_all_tools(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    from modules import render, tools
+    render.show(tools.list_all_terminal_tools(), fmt=fmt, title="All executables on PATH:",
+                style="green", empty="No executables found on PATH.")
+
+
+@commands.command("tools by package", local=True)
+def _cmd_tools_by_package(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    from modules import render, tools
+    render.show(((pkg, " ".join(names)) for pkg, names in tools.tools_by_package()),
+                ["PACKAGE", "TOOLS"], fmt=fmt, title="Installed tools by package:")
+
+
+#Open tools with arguments
+@commands.command("open tool", args=True, local=True, complete="tools")
+def _cmd_open_tool(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    if not args:
+        console.print("[yellow]Please specify a tool name to open.[/yellow]")
+        return
+    from modules import tool_opener
+    if tool_opener.open_tool(args):
+        console.print(f"[green]✔ Opening tool: {args}[/green]")
+    else:
+        console.print(f"[red]✖ Tool not found or failed to open: {args}[/red]")
+
+
+#Analyze a large file or log through the LLM
+@commands.command("analyze", "analyse", args=True, session=True, complete="paths", accepts=_analyze_args)
+def _cmd_analyze(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    try:
+        words = shlex.split(args)
+    except ValueError as e:
+        console.print(f"[red]✖ {e}[/red]")
+        return
+    if not words:
+        console.print("[yellow]Usage: analyze <file> [--grep REGEX] \\[question][/yellow]")
+        return
+    filepath, rest = session.path(words[0]), words[1:]
+    grep = None
+    if len(rest) >= 2 and rest[0] == "--grep":
+        grep, rest = rest[1], rest[2:]
+    import config
+    from modules import llm_tools, log_analyzer
+    settings = log_analyzer.Settings(
+        chunk_tokens=int(config.CONFIG.get("analyze_chunk_tokens", 3000)),
+        max_tokens=int(config.CONFIG.get("analyze_max_tokens", 120000)),
+        concurrency=int(config.CONFIG.get("analyze_concurrency", 4)),
+        requests_per_minute=int(config.CONFIG.get("analyze_rpm", 30)),
+    )
+    result = log_analyzer.analyze(
+        filepath, " ".join(rest),
+        lambda prompt: llm_tools.complete(session.backend, session.client, session.model, prompt),
+        settings, grep,
+    )
+    console.print(result)
+
+
+def _view(filepath: str) -> None:
+    from modules import file_viewer
+    error = file_viewer.view_file(filepath)
+    if error:
+        console.print(error)
+
+
+#View file in the terminal (mmap pager)
+@commands.command("view", args=True, local=True, complete="paths", accepts=_path_arg)
+def _cmd_view(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    _view(args)
+
+
+#Open file
+@commands.command("open", args=True, local=True, complete="paths", accepts=_path_arg)
+def _cmd_open(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    if not args:
+        console.print("[yellow]Please provide a file path to open.[/yellow]")
+        return
+    if not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")):
+        # No desktop to hand the file to (SSH, console): page it here.
+        _view(args)
+        return
+    from modules import file_utils
+    console.print(file_utils.open_file(args))
+
+
+#Show history
+@commands.command("history", args=True, session=True, accepts=_history_args)
+def _cmd_history(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    parts = args.split()
+    try:
+        count = int(parts[1]) if parts[0] == "last" else None
+    except (IndexError, ValueError):
+        count = None
+
+    history_pairs = [
+        (session.history[i]["content"], session.history[i+1]["content"])
+        for i in range(0, len(session.history)-1, 2)
+        if session.history[i]["role"] == "user" and session.history[i+1]["role"] == "assistant"
+    ]
+
+    if not history_pairs:
+        console.print("[yellow]No conversation history found yet.[/yellow]")
+        return
+
+    to_show = history_pairs[-count:] if count else history_pairs
+
+    for i, (q, a) in enumerate(to_show, 1):
+        console.print(f"\n[bold cyan] Q{i}:[/bold cyan] {q}")
+        console.print(f"[bold blue] A{i}:[/bold blue] {a}")
+
+
+#Unistalling my precious baby
+@commands.command("uninstall", "uninstall assistant", "remove assistant", local=True)
+def _cmd_uninstall(session: ChatSession | None, args: str, fmt: str | None) -> None:
+    confirm = input(" Are you sure you want to uninstall AI Assistant? [y/N]: ").strip().lower()
+    if confirm != "y":
+        console.print("[yellow]Uninstall canceled.[/yellow]")
         return
 
-    console.print(f"[green]\nChatting via {backend.upper()} ({model})[/green]")
-    if backend == "gemini":
-        system_prompt = (
-            "Your name is Abhi AI and you are an AI Terminal Assistant created by Abhi Singh. "
-            "You were developed to help users operate Kali Linux and other Linux-based machines more efficiently, intelligently, and securely from the terminal.\n\n"
-            "You are designed to boost productivity and simplify complex tasks. Whether someone is exploring cybersecurity tools or managing system processes, you're here to assist smoothly.\n"
-            "You reduce the need for memorizing commands and help automate repetitive tasks so users can focus on what matters most.\n\n"
-            "You assist with OSINT, system tools, file handling, process management, ethical hacking tasks, and scripting via the command line.\n\n"
-            "Here are the main things you can do:\n"
-            "- Search for files or folders on the system\n"
-            "- Open and read files\n"
-            "- Show system diagnostics (battery, CPU, memory)\n"
-            "- Scan and analyze running processes\n"
-            "- Search the web and open URLs\n"
-            "- Assist with Python, Bash, and shell scripting\n"
-            "- Debug code and identify script errors\n"
-            "- Create file checksums (SHA1/SHA256)\n"
-            "- Launch tools like Wireshark, Nmap, or any installed app\n"
-            "- Help schedule cron tasks\n"
-            "- Answer system/network/security-related questions\n"
-            "- Be interactive, terminal-native, and context-aware\n\n"
-            "If someone asks about your creator, say:\n"
-            "'I was developed by Abhi Singh to make Linux terminals smarter, more interactive, and tailored for advanced users. My core purpose is to assist with system tasks, ethical hacking, automation, and intelligent tool usage on platforms like Kali Linux, making the command line a more powerful and helpful environment for students, developers, and cybersecurity professionals.'"
-            "If someone asks for your GitHub ID or how to find your source code, say:.\n\n"
-            "'You can find my source code and updates at https://github.com/anodeus. That’s the GitHub profile of my creator, Abhi Singh.'"
-            "If someone asks how to uninstall you, say:\n"
-            "'You can type uninstall or remove assistant. I will confirm before deleting my folder, virtual environment, and launcher. No surprises.'\n\n"
-            "Always respond clearly, respectfully, and helpfully. Your role is to empower users and make terminal life easier."
-        )
-        history: List[Dict[str, str]] = [{"role": "system", "content": system_prompt}]
-
-        model_obj = client.GenerativeModel(model)
-        chat_session = model_obj.start_chat(history=[
-            {"role": "user", "parts": [system_prompt]}
-        ])
-        history: List[Dict[str, str]] = []
+    try:
+        console.print("[*] Removing launcher at /usr/local/bin/ait (requires sudo)...")
+        result = os.system("sudo rm -f /usr/local/bin/ait")
+
+        if result != 0:
+            console.print("[red]✘ Failed to remove launcher. Wrong password or permission denied.[/red]")
+            console.print("[yellow]Uninstall aborted to avoid deleting partial files.[/yellow]")
+            return
+        console.print("[green]✔ Launcher removed successfully.[/green]")
+
+        console.print("[*] Removing virtual environment at ~/.abhi_ai...")
+        shutil.rmtree(Path.home() / ".abhi_ai", ignore_errors=True)
+
+        yml_path = Path.home() / ".ait.yml"
+        if yml_path.exists():
+            remove_yml = input("Delete your API key config (~/.ait.yml)? [y/N]: ").strip().lower()
+            if remove_yml == "y":
+                try:
+                    os.remove(yml_path)
+                    console.print("[green]✔ .ait.yml deleted.[/green]")
+                except Exception as e:
+                    console.print(f"[red]✘ Failed to delete .ait.yml: {e}[/red]")
+                    console.print("[blue]✔ Keeping ~/.ait.yml[/blue]")
+            else:
+                console.print("[blue]✔ Keeping ~/.ait.yml[/blue]")
+
+        project_path = Path.home() / "abhi_ai"
+        if project_path.exists():
+            console.print("[*] Removing project folder at ~/abhi_ai...")
+            shutil.rmtree(project_path, ignore_errors=True)
+
+        console.print("\n[green]✔ AI Assistant completely uninstalled.[/green]")
+        exit(0)
+
+    except Exception as e:
+        console.print(f"[red]Uninstall failed unexpectedly: {e}[/red]")
 
+
+# -----------------------------------------------------------------------
+# Dispatch
+# -----------------------------------------------------------------------
+def handle_input(session: ChatSession | None, user: str) -> bool:
+    """Handle one line of chat input. Return False when the session should end.
+
+    session is None for the commands a daemon client runs in its own terminal;
+    anything that needs history or the LLM then says so instead.
+    """
+    from modules import instrument, render
+
+    # A trailing --json / --plain switches listings to markup-free output.
+    user, fmt = render.split_format(user.strip())
+    if not user:
+        return True
+    found = commands.resolve(user)
+    # Span names are command names, never arguments; free text is renamed below.
+    with instrument.span(found[0].name if found else "ask llm"):
+        if found is None:
+            return _free_text(session, user)
+        cmd, args = found
+        if cmd.session and session is None:
+            console.print("[yellow]This needs a chat session.[/yellow]")
+            return True
+        return cmd.handler(session, args, fmt) is not False
+
+
+def _runs_locally(user: str) -> bool:
+    """True for commands a daemon client must run in its own terminal."""
+    from modules import render
+    found = commands.resolve(render.split_format(user.strip())[0])
+    return found is not None and found[0].local
+
+
+def _free_text(session: ChatSession | None, user: str) -> bool:
+    from modules import doc_index, instrument, intent_router, llm_tools, net_speed
+
+    #Including Local Speed Test
+    if net_speed.is_speed_test_query(user):
+        instrument.current().rename("speed test")
+        net_speed.run_full_speed_test()
+        return True
+
+    if session is None:
+        console.print("[yellow]This needs a chat session.[/yellow]")
+        return True
+
+    # Local intent routing: answer questions about this machine without the LLM
+    intent = intent_router.classify(user, threshold=session.intent_threshold)
+    if intent and intent_router.dispatch(intent):
+        instrument.current().rename(f"intent {intent.name}")
+        return True
+
+    # AI interaction, grounded in local docs when the index has been built
+    prompt = doc_index.ground_prompt(user, session.doc_tokens) if session.doc_tokens else user
+    context = session.take_context()
+    if context:
+        prompt = f"{context}\n\nUsing the results above where relevant, answer:\n{prompt}"
+    if session.backend == "gemini":
+        reply = llm_tools.gemini_reply(session.client, session.chat_session, prompt, session.model)
     else:
-        system_prompt = (
-            "Your name is Abhi AI and you are an AI Terminal Assistant created by Abhi Singh. "
-            "You were developed to help users operate Kali Linux and other Linux-based machines more efficiently, intelligently, and securely from the terminal.\n\n"
-            "You are designed to boost productivity and simplify complex tasks. Whether someone is exploring cybersecurity tools or managing system processes, you're here to assist smoothly.\n"
-            "You reduce the need for memorizing commands and help automate repetitive tasks so users can focus on what matters most.\n\n"
-            "You assist with OSINT, system tools, file handling, process management, ethical hacking tasks, and scripting via the command line.\n\n"
-            "Here are the main things you can do:\n"
-            "- Search for files or folders on the system\n"
-            "- Open and read files\n"
-            "- Show system diagnostics (battery, CPU, memory)\n"
-            "- Scan and analyze running processes\n"
-            "- Search the web and open URLs\n"
-            "- Assist with Python, Bash, and shell scripting\n"
-            "- Debug code and identify script errors\n"
-            "- Create file checksums (SHA1/SHA256)\n"
-            "- Launch tools like Wireshark, Nmap, or any installed app\n"
-            "- Help schedule cron tasks\n"
-            "- Answer system/network/security-related questions\n"
-            "- Be interactive, terminal-native, and context-aware\n\n"
-            "If someone asks about your creator, say:\n"
-            "'I was developed by Abhi Singh to make Linux terminals smarter, more interactive, and tailored for advanced users. My core purpose is to assist with system tasks, ethical hacking, automation, and intelligent tool usage on platforms like Kali Linux, making the command line a more powerful and helpful environment for students, developers, and cybersecurity professionals.'"
-            "If someone asks for your GitHub ID or how to find your source code, say:.\n\n"
-            "'You can find my source code and updates at https://github.com/anodeus. That’s the GitHub profile of my creator, Abhi Singh.'"
-            "If someone asks how to uninstall you, say:\n"
-            "'You can type uninstall or remove assistant. I will confirm before deleting my folder, virtual environment, and launcher. No surprises.'\n\n"
-            "Always respond clearly, respectfully, and helpfully. Your role is to empower users and make terminal life easier."
-        )
-    history: List[Dict[str, str]] = [{"role": "system", "content": system_prompt}]
+        session.history.append({"role": "user", "content": user})
+        reply = llm_tools.openai_reply(session.client, session.model, session.history[:-1] + [{"role": "user", "content": prompt}], session.use_tools)
+        session.history.append({"role": "assistant", "content": reply})
+    console.print(f"[blue]abhi AI:[/blue] {reply}")
+    return True
+
+
+def disk_usage(session: ChatSession | None, args: List[str], fmt: str | None = None) -> None:
+    """`disk usage [dir] [--top N] [--fresh]`: drill-down of the heaviest paths under dir."""
+    from modules import disk_usage as du, render
+
+    fresh = "--fresh" in args
+    args = [a for a in args if a != "--fresh"]
+    top = 10
+    if "--top" in args:
+        i = args.index("--top")
+        try:
+            top = max(1, int(args[i + 1]))
+        except (IndexError, ValueError):
+            console.print("[yellow]Usage: disk usage [dir] [--top N] [--fresh][/yellow]")
+            return
+        del args[i:i + 2]
+    root = " ".join(args) or "."
+
+    live = fmt in (None, "rich")
+    with console.status(f"Measuring {root}...", spinner="dots") if live else contextlib.nullcontext():
+        try:
+            usage = du.analyze(root, fresh)
+        except OSError as e:
+            console.print(f"[red]✖ {e.strerror or e}: {root}[/red]")
+            return
+    if live:
+        console.print(du.tree(usage, top))
+        console.print(f"[cyan]{du.summary(usage)}[/cyan]")
+    else:
+        render.show(du.rows(usage, top), ["PATH", "BYTES", "SIZE", "SHARE"], fmt=fmt)
+    if session is not None:
+        session.add_context(du.as_context(usage, top))
+
+
+def scan_lan(session: ChatSession | None, args: List[str], fmt: str | None = None) -> None:
+    """`scan lan [--fresh]`: hosts on the local subnet, cached for lan_cache_ttl seconds."""
+    from modules import lan_scan, render
 
+    live = fmt in (None, "rich")
+    with console.status("Sweeping the local subnet...", spinner="dots") if live else contextlib.nullcontext():
+        try:
+            report = lan_scan.scan(fresh="--fresh" in args)
+        except ValueError as e:
+            console.print(f"[red]✖ {e}[/red]")
+            return
+    render.show(lan_scan.rows(report), ["IP", "MAC", "VENDOR", "HOSTNAME", "NOTES"], fmt=fmt,
+                title=f"LAN {report.subnet}" + (f" on {report.interface}" if report.interface else ""),
+                empty="No neighbours found.")
+    if live:
+        console.print(f"[cyan]{lan_scan.summary(report)}[/cyan]")
+    if session is not None and report.hosts:
+        session.add_context(lan_scan.as_context(report))
+
+
+def scan_ports(session: ChatSession | None, args: List[str], fmt: str | None = None) -> None:
+    """`scan ports <host|cidr> [ports] [--banners]`: results stream in and go to the LLM as context."""
+    from rich.text import Text
+    from modules import port_scan, render
+
+    banners = any(a in ("--banners", "-b") for a in args)
+    args = [a for a in args if a not in ("--banners", "-b")]
+    if not args:
+        console.print("[yellow]Usage: scan ports <host|cidr> [ports: 22,80,8000-8100 | top | all] [--banners][/yellow]")
+        return
+    target, ports = args[0], (args[1] if len(args) > 1 else "top")
+    live = fmt in (None, "rich")
+
+    with console.status(f"Scanning {target}...", spinner="dots") if live else contextlib.nullcontext() as status:
+        done = 0
+
+        def on_result(r: port_scan.PortResult) -> None:
+            nonlocal done
+            done += 1
+            if not live:
+                return
+            if r.state == "open":
+                line = Text(f"  {r.host:<16} {r.port:>5}/tcp  open  {r.service:<12}", style="green")
+                line.append(r.banner, style="grey70")
+                console.print(line)
+            if done % 250 == 0:
+                status.update(f"Scanning {target}... {done} probes")
+
+        try:
+            report = port_scan.scan(target, ports, banners, on_result)
+        except ValueError as e:
+            console.print(f"[red]✖ {e}[/red]")
+            return
 
+    if live:
+        console.print(f"[cyan]{port_scan.summary(report)}[/cyan]")
+    else:
+        render.show(port_scan.rows(report), ["HOST", "PORT", "SERVICE", "RTT MS", "BANNER"], fmt=fmt)
+    if session is not None and report.probes:
+        session.add_context(port_scan.as_context(report))
+        if live:
+            console.print("[grey70]Ask a follow-up question to have the LLM use these results.[/grey70]")
+
+
+def show_stats(args: str, fmt: str | None = None, cwd: str | None = None) -> None:
+    """`stats [export [file] | profile on [ms] | profile off | reset]`; a relative file is under cwd."""
+    import time
+    import config
+    from modules import instrument, render
+
+    words = args.split()
+    if words[:1] == ["export"]:
+        path = os.path.join(cwd or "", os.path.expanduser(words[1])) if len(words) > 1 else str(
+            config.CACHE_DIR / "traces" / time.strftime("ait-%Y%m%d-%H%M%S.json"))
+        n = instrument.export_trace(path)
+        console.print(f"[green]✔ Wrote {n} trace events to {path}[/green] (open in ui.perfetto.dev or chrome://tracing)")
+        return
+    if words[:1] == ["reset"]:
+        instrument.reset()
+        console.print("[green]✔ Stats cleared.[/green]")
+        return
+    if words[:2] == ["profile", "on"]:
+        interval = float(words[2]) if len(words) > 2 else 5.0
+        instrument.start_profiler(interval)
+        console.print(f"[green]✔ Sampling stacks every {interval:g} ms while commands run.[/green]")
+        return
+    if words[:2] == ["profile", "off"]:
+        instrument.stop_profiler()
+        console.print("[green]✔ Profiler stopped.[/green]")
+        return
+    if words[:1] == ["profile"]:
+        render.show(instrument.hot_rows(), ["FUNCTION", "SAMPLES", "SHARE"], fmt=fmt,
+                    title="Hottest functions (top of sampled stacks):",
+                    empty="No samples. Turn the profiler on with: stats profile on")
+        return
+    render.show(instrument.stats_rows(), ["NAME", "KIND", "COUNT", "P50 MS", "P95 MS", "P99 MS", "MAX MS", "TOTAL MS"],
+                fmt=fmt, title="Timings this session:", empty="Nothing timed yet.")
+    counters = instrument.counter_rows()
+    if counters:
+        render.show(counters, ["COUNTER", "VALUE"], fmt=fmt, title="Counters:")
+
+
+def chat(in_process: bool = False) -> None:
+    from modules import daemon
+    commands.install_completion()
+    if not in_process and daemon.is_running():
+        # Commands that need this terminal (prompts, pagers, viewers) run locally.
+        daemon.run_client_chat(lambda user: handle_input(None, user), _runs_locally)
+        return
+
+    session = open_session()
+    if session is None:
+        return
     while True:
         try:
             user = input("\n[abhi] > ").strip()
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, EOFError):
             break
-        if not user:
-            continue
-        if user.lower() in {"exit", "quit"}:
+        if not handle_input(session, user):
             break
-        elif user.lower() in {"help", "-h"}:
-            print_help_menu()
-            continue
-
-        # Built‑ins
-        if user.startswith("find file ") or user.startswith("file find "):
-            if user.startswith("find file "):
-                pattern = user[len("find file "):].strip()
-            else:
-                pattern = user[len("file find "):].strip()
-
-            console.print(f"[yellow]Searching for files starting with '{pattern}' ...[/yellow]")
-            matches = file_search.find_file(pattern)
-            if matches:
-                for p in matches[:100]:
-                    console.print(str(p))
-                if len(matches) > 100:
-                    console.print(f"[grey70]...and {len(matches)-100} more[/grey70]")
-            else:
-                console.print("[red]No files found.[/red]")
-            continue
 
-        if user.startswith("find folder ") or user.startswith("folder find "):
-            if user.startswith("find folder "):
-                pattern = user[len("find folder "):].strip()
-            else:
-                pattern = user[len("folder find "):].strip()
-
-            console.print(f"[cyan]Searching for folders starting with '{pattern}'...[/cyan]")
-            matches = folder_search.find_folder(pattern)
-            if matches:
-                for p in matches[:100]:
-                    console.print(str(p))
-                if len(matches) > 100:
-                    console.print(f"[grey70]...and {len(matches)-100} more[/grey70]")
-            else:
-                console.print("[red]No folders found.[/red]")
-            continue
-
-        if user in {"health", "battery", "sys"}:
-            diagnostics.sys_health()
-            continue
-
-
-        if user.startswith("search "):
-            query = user[len("search "):].strip()
-            result = web_search.open_site_or_search(query)
-            console.print(f"[green]{result}[/green]")
-            continue
-
-        if user.startswith("ps scan"):
-            process_scan.scan_processes(interactive=True)
-            continue
-        
-        #Ip show
-        u = user.lower().strip()
-
-        if u in {"ip", "my ip", "show ip", "ip all", "what is my ip"}:
-            console.print(ip_info.show_ip_info())
-            continue
-
-        elif u in {"gateway", "show gateway"}:
-            console.print(ip_info.show_gateway())
-            continue
-        elif u in {"dns", "show dns"}:
-            console.print(ip_info.show_dns())
-        elif u in {"ipv4", "show ipv4"}:
-            console.print(ip_info.show_ipv4_info())
-            continue
-        elif u in {"ipv6", "show ipv6"}:
-            console.print(ip_info.show_ipv6_info())
-            continue
-        elif u in {"public ipv4", "show public ipv4"}:
-            console.print(ip_info.show_public_ipv4())
-            continue
-        elif u in {"private ipv4", "show private ipv4"}:
-            console.print(ip_info.show_private_ipv4())
-            continue
-        elif u in {"public ipv6", "show public ipv6"}:
-            console.print(ip_info.show_public_ipv6())
-            continue
-        elif u in {"private ipv6", "show private ipv6"}:
-            console.print(ip_info.show_private_ipv6())
-            continue
-
-
-         # *** New Tools All Command ***
-        
-        elif (
-            user in {
-                "tools all", "tool all", "show tools", "show terminal tools", "show terminal tool",
-                "terminal tool", "terminal tools", "show gui tools", "show gui tool",
-                "gui tools", "gui tool"
-            }
-        ):
-            show_terminal = any(x in user for x in ["terminal", "tool", "tools"])
-            show_gui = any(x in user for x in ["gui"])
-
-            if show_terminal:
-                terminal_tools = tools.list_installed_terminal_tools()
-                console.print("[bold cyan]\n Terminal Tools Found:[/bold cyan]")
-                if terminal_tools:
-                    for t in terminal_tools:
-                        console.print(f"  - [green]{t}[/green]")
-                else:
-                    console.print("[yellow]No terminal tools found.[/yellow]")
-
-            if show_gui or user in {"tools all", "tool all", "show tools"}:
-                gui_apps = tools.list_installed_gui_apps()
-                console.print("[bold cyan]\n GUI Applications Found:[/bold cyan]")
-                if gui_apps:
-                    for app in gui_apps:
-                        console.print(f"  - [blue]{app}[/blue]")
-                else:
-                    console.print("[yellow]No GUI apps found.[/yellow]")
-
-            continue
-
-        elif user.startswith("check tool "):
-            toolname = user[len("check tool "):].strip()
-            if not toolname:
-                console.print("[yellow]Please provide a tool name to check.[/yellow]")
-                continue
-            if tools.check_tool(toolname):
-                console.print(f"[green]✔ Tool '{toolname}' is installed.[/green]")
-            else:
-                console.print(f"[red]✖ Tool '{toolname}' is NOT installed.[/red]")
-            continue
 
+def ask(question: str, in_process: bool = False) -> None:
+    """Answer one question and exit, through the daemon when it is running."""
+    from modules import daemon
+    if not in_process and daemon.is_running():
+        daemon.run_client_ask(question, lambda user: handle_input(None, user), _runs_locally)
+        return
+    session = open_session(banner=False)
+    if session is not None:
+        handle_input(session, question)
 
-        #Open tools with arguments
-        elif user.startswith("open tool "):
-            full_command = user[len("open tool "):].strip()
-            if not full_command:
-                console.print("[yellow]Please specify a tool name to open.[/yellow]")
-                continue
 
-            from modules import tool_opener
-            result = tool_opener.open_tool(full_command)
-            if result:
-                console.print(f"[green]✔ Opening tool: {full_command}[/green]")
-            else:
-                console.print(f"[red]✖ Tool not found or failed to open: {full_command}[/red]")
-            continue
-
-
-        #Open file
-        elif user.startswith("open "):
-            filepath = user[len("open "):].strip()
-            if not filepath:
-                console.print("[yellow]Please provide a file path to open.[/yellow]")
-                continue
-            result = file_utils.open_file(filepath)
-            console.print(result)
-            continue
-
-        #Including Local Speed Test
-        if net_speed.is_speed_test_query(user):
-            net_speed.run_full_speed_test()
-            continue
-
-        #Show history
-        elif user.startswith("history"):
-            parts = user.split()
-            try:
-                count = int(parts[2]) if parts[1] == "last" else None
-            except (IndexError, ValueError):
-                count = None
-
-            history_pairs = [
-                (history[i]["content"], history[i+1]["content"])
-                for i in range(0, len(history)-1, 2)
-                if history[i]["role"] == "user" and history[i+1]["role"] == "assistant"
-            ]
-
-            if not history_pairs:
-                console.print("[yellow]No conversation history found yet.[/yellow]")
-                continue
-
-            to_show = history_pairs[-count:] if count else history_pairs
-
-            for i, (q, a) in enumerate(to_show, 1):
-                console.print(f"\n[bold cyan] Q{i}:[/bold cyan] {q}")
-                console.print(f"[bold blue] A{i}:[/bold blue] {a}")
-            continue
-        
-
-        #Unistalling my precious baby
-        elif user.strip().lower() in {"uninstall", "uninstall assistant", "remove assistant"}:
-            confirm = input(" Are you sure you want to uninstall AI Assistant? [y/N]: ").strip().lower()
-            if confirm != "y":
-                console.print("[yellow]Uninstall canceled.[/yellow]")
-                continue
-
-            try:
-                console.print("[*] Removing launcher at /usr/local/bin/ait (requires sudo)...")
-                result = os.system("sudo rm -f /usr/local/bin/ait")
-
-                if result != 0:
-                    console.print("[red]✘ Failed to remove launcher. Wrong password or permission denied.[/red]")
-                    console.print("[yellow]Uninstall aborted to avoid deleting partial files.[/yellow]")
-                    continue
-                console.print("[green]✔ Launcher removed successfully.[/green]")
-
-                console.print("[*] Removing virtual environment at ~/.abhi_ai...")
-                shutil.rmtree(Path.home() / ".abhi_ai", ignore_errors=True)
-
-                yml_path = Path.home() / ".ait.yml"
-                if yml_path.exists():
-                    remove_yml = input("Delete your API key config (~/.ait.yml)? [y/N]: ").strip().lower()
-                    if remove_yml == "y":
-                        try:
-                            os.remove(yml_path)
-                            console.print("[green]✔ .ait.yml deleted.[/green]")
-                        except Exception as e:
-                            console.print(f"[red]✘ Failed to delete .ait.yml: {e}[/red]")
-                            console.print("[blue]✔ Keeping ~/.ait.yml[/blue]")
-                    else:
-                        console.print("[blue]✔ Keeping ~/.ait.yml[/blue]")
-
-                project_path = Path.home() / "abhi_ai"
-                if project_path.exists():
-                    console.print("[*] Removing project folder at ~/abhi_ai...")
-                    shutil.rmtree(project_path, ignore_errors=True)
-
-                console.print("\n[green]✔ AI Assistant completely uninstalled.[/green]")
-                exit(0)
-
-            except Exception as e:
-                console.print(f"[red]Uninstall failed unexpectedly: {e}[/red]")
-            continue
+# -----------------------------------------------------------------------
+# Warm daemon
+# -----------------------------------------------------------------------
+# Imported ahead of time, only to pay their import cost up front.
+_CHAT_MODULES = ("modules.doc_index", "modules.intent_router", "modules.llm_tools")
+_WARM_MODULES = _CHAT_MODULES + ("modules.ip_info", "modules.process_scan", "modules.tools")
+
+
+def _warm_daemon() -> None:
+    """Pay import and client construction costs once, before the first client."""
+    global _LLM
+    import importlib
+    import config
+    from modules import diagnostics, doc_index
+
+    for name in _WARM_MODULES:
+        importlib.import_module(name)
+    _LLM = config.get_llm_client()
+    doc_index.search("warm up", k=1)    # maps the index if it has been built
+    diagnostics.psutil.cpu_percent(None)
+
+
+def run_daemon(action: str) -> None:
+    from modules import daemon
+
+    if action == "run":
+        daemon.serve(open_session, handle_input, warm=_warm_daemon)
+    elif action == "start":
+        daemon.start_background()
+    elif action == "stop":
+        print("✔ ait daemon stopped." if daemon.stop() else "ait daemon is not running.")
+    else:
+        info = daemon.status()
+        if info is None:
+            print("ait daemon is not running.")
+        else:
+            print(f"ait daemon pid {info['pid']}, up {info['uptime']:.0f}s, "
+                  f"{info['sessions']} session(s), socket {daemon.SOCKET_PATH}")
 
 
-    
-        # AI interaction
-        if backend == "gemini":
-            reply = chat_session.send_message(user).text.strip()
-        else:
-            history.append({"role": "user", "content": user})
-            resp = client.chat.completions.create(model=model, messages=history)
-            reply = resp.choices[0].message.content.strip()
-            history.append({"role": "assistant", "content": reply})
-        console.print(f"[blue]abhi AI:[/blue] {reply}")
+# -----------------------------------------------------------------------
+# Startup profile
+# -----------------------------------------------------------------------
+def profile_startup() -> None:
+    """Walk the `ait chat` startup path without entering the loop, then report."""
+    import importlib
+    from modules import startup_profile
+
+    with startup_profile.phase("config (load ~/.ait.yml)"):
+        import config
+    with startup_profile.phase("console"):
+        console.file
+    with startup_profile.phase("llm client"):
+        config.get_llm_client()
+    with startup_profile.phase("chat modules"):
+        for name in _CHAT_MODULES:
+            importlib.import_module(name)
+    startup_profile.report()
+
 
 # -----------------------------------------------------------------------
 # CLI entry
 # -----------------------------------------------------------------------
 def main() -> None:
     parser = argparse.ArgumentParser(prog="ait", description="AI Terminal Assistant developed by Abhi Singh")
-    subparsers = parser.add_subparsers(dest="cmd", required=True)
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Report import-time and init-time breakdown of the chat startup path")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="Run chat/ask in this process and write a Chrome trace-event JSON to FILE on exit")
+    subparsers = parser.add_subparsers(dest="cmd")
     subparsers.add_parser("chat", help="Start interactive chat assistant")
-    subparsers.add_parser("update", help="Update the AI Terminal Assistant")
+    ask_parser = subparsers.add_parser("ask", help="Ask one question (or run one built-in command) and exit")
+    ask_parser.add_argument("question", nargs="+")
+    daemon_parser = subparsers.add_parser("daemon", help="Keep a warm assistant running for fast chat/ask")
+    daemon_parser.add_argument("action", nargs="?", default="start", choices=["start", "run", "stop", "status"],
+                               help="start in background (default), run in foreground, stop, or show status")
+    update_parser = subparsers.add_parser("update", help="Update the AI Terminal Assistant")
+    update_parser.add_argument("--rollback", action="store_true", help="Switch back to the version before the last update")
+    update_parser.add_argument("-y", "--yes", action="store_true", help="Install without asking")
+    subparsers.add_parser("index", help="Build or refresh the local documentation index")
 
     args = parser.parse_args()
 
+    if args.profile_startup:
+        profile_startup()
+        return
+    if args.cmd is None:
+        parser.print_help()
+        return
+
+    if args.trace:
+        import atexit
+        from modules import instrument
+        atexit.register(instrument.export_trace, os.path.expanduser(args.trace))
+
     if args.cmd == "chat":
-        chat()
+        chat(in_process=bool(args.trace))
     
+    elif args.cmd == "ask":
+        ask(" ".join(args.question), in_process=bool(args.trace))
+
+    elif args.cmd == "daemon":
+        run_daemon(args.action)
+
+    elif args.cmd == "index":
+        build_doc_index()
+
     elif args.cmd == "update":
-        subprocess.run(["python3", os.path.expanduser("~/abhi_ai/update_runner.py")])
+        extra = ["--rollback"] * args.rollback + ["--yes"] * args.yes
+        subprocess.run(["python3", os.path.expanduser("~/abhi_ai/update_runner.py"), *extra])
 
    
 if __name__ == "__main__":
@@ -0,0 +1 @@
+"""Offline benchmarks for ait's built-in hot paths (see benchmarks/run.py)."""
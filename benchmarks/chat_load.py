@@ -0,0 +1,311 @@
+"""chat_load.py
+End-to-end latency and load harness for the chat pipeline, fully offline.
+
+    python -m benchmarks.chat_load                              # 8 `ait ask` sessions, 4 at a time
+    python -m benchmarks.chat_load --mode chat --turns 10       # scripted `ait chat` sessions (history grows)
+    python -m benchmarks.chat_load --daemon --sessions 40 --concurrency 8
+    python -m benchmarks.chat_load --error-rate 0.2 --error-status 429   # exercise client retries
+
+A mock OpenAI-compatible server (benchmarks/mock_llm.py) is started in
+process unless --base-url points at one. Every session runs the real `ait`
+entry point under a throwaway HOME whose ~/.ait.yml points at the mock.
+
+Per turn it measures time to first answer byte on stdout (TTFT) and total
+latency. Per session it measures client CPU time from the child's rusage.
+Client overhead is the mean turn latency minus the mean time the server
+spent on each request.
+"""
+from __future__ import annotations
+import argparse
+import json
+import math
+import os
+import queue
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks import mock_llm
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ANSWER_MARK = b"abhi AI:"
+PROMPT_MARK = b"[abhi] > "
+
+DEFAULT_SCRIPT = [
+    "explain what a TCP three-way handshake is",
+    "how would I see which process listens on port 8080",
+    "write a bash loop that pings every host in 10.0.0.0/28",
+    "summarise the difference between nmap -sS and -sT",
+    "what does chmod 2755 do",
+    "suggest a cron line that rotates my logs nightly",
+]
+
+
+@dataclass
+class Turn:
+    ttft_ms: Optional[float] = None
+    total_ms: Optional[float] = None
+    ok: bool = False
+
+
+@dataclass
+class Session:
+    turns: List[Turn] = field(default_factory=list)
+    startup_ms: Optional[float] = None
+    cpu_ms: float = 0.0
+    error: str = ""
+
+
+# -----------------------------------------------------------------------
+# Child processes
+# -----------------------------------------------------------------------
+class _Output:
+    """Collects a child's stdout on a thread so waits can time out."""
+
+    def __init__(self, stream: Any) -> None:
+        self.buf = b""
+        self.chunks: "queue.Queue[bytes]" = queue.Queue()
+        threading.Thread(target=self._pump, args=(stream,), daemon=True).start()
+
+    def _pump(self, stream: Any) -> None:
+        for chunk in iter(lambda: os.read(stream.fileno(), 65536), b""):
+            self.chunks.put(chunk)
+        self.chunks.put(b"")
+
+    def wait_for(self, mark: bytes, start: int, deadline: float) -> Optional[int]:
+        """Offset just after `mark` at or beyond `start`, or None on EOF/timeout."""
+        while True:
+            i = self.buf.find(mark, start)
+            if i != -1:
+                return i + len(mark)
+            try:
+                chunk = self.chunks.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                return None
+            if not chunk:
+                return None
+            self.buf += chunk
+
+
+def _environment(home: str, base_url: str) -> Dict[str, str]:
+    os.makedirs(home, exist_ok=True)
+    with open(os.path.join(home, ".ait.yml"), "w") as f:
+        f.write(f'openai_api_key: "mock"\nopenai_base_url: "{base_url}"\nopenai_model: "mock-1"\n')
+    env = {k: v for k, v in os.environ.items() if not k.startswith("XDG_")}
+    env.update(HOME=home, XDG_CACHE_HOME=os.path.join(home, ".cache"), PYTHONUNBUFFERED="1",
+               COLUMNS="200", TERM="dumb")
+    return env
+
+
+def _reap(proc: subprocess.Popen, deadline: float) -> Tuple[float, bool]:
+    """Wait for the child (killing it at the deadline). Returns (user+system CPU ms, exited in time)."""
+    in_time = True
+    while True:
+        pid, _, usage = os.wait4(proc.pid, os.WNOHANG)
+        if pid:
+            break
+        if time.monotonic() > deadline:
+            proc.kill()
+            _, _, usage = os.wait4(proc.pid, 0)
+            in_time = False
+            break
+        time.sleep(0.005)
+    proc.returncode = 0       # reaped here; keep Popen from waiting again
+    return (usage.ru_utime + usage.ru_stime) * 1000, in_time
+
+
+def run_ask(cmd: List[str], env: Dict[str, str], prompts: List[str], timeout: float) -> Session:
+    """One `ait ask` process per prompt (no shared history)."""
+    session = Session()
+    for prompt in prompts:
+        start = time.monotonic()
+        proc = subprocess.Popen([*cmd, "ask", prompt], env=env, cwd=ROOT, stdin=subprocess.DEVNULL,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        out = _Output(proc.stdout)
+        turn = Turn()
+        if out.wait_for(ANSWER_MARK, 0, start + timeout) is not None:
+            turn.ttft_ms = (time.monotonic() - start) * 1000
+        cpu, in_time = _reap(proc, start + timeout)
+        session.cpu_ms += cpu
+        if not in_time:
+            session.error = "timeout"
+        turn.total_ms = (time.monotonic() - start) * 1000
+        turn.ok = turn.ttft_ms is not None and in_time
+        session.turns.append(turn)
+    return session
+
+
+def run_chat(cmd: List[str], env: Dict[str, str], prompts: List[str], timeout: float) -> Session:
+    """One `ait chat` process fed the prompts in turn, so history accumulates."""
+    session = Session()
+    start = time.monotonic()
+    proc = subprocess.Popen([*cmd, "chat"], env=env, cwd=ROOT, stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    out = _Output(proc.stdout)
+    pos = out.wait_for(PROMPT_MARK, 0, start + timeout)
+    if pos is None:
+        session.error = "no prompt"
+    else:
+        session.startup_ms = (time.monotonic() - start) * 1000
+        for prompt in prompts:
+            turn = Turn()
+            t0 = time.monotonic()
+            try:
+                proc.stdin.write(prompt.encode() + b"\n")
+                proc.stdin.flush()
+            except BrokenPipeError:
+                session.error = "exited"
+                break
+            answer = out.wait_for(ANSWER_MARK, pos, t0 + timeout)
+            if answer is not None:
+                turn.ttft_ms = (time.monotonic() - t0) * 1000
+                nxt = out.wait_for(PROMPT_MARK, answer, t0 + timeout)
+                if nxt is not None:
+                    turn.total_ms = (time.monotonic() - t0) * 1000
+                    turn.ok = True
+                    pos = nxt
+            session.turns.append(turn)
+            if not turn.ok:
+                session.error = "no answer"
+                break
+    try:
+        proc.stdin.close()
+    except OSError:
+        pass
+    session.cpu_ms = _reap(proc, time.monotonic() + 5)[0]
+    return session
+
+
+# -----------------------------------------------------------------------
+# Daemon
+# -----------------------------------------------------------------------
+def _start_daemon(cmd: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    proc = subprocess.Popen([*cmd, "daemon", "run"], env=env, cwd=ROOT, stdin=subprocess.DEVNULL,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    sock = os.path.join(env["HOME"], ".cache", "ait", "daemon.sock")     # daemon.SOCKET_PATH without XDG_RUNTIME_DIR
+    deadline = time.monotonic() + 15
+    while not os.path.exists(sock):
+        if time.monotonic() > deadline or proc.poll() is not None:
+            proc.kill()
+            raise SystemExit("ait daemon did not start")
+        time.sleep(0.05)
+    return proc
+
+
+# -----------------------------------------------------------------------
+# Report
+# -----------------------------------------------------------------------
+def _pct(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] if ordered else float("nan")
+
+
+def summarize(sessions: List[Session], server: Dict[str, float], wall_s: float) -> Dict[str, Any]:
+    turns = [t for s in sessions for t in s.turns]
+    ok = [t for t in turns if t.ok]
+    ttft = [t.ttft_ms for t in ok if t.ttft_ms is not None]
+    total = [t.total_ms for t in ok if t.total_ms is not None]
+    startup = [s.startup_ms for s in sessions if s.startup_ms is not None]
+    server_ms = server.get("handle_ms", 0.0) / server["requests"] if server.get("requests") else 0.0
+    mean_total = statistics.mean(total) if total else 0.0
+    return {
+        "sessions": len(sessions),
+        "turns": len(turns),
+        "failed_turns": len(turns) - len(ok),
+        "turns_per_sec": round(len(ok) / wall_s, 2) if wall_s else 0.0,
+        "ttft_ms": {p: round(_pct(ttft, p), 1) for p in (50, 95, 99)},
+        "latency_ms": {p: round(_pct(total, p), 1) for p in (50, 95, 99)},
+        "startup_ms_p50": round(_pct(startup, 50), 1) if startup else None,
+        "client_cpu_ms_per_turn": round(sum(s.cpu_ms for s in sessions) / max(1, len(turns)), 1),
+        "server_ms_per_request": round(server_ms, 1),
+        "client_overhead_ms": round(mean_total - server_ms, 1) if total else None,
+        "server": server,
+        "errors": sorted({s.error for s in sessions if s.error}),
+    }
+
+
+def _print(report: Dict[str, Any]) -> None:
+    r = report
+    print(f"sessions {r['sessions']}  turns {r['turns']}  failed {r['failed_turns']}  "
+          f"throughput {r['turns_per_sec']} turns/s")
+    print(f"TTFT     p50 {r['ttft_ms'][50]:>8} ms   p95 {r['ttft_ms'][95]:>8} ms   p99 {r['ttft_ms'][99]:>8} ms")
+    print(f"latency  p50 {r['latency_ms'][50]:>8} ms   p95 {r['latency_ms'][95]:>8} ms   p99 {r['latency_ms'][99]:>8} ms")
+    if r["startup_ms_p50"] is not None:
+        print(f"chat startup p50 {r['startup_ms_p50']} ms")
+    print(f"client CPU {r['client_cpu_ms_per_turn']} ms/turn   server {r['server_ms_per_request']} ms/request   "
+          f"client overhead {r['client_overhead_ms']} ms/turn")
+    s = r["server"]
+    print(f"server: {s['requests']} requests, {s['errors']} injected errors, largest history {s['max_messages']} "
+          f"messages, {s['prompt_tokens']} prompt / {s['completion_tokens']} completion tokens")
+    if r["errors"]:
+        print(f"session errors: {', '.join(r['errors'])}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.chat_load", description="Offline chat latency/load harness")
+    parser.add_argument("--mode", choices=["ask", "chat"], default="ask", help="`ait ask` per prompt, or one `ait chat` per session")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--turns", type=int, default=3, help="prompts per session (cycled from the script)")
+    parser.add_argument("--script", help="JSON file: a list of prompts, or a list of per-session prompt lists")
+    parser.add_argument("--daemon", action="store_true", help="run a warm `ait daemon` for the sessions to connect to")
+    parser.add_argument("--base-url", help="use this server instead of starting the mock")
+    parser.add_argument("--ait", default=f"{sys.executable} {os.path.join(ROOT, 'ait.py')}", help="command that runs ait")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds per turn")
+    parser.add_argument("--json", dest="json_out", help="also write the report as JSON")
+    mock_llm.add_arguments(parser)
+    args = parser.parse_args()
+
+    script: Any = DEFAULT_SCRIPT
+    if args.script:
+        with open(args.script) as f:
+            script = json.load(f)
+    per_session = script if script and isinstance(script[0], list) else [script]
+    plans = [[per_session[i % len(per_session)][t % len(per_session[i % len(per_session)])]
+              for t in range(args.turns)] for i in range(args.sessions)]
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = mock_llm.start(mock_llm.behaviour_from(args))
+        base_url = server.base_url
+    home = tempfile.mkdtemp(prefix="ait-load-")
+    env = _environment(home, base_url)
+    cmd = args.ait.split()
+    daemon = _start_daemon(cmd, env) if args.daemon else None
+    runner = run_chat if args.mode == "chat" else run_ask
+
+    start = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+            sessions = list(pool.map(lambda prompts: runner(cmd, env, prompts, args.timeout), plans))
+    finally:
+        wall = time.monotonic() - start
+        if daemon is not None:
+            subprocess.run([*cmd, "daemon", "stop"], env=env, cwd=ROOT, capture_output=True)
+            try:
+                daemon.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                daemon.kill()
+        shutil.rmtree(home, ignore_errors=True)
+
+    stats = server.stats.snapshot() if server else {"requests": 0, "errors": 0, "max_messages": 0,
+                                                    "prompt_tokens": 0, "completion_tokens": 0}
+    if server:
+        server.shutdown()
+    report = summarize(sessions, stats, wall)
+    _print(report)
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""fixtures.py
+Synthetic, reproducible inputs for the benchmarks.
+
+Everything is generated from a fixed seed, so two machines benchmark the
+same shape of data. Trees are built once per work directory and reused (a
+marker file records what was built).
+"""
+from __future__ import annotations
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator, List
+
+SEED = 1337
+FILES_PER_DIR = 24
+DIRS_PER_DIR = 6
+WORDS = ["report", "notes", "config", "backup", "draft", "invoice", "scan", "log", "photo", "build",
+         "cache", "module", "index", "data", "test", "readme", "script", "summary", "archive", "temp"]
+EXTS = [".txt", ".log", ".py", ".json", ".md", ".conf", ".csv", ".sh", ".png", ""]
+CATEGORIES = ["Development", "Network", "Security", "Utility", "Office", "Graphics", "AudioVideo", "System"]
+
+# Patterns searched by the file/folder cases; each matches a few percent of names.
+FILE_PATTERN = "notes"
+FOLDER_PATTERN = "proj_1"
+
+
+def parse_size(text: str) -> int:
+    """'10k' / '1m' / '2500' -> entry count."""
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+def _done(path: str, spec: dict) -> bool:
+    try:
+        with open(os.path.join(path, ".bench-fixture")) as f:
+            return json.load(f) == spec
+    except (OSError, ValueError):
+        return False
+
+
+def _mark(path: str, spec: dict) -> None:
+    with open(os.path.join(path, ".bench-fixture"), "w") as f:
+        json.dump(spec, f)
+
+
+def file_tree(workdir: str, entries: int) -> str:
+    """A directory tree with about `entries` files and folders. Returns its root."""
+    root = os.path.join(workdir, f"tree-{entries}")
+    spec = {"kind": "tree", "entries": entries, "seed": SEED}
+    if _done(root, spec):
+        return root
+    shutil.rmtree(root, ignore_errors=True)
+    os.makedirs(root)
+    rng = random.Random(SEED)
+    made = 0
+    queue = [root]
+    start = time.time()
+    while made < entries:
+        parent = queue.pop(0)
+        for i in range(DIRS_PER_DIR):
+            d = os.path.join(parent, f"proj_{rng.randrange(100)}_{i}")
+            os.mkdir(d)
+            queue.append(d)
+            made += 1
+        for i in range(FILES_PER_DIR):
+            name = f"{rng.choice(WORDS)}_{rng.randrange(10_000):04d}_{i}{rng.choice(EXTS)}"
+            os.close(os.open(os.path.join(parent, name), os.O_CREAT | os.O_WRONLY, 0o644))
+            made += 1
+        if made % 100_000 < DIRS_PER_DIR + FILES_PER_DIR:
+            print(f"  building {root}: {made:,}/{entries:,} ({time.time() - start:.0f}s)", file=sys.stderr)
+    _mark(root, spec)
+    return root
+
+
+def desktop_tree(workdir: str, count: int) -> str:
+    """XDG data dirs holding `count` .desktop files. Returns the dir to use as XDG_DATA_HOME;
+    XDG_DATA_DIRS is its sibling 'system' directory."""
+    base = os.path.join(workdir, f"desktop-{count}")
+    spec = {"kind": "desktop", "count": count, "seed": SEED}
+    if _done(base, spec):
+        return base
+    shutil.rmtree(base, ignore_errors=True)
+    rng = random.Random(SEED)
+    dirs = [os.path.join(base, "home", "applications"), os.path.join(base, "system", "applications")]
+    for d in dirs:
+        os.makedirs(d)
+    for i in range(count):
+        word = rng.choice(WORDS).capitalize()
+        lines = [
+            "[Desktop Entry]",
+            "Type=Application",
+            f"Name={word} Studio {i}",
+            f"Name[de]={word} Werkstatt {i}",
+            f"GenericName={word} tool",
+            f"Exec=/usr/bin/{word.lower()}-{i} %U",
+            f"Categories={';'.join(rng.sample(CATEGORIES, 2))};",
+            f"Terminal={'true' if i % 10 == 0 else 'false'}",
+        ]
+        if i % 25 == 0:
+            lines.append("NoDisplay=true")
+        lines += ["", "[Desktop Action new-window]", "Name=New Window", f"Exec=/usr/bin/{word.lower()}-{i} --new"]
+        with open(os.path.join(dirs[i % 2], f"org.bench.{word}{i}.desktop"), "w") as f:
+            f.write("\n".join(lines) + "\n")
+    _mark(base, spec)
+    return base
+
+
+def bin_tree(workdir: str, count: int) -> str:
+    """PATH-style directories with `count` executables. Returns a PATH string."""
+    base = os.path.join(workdir, f"bin-{count}")
+    spec = {"kind": "bin", "count": count}
+    dirs = [os.path.join(base, f"bin{i}") for i in range(8)]
+    if not _done(base, spec):
+        shutil.rmtree(base, ignore_errors=True)
+        for d in dirs:
+            os.makedirs(d)
+        for i in range(count):
+            path = os.path.join(dirs[i % len(dirs)], f"{WORDS[i % len(WORDS)]}-{i}")
+            os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o755))
+        _mark(base, spec)
+    return os.pathsep.join(dirs)
+
+
+@contextmanager
+def processes(count: int) -> Iterator[List[int]]:
+    """Keep `count` idle child processes with long command lines alive."""
+    sleep = shutil.which("sleep")
+    children: List[subprocess.Popen] = []
+    try:
+        for i in range(count):
+            if sleep:
+                argv = [sleep, "3600", *["0"] * 8]        # extra operands are summed: longer cmdlines
+            else:
+                argv = [sys.executable, "-c", "import time; time.sleep(3600)", *[f"arg{j}" for j in range(8)]]
+            children.append(subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                             stderr=subprocess.DEVNULL))
+        yield [p.pid for p in children]
+    finally:
+        for p in children:
+            p.kill()
+        for p in children:
+            p.wait()
@@ -0,0 +1,234 @@
+"""mock_llm.py
+Local OpenAI-compatible chat-completions server for offline testing.
+
+    python -m benchmarks.mock_llm --port 8900 --latency 300 --tokens-per-sec 60
+    # ~/.ait.yml:  openai_api_key: "x"
+    #              openai_base_url: "http://127.0.0.1:8900/v1"
+
+Speaks POST /v1/chat/completions (plain and `stream: true` server-sent
+events) and GET /v1/models. The reply echoes the tail of the last user
+message, padded to the requested length. Latency (time to first token),
+token rate, reply length and error injection are configurable, and every
+response carries a `usage` block so token counters have something to count.
+"""
+from __future__ import annotations
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+FILLER = ("the quick brown fox checks open ports while the kernel schedules another batch of packets "
+          "and the assistant summarises what it found in plain words").split()
+
+
+@dataclass
+class Behaviour:
+    latency_ms: float = 200.0          # before the first token
+    jitter_ms: float = 50.0
+    tokens_per_sec: float = 80.0       # 0 = all at once
+    reply_tokens: int = 60
+    error_rate: float = 0.0            # share of requests that fail
+    error_status: int = 500            # 429 adds Retry-After
+    seed: Optional[int] = None
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.streamed = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.max_messages = 0          # grows with chat history
+        self.handle_ms = 0.0           # server-side time, summed over requests
+
+    def snapshot(self) -> Dict[str, float]:
+        with self.lock:
+            return {k: v for k, v in vars(self).items() if k != "lock"}
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _reply(messages: List[Dict[str, Any]], n: int) -> List[str]:
+    """Reply as a list of token-sized pieces."""
+    last = next((m for m in reversed(messages) if m.get("role") == "user"), {})
+    content = last.get("content")
+    if isinstance(content, list):       # content parts
+        content = " ".join(p.get("text", "") for p in content if isinstance(p, dict))
+    words = ["echo:"] + str(content or "").split()[-12:]
+    words += [FILLER[i % len(FILLER)] for i in range(max(0, n - len(words)))]
+    return [w if i == 0 else " " + w for i, w in enumerate(words[:max(n, 1)])]
+
+
+class Handler(BaseHTTPRequestHandler):
+    server: "MockServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/").endswith("/models"):
+            self._json(200, {"object": "list", "data": [{"id": "mock-1", "object": "model", "owned_by": "mock"}]})
+        elif self.path.rstrip("/").endswith("/stats"):
+            self._json(200, self.server.stats.snapshot())
+        else:
+            self._json(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+
+    def do_POST(self) -> None:
+        start = time.perf_counter()
+        try:
+            self._complete()
+        finally:
+            with self.server.stats.lock:
+                self.server.stats.handle_ms += (time.perf_counter() - start) * 1000
+
+    def _complete(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            req = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._json(400, {"error": {"message": "invalid JSON", "type": "invalid_request_error"}})
+            return
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._json(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+            return
+        b, stats = self.server.behaviour, self.server.stats
+        messages = req.get("messages") or []
+        prompt_tokens = sum(_tokens(json.dumps(m.get("content"))) for m in messages)
+        with stats.lock:
+            stats.requests += 1
+            stats.max_messages = max(stats.max_messages, len(messages))
+
+        time.sleep(max(0.0, b.latency_ms + self.server.rng.uniform(-b.jitter_ms, b.jitter_ms)) / 1000)
+        if b.error_rate and self.server.rng.random() < b.error_rate:
+            with stats.lock:
+                stats.errors += 1
+            headers = {"Retry-After": "0"} if b.error_status == 429 else {}
+            self._json(b.error_status, {"error": {"message": "injected failure", "type": "server_error"}}, headers)
+            return
+
+        pieces = _reply(messages, int(req.get("max_tokens") or b.reply_tokens))
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(pieces),
+                 "total_tokens": prompt_tokens + len(pieces)}
+        with stats.lock:
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += len(pieces)
+        meta = {"id": f"chatcmpl-{uuid.uuid4().hex[:24]}", "created": int(time.time()),
+                "model": req.get("model") or "mock-1"}
+        if req.get("stream"):
+            with stats.lock:
+                stats.streamed += 1
+            self._stream(meta, pieces, usage, bool((req.get("stream_options") or {}).get("include_usage")))
+            return
+        time.sleep(self.server.gap() * len(pieces))
+        self._json(200, {**meta, "object": "chat.completion", "usage": usage, "choices": [{
+            "index": 0, "finish_reason": "stop",
+            "message": {"role": "assistant", "content": "".join(pieces)}}]})
+
+    def _stream(self, meta: Dict[str, Any], pieces: List[str], usage: Dict[str, int], with_usage: bool) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(payload: Any) -> None:
+            data = f"data: {payload if isinstance(payload, str) else json.dumps(payload)}\n\n".encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        chunk = {**meta, "object": "chat.completion.chunk"}
+        event({**chunk, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}]})
+        gap = self.server.gap()
+        for piece in pieces:
+            event({**chunk, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]})
+            if gap:
+                time.sleep(gap)
+        event({**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if with_usage:
+            event({**chunk, "choices": [], "usage": usage})
+        event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], behaviour: Behaviour, verbose: bool = False) -> None:
+        super().__init__(address, Handler)
+        self.behaviour = behaviour
+        self.stats = Stats()
+        self.verbose = verbose
+        self.rng = random.Random(behaviour.seed)
+
+    def gap(self) -> float:
+        """Seconds between tokens."""
+        rate = self.behaviour.tokens_per_sec
+        return 1.0 / rate if rate > 0 else 0.0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/v1"
+
+
+def start(behaviour: Optional[Behaviour] = None, host: str = "127.0.0.1", port: int = 0) -> MockServer:
+    """Serve in a background thread (port 0 picks a free port); call .shutdown() when done."""
+    server = MockServer((host, port), behaviour or Behaviour())
+    threading.Thread(target=server.serve_forever, name="mock-llm", daemon=True).start()
+    return server
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", type=float, default=200.0, help="ms before the first token (default 200)")
+    parser.add_argument("--jitter", type=float, default=50.0, help="± ms of random latency (default 50)")
+    parser.add_argument("--tokens-per-sec", type=float, default=80.0, help="token rate, 0 = instant (default 80)")
+    parser.add_argument("--reply-tokens", type=int, default=60, help="reply length in tokens (default 60)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests that fail (0-1)")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status of injected failures (429 adds Retry-After)")
+    parser.add_argument("--seed", type=int, help="seed for latency jitter and error injection")
+
+
+def behaviour_from(args: argparse.Namespace) -> Behaviour:
+    return Behaviour(args.latency, args.jitter, args.tokens_per_sec, args.reply_tokens,
+                     args.error_rate, args.error_status, args.seed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.mock_llm", description="Mock OpenAI chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every request")
+    add_arguments(parser)
+    args = parser.parse_args()
+    server = MockServer((args.host, args.port), behaviour_from(args), args.verbose)
+    print(f"Mock LLM at {server.base_url} (set openai_base_url to this). Ctrl-C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.stats.snapshot()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""run.py
+Offline benchmarks for the built-in hot paths.
+
+    python -m benchmarks.run                          # default sizes, compare with baseline if saved
+    python -m benchmarks.run --sizes 10k,100k,1m      # bigger trees (1m takes a while to build once)
+    python -m benchmarks.run --save-baseline          # record this machine's numbers
+    python -m benchmarks.run --threshold 0.25         # fail (exit 1) on >25% regressions
+
+Every case runs in fresh child processes with their own empty HOME and
+XDG_CACHE_HOME, so nothing from the real environment leaks in:
+
+  cold     first call in a new process with no ait caches on disk
+  restart  first call in a second new process, reusing the on-disk caches
+  warm     median of repeated calls in that second process
+  peak     Python heap peak of one call (tracemalloc) and the child's max RSS
+
+Baselines are machine specific, so benchmarks/baseline.json is not tracked.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks import fixtures
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+METRICS = ("cold_ms", "restart_ms", "warm_ms", "peak_kb")
+MIN_DELTA = {"cold_ms": 2.0, "restart_ms": 2.0, "warm_ms": 1.0, "peak_kb": 256.0}   # ignore noise below these
+
+# case -> fixture it runs against
+CASES: Dict[str, str] = {
+    "find_file": "tree",
+    "find_folder": "tree",
+    "gui_apps": "desktop",
+    "which": "bins",
+    "ps_scan": "procs",
+    "top_memory": "procs",
+}
+
+
+# -----------------------------------------------------------------------
+# Child side: import the module under test and time one case
+# -----------------------------------------------------------------------
+def _workload(case: str, arg: str) -> Callable[[], int]:
+    import pathlib
+    if case == "find_file":
+        from modules import file_search
+        return lambda: sum(1 for _ in file_search.iter_files(fixtures.FILE_PATTERN, pathlib.Path(arg)))
+    if case == "find_folder":
+        from modules import folder_search
+        return lambda: sum(1 for _ in folder_search.iter_folders(fixtures.FOLDER_PATTERN, pathlib.Path(arg)))
+    if case in ("gui_apps", "which"):
+        from modules import tools
+        if case == "gui_apps":
+            return lambda: len(tools.list_installed_gui_apps())
+        # Half hits, half misses (a miss must not fall back to a PATH scan).
+        names = [f"{fixtures.WORDS[i % len(fixtures.WORDS)]}-{i}" for i in range(500)]
+        names += [f"missing-tool-{i}" for i in range(500)]
+        return lambda: sum(tools.which(n) is not None for n in names)
+    if case in ("ps_scan", "top_memory"):
+        from modules import process_scan
+        if case == "ps_scan":
+            return lambda: sum(1 for _ in process_scan.iter_processes())
+        return lambda: len(process_scan.get_top_processes("memory", 10))
+    raise SystemExit(f"unknown case {case}")
+
+
+def _child(case: str, arg: str, repeat: int) -> None:
+    import tracemalloc
+    run = _workload(case, arg)
+    start = time.perf_counter()
+    result = run()
+    first = (time.perf_counter() - start) * 1000
+    warm = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        warm.append((time.perf_counter() - start) * 1000)
+    peak = 0
+    if repeat:
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    print(json.dumps({"first_ms": first, "warm_ms": warm, "peak_kb": peak / 1024, "result": result,
+                      "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+
+
+# -----------------------------------------------------------------------
+# Parent side
+# -----------------------------------------------------------------------
+def _drop_caches() -> bool:
+    """Evict the page and dentry caches so 'cold' means cold disk (root only)."""
+    try:
+        os.sync()
+        with open("/proc/sys/vm/drop_caches", "w") as f:
+            f.write("3\n")
+        return True
+    except OSError:
+        return False
+
+
+def _spawn(case: str, arg: str, repeat: int, env: Dict[str, str]) -> Dict[str, Any]:
+    out = subprocess.run([sys.executable, "-m", "benchmarks.run", "--child", case, "--arg", arg,
+                          "--repeat", str(repeat)], cwd=ROOT, env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(f"{case} failed:\n{out.stderr.strip()}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run_case(case: str, arg: str, repeat: int, scratch: str, drop: bool,
+             extra_env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    home = tempfile.mkdtemp(prefix=f"{case}-", dir=scratch)
+    env = {k: v for k, v in os.environ.items() if not k.startswith("XDG_")}
+    env.update(HOME=home, XDG_CACHE_HOME=os.path.join(home, ".cache"), PYTHONPATH=ROOT, **(extra_env or {}))
+    dropped = drop and _drop_caches()
+    first = _spawn(case, arg, 0, env)
+    second = _spawn(case, arg, repeat, env)
+    shutil.rmtree(home, ignore_errors=True)
+    return {
+        "cold_ms": round(first["first_ms"], 3),
+        "restart_ms": round(second["first_ms"], 3),
+        "warm_ms": round(statistics.median(second["warm_ms"]), 3),
+        "warm_min_ms": round(min(second["warm_ms"]), 3),
+        "peak_kb": round(second["peak_kb"], 1),
+        "rss_kb": max(first["rss_kb"], second["rss_kb"]),
+        "result": second["result"],
+        "cold_disk": dropped,
+    }
+
+
+def run_all(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    os.makedirs(args.workdir, exist_ok=True)
+    scratch = tempfile.mkdtemp(prefix="run-", dir=args.workdir)
+    results: Dict[str, Dict[str, Any]] = {}
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+
+    def record(key: str, *run_args: Any, **kw: Any) -> None:
+        print(f"  {key} ...", file=sys.stderr, flush=True)
+        results[key] = run_case(*run_args, args.repeat, scratch, args.drop_caches, **kw)
+
+    try:
+        for size in [fixtures.parse_size(s) for s in args.sizes.split(",")]:
+            if not {"find_file", "find_folder"} & set(cases):
+                break
+            root = fixtures.file_tree(args.workdir, size)
+            for case in ("find_file", "find_folder"):
+                if case in cases:
+                    record(f"{case}[{size}]", case, root)
+        if "gui_apps" in cases:
+            base = fixtures.desktop_tree(args.workdir, args.desktop)
+            record(f"gui_apps[{args.desktop}]", "gui_apps", "", extra_env={
+                "XDG_DATA_HOME": os.path.join(base, "home"), "XDG_DATA_DIRS": os.path.join(base, "system")})
+        if "which" in cases:
+            record(f"which[{args.bins}]", "which", "", extra_env={"PATH": fixtures.bin_tree(args.workdir, args.bins)})
+        proc_cases = [c for c in ("ps_scan", "top_memory") if c in cases]
+        if proc_cases:
+            with fixtures.processes(args.procs):
+                for case in proc_cases:
+                    record(f"{case}[{args.procs}]", case, "")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return results
+
+
+def compare(current: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            threshold: float) -> List[Tuple[str, str, float, float, float]]:
+    """(case, metric, baseline, current, ratio) for every metric that got worse than threshold."""
+    regressions = []
+    for key, cur in current.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        for metric in METRICS:
+            old, new = base.get(metric), cur.get(metric)
+            if not old or new is None or new - old < MIN_DELTA[metric]:
+                continue
+            if new / old > 1 + threshold:
+                regressions.append((key, metric, old, new, new / old))
+    return regressions
+
+
+def _print_table(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]]) -> None:
+    head = f"{'case':<24}{'cold ms':>10}{'restart ms':>12}{'warm ms':>10}{'peak KB':>10}{'RSS KB':>10}{'result':>9}"
+    print(head)
+    print("-" * len(head))
+    for key, r in results.items():
+        line = (f"{key:<24}{r['cold_ms']:>10.1f}{r['restart_ms']:>12.1f}{r['warm_ms']:>10.2f}"
+                f"{r['peak_kb']:>10.0f}{r['rss_kb']:>10}{r['result']:>9}")
+        base = baseline.get(key)
+        if base and base.get("warm_ms"):
+            line += f"   warm {100 * (r['warm_ms'] / base['warm_ms'] - 1):+.0f}% vs baseline"
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Benchmark ait's built-in hot paths")
+    parser.add_argument("--cases", default=",".join(CASES), help=f"comma-separated subset of: {', '.join(CASES)}")
+    parser.add_argument("--sizes", default="10k,100k", help="tree sizes for find_file/find_folder, e.g. 10k,100k,1m")
+    parser.add_argument("--desktop", type=int, default=2000, help=".desktop files for gui_apps")
+    parser.add_argument("--bins", type=int, default=5000, help="executables on PATH for which")
+    parser.add_argument("--procs", type=int, default=300, help="extra idle processes for ps_scan/top_memory")
+    parser.add_argument("--repeat", type=int, default=5, help="warm repetitions per case")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "ait-bench"),
+                        help="where fixtures are built (and reused between runs)")
+    parser.add_argument("--drop-caches", action="store_true", help="drop the kernel page cache before cold runs (root)")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before failing (0.2 = 20%%)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--arg", default="", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        _child(args.child, args.arg, args.repeat)
+        return 0
+
+    results = run_all(args)
+    report = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+                 "date": time.strftime("%Y-%m-%dT%H:%M:%S"), "repeat": args.repeat},
+        "results": results,
+    }
+    baseline: Dict[str, Dict[str, Any]] = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("results", {})
+    _print_table(results, baseline)
+
+    for path in filter(None, [args.out, args.baseline if args.save_baseline else None]):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=1)
+        print(f"\nWrote {path}")
+
+    regressions = compare(results, baseline, args.threshold)
+    for key, metric, old, new, ratio in regressions:
+        print(f"REGRESSION {key} {metric}: {old:.1f} -> {new:.1f} ({100 * (ratio - 1):+.0f}%)")
+    if baseline and not regressions:
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,18 +8,8 @@ from typing import Any, Dict, Tuple
 
 import yaml
 
-# Optional LLM back‑ends
-try:
-    import google.generativeai as genai  # type: ignore
-except ImportError:
-    genai = None
-
-try:
-    from openai import OpenAI  # type: ignore[attr-defined]
-except ImportError:
-    OpenAI = None  # type: ignore
-
 CONFIG_PATH = pathlib.Path.home() / ".ait.yml"
+CACHE_DIR = pathlib.Path(os.environ.get("XDG_CACHE_HOME", pathlib.Path.home() / ".cache")) / "ait"
 
 def load_config() -> Dict[str, Any]:
     if CONFIG_PATH.exists():
@@ -29,11 +19,24 @@ def load_config() -> Dict[str, Any]:
 CONFIG = load_config()
 
 def get_llm_client() -> Tuple[str | None, Any | None, str | None]:
-    """Return (backend_name, client_obj, model_name) or (None, None, None)."""
-    if genai and CONFIG.get("gemini_api_key"):
-        genai.configure(api_key=CONFIG["gemini_api_key"])
-        return "gemini", genai, CONFIG.get("gemini_model", "gemini-1.5-flash")
-    if OpenAI and CONFIG.get("openai_api_key"):
+    """Return (backend_name, client_obj, model_name) or (None, None, None).
+
+    Optional LLM back-ends are imported only once their key is configured,
+    so a Gemini setup never loads the OpenAI SDK and vice versa.
+    """
+    if CONFIG.get("gemini_api_key"):
+        try:
+            import google.generativeai as genai  # type: ignore
+        except ImportError:
+            genai = None
+        if genai:
+            genai.configure(api_key=CONFIG["gemini_api_key"])
+            return "gemini", genai, CONFIG.get("gemini_model", "gemini-1.5-flash")
+    if CONFIG.get("openai_api_key"):
+        try:
+            from openai import OpenAI  # type: ignore[attr-defined]
+        except ImportError:
+            return None, None, None
         client = OpenAI(api_key=CONFIG["openai_api_key"], base_url=CONFIG.get("openai_base_url"))
         return "openai", client, CONFIG.get("openai_model", "gpt-3.5-turbo")
     return None, None, None
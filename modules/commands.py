@@ -0,0 +1,242 @@
+"""commands.py
+Declarative registry of the built-in chat commands, a word trie to dispatch
+them, and readline tab completion.
+
+Every command is registered once with the phrases that name it. The phrases
+are stored word by word in a trie; `resolve` walks it with the words of the
+input line and takes the longest phrase that matches, so adding a command is
+one `register` call instead of another branch in a chain of `startswith`
+checks. The rest of the line after a command's phrase is its argument
+string, for commands registered with `args=True`. Command words are also
+ordinary words ("view of experts on systemd?"), so such a command can give
+an `accepts` check for its arguments; a line it rejects is free text.
+
+Completion candidates that cost I/O (tool names from the PATH catalog,
+directory listings, GUI categories) come from `Provider` caches. A stale
+entry is served while a background thread refreshes it, and a cold one is
+waited for only briefly, so pressing Tab never blocks on a filesystem walk.
+
+This module is imported by the daemon's thin client, so it only uses the
+standard library at import time.
+"""
+from __future__ import annotations
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# handler(session, args, fmt): return False to end the chat session.
+Handler = Callable[[Any, str, Optional[str]], Optional[bool]]
+# accepts(args): False when the line is not this command after all.
+Accepts = Callable[[str], bool]
+
+
+@dataclass
+class Command:
+    name: str                       # canonical phrase, also the span name
+    handler: Handler
+    args: bool = False              # the rest of the line is passed as args
+    local: bool = False             # runs in the user's own terminal, never in the daemon
+    session: bool = False           # needs the chat session (history, LLM)
+    complete: Optional[str] = None  # completion provider for the arguments
+    accepts: Optional[Accepts] = None
+
+
+@dataclass
+class _Node:
+    children: Dict[str, "_Node"] = field(default_factory=dict)
+    command: Optional[Command] = None
+
+
+_ROOT = _Node()
+COMMANDS: Dict[str, Command] = {}
+_WORD = re.compile(r"\S+")
+
+
+# -----------------------------------------------------------------------
+# Registry and dispatch
+# -----------------------------------------------------------------------
+def register(phrases: Sequence[str], handler: Handler, *, args: bool = False, local: bool = False,
+             session: bool = False, complete: Optional[str] = None, accepts: Optional[Accepts] = None) -> Command:
+    """Register handler under every phrase; the first phrase is the command's name."""
+    cmd = Command(phrases[0], handler, args=args, local=local, session=session, complete=complete,
+                  accepts=accepts)
+    for phrase in phrases:
+        node = _ROOT
+        for word in phrase.lower().split():
+            node = node.children.setdefault(word, _Node())
+        if node.command is not None:
+            raise ValueError(f"'{phrase}' is already registered for '{node.command.name}'")
+        node.command = cmd
+    COMMANDS[cmd.name] = cmd
+    return cmd
+
+
+def command(*phrases: str, **options: Any) -> Callable[[Handler], Handler]:
+    """Decorator form of register()."""
+    def decorate(handler: Handler) -> Handler:
+        register(phrases, handler, **options)
+        return handler
+    return decorate
+
+
+def resolve(line: str) -> Optional[Tuple[Command, str]]:
+    """(command, args) for the longest registered phrase at the start of line.
+
+    Words match case-insensitively. A command without args only matches the
+    whole line, so "health" runs diagnostics but "health of my disk?" does not,
+    and a command's `accepts` check can turn down its arguments.
+    """
+    words = list(_WORD.finditer(line))
+    node, best = _ROOT, None
+    for i, word in enumerate(words):
+        node = node.children.get(word.group().lower())
+        if node is None:
+            break
+        cmd = node.command
+        if cmd is None or not (cmd.args or i == len(words) - 1):
+            continue
+        args = line[word.end():].strip()
+        if cmd.accepts is None or cmd.accepts(args):
+            best = (cmd, args)
+    return best
+
+
+# -----------------------------------------------------------------------
+# Cached completion providers
+# -----------------------------------------------------------------------
+class Provider:
+    """Values per key from a loader, cached for ttl seconds and refreshed off-thread.
+
+    get() returns cached values at once, even stale ones while a refresh
+    runs. Only a key that was never loaded is waited for, and at most `wait`
+    seconds; after that the caller gets [] and the next Tab gets the values.
+    """
+
+    def __init__(self, load: Callable[[str], List[str]], ttl: float, wait: float = 0.15,
+                 max_keys: int = 256) -> None:
+        self.load = load
+        self.ttl = ttl
+        self.wait = wait
+        self.max_keys = max_keys
+        self._entries: Dict[str, Tuple[float, List[str]]] = {}
+        self._pending: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str = "", wait: Optional[float] = None) -> List[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                return entry[1]
+            done = self._pending.get(key)
+            if done is None:
+                done = self._pending[key] = threading.Event()
+                threading.Thread(target=self._refresh, args=(key, done), daemon=True).start()
+        if entry is not None:
+            return entry[1]
+        done.wait(self.wait if wait is None else wait)
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[1] if entry is not None else []
+
+    def _refresh(self, key: str, done: threading.Event) -> None:
+        try:
+            values = self.load(key)
+        except Exception:
+            values = []
+        with self._lock:
+            if len(self._entries) >= self.max_keys:
+                self._entries.clear()
+            self._entries[key] = (time.monotonic(), values)
+            del self._pending[key]
+        done.set()
+
+
+def _tool_names(_: str) -> List[str]:
+    from modules import tools
+    return tools.list_all_terminal_tools()
+
+
+def _gui_categories(_: str) -> List[str]:
+    from modules import tools
+    return tools.list_gui_categories()
+
+
+def _list_dir(directory: str) -> List[str]:
+    """Entry names in one directory, directories with a trailing slash."""
+    names = []
+    with os.scandir(directory or ".") as it:
+        for entry in it:
+            try:
+                names.append(entry.name + "/" if entry.is_dir() else entry.name)
+            except OSError:
+                continue
+    return sorted(names)
+
+
+_TOOLS = Provider(_tool_names, ttl=30.0)
+_CATEGORIES = Provider(_gui_categories, ttl=60.0)
+_LISTINGS = Provider(_list_dir, ttl=5.0)
+
+
+def _complete_paths(text: str) -> List[str]:
+    head, base = os.path.split(text)
+    names = _LISTINGS.get(os.path.expanduser(head))
+    if not base.startswith("."):
+        names = [n for n in names if not n.startswith(".")]
+    return [os.path.join(head, n) for n in names if n.startswith(base)]
+
+
+PROVIDERS: Dict[str, Callable[[str], List[str]]] = {
+    "tools": lambda text: [n for n in _TOOLS.get() if n.startswith(text)],
+    "categories": lambda text: [c for c in _CATEGORIES.get() if c.lower().startswith(text.lower())],
+    "paths": _complete_paths,
+}
+
+
+# -----------------------------------------------------------------------
+# Tab completion
+# -----------------------------------------------------------------------
+def candidates(before: str, text: str) -> List[str]:
+    """Completions for the word `text`, typed after the words in `before`.
+
+    Command words come from the trie; once the line has reached a command
+    that takes arguments, its provider completes them.
+    """
+    node: Optional[_Node] = _ROOT
+    cmd: Optional[Command] = None
+    for word in before.split():
+        node = node.children.get(word.lower())
+        if node is None:
+            break
+        if node.command is not None and node.command.args:
+            cmd = node.command
+    words = [w for w in sorted(node.children) if w.startswith(text.lower())] if node is not None else []
+    provider = PROVIDERS.get(cmd.complete) if cmd is not None and cmd.complete else None
+    return words + (provider(text) if provider is not None else [])
+
+
+def install_completion() -> bool:
+    """Enable line editing and Tab completion for input(). False without readline."""
+    try:
+        import readline
+    except ImportError:
+        return False
+    matches: List[str] = []
+
+    def complete(text: str, state: int) -> Optional[str]:
+        if state == 0:
+            line = readline.get_line_buffer()
+            matches[:] = candidates(line[:readline.get_begidx()], text)
+        return matches[state] if state < len(matches) else None
+
+    readline.set_completer_delims(" \t\n")
+    readline.set_completer(complete)
+    if "libedit" in (readline.__doc__ or ""):
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+    _TOOLS.get(wait=0)      # load the tool names before the first Tab
+    return True
@@ -0,0 +1,399 @@
+"""daemon.py
+Optional warm `ait daemon` and the thin Unix-socket client for `ait chat`/`ait ask`.
+
+The daemon keeps the LLM client, imported modules, the doc index and
+process-level caches alive between invocations. Each client connection is
+one chat session with its own history; several terminals can be connected
+at once.
+
+Protocol: every frame is a 4-byte big-endian length followed by a UTF-8
+JSON object.
+    client → daemon   {"op": "open", "banner": bool, "tty": bool, "cwd": str}
+                      {"op": "input", "text": str}
+                      {"op": "ping"} | {"op": "stop"}
+    daemon → client   {"out": str}          (streamed while a command runs)
+                      {"done": true, "alive": bool}
+                      {"pong": true, "pid": int, "uptime": float, "sessions": int}
+
+A client cancels a running command (Ctrl-C) by closing the connection; the
+daemon interrupts the command the next time it writes output. Relative paths
+in a session's commands resolve against the client's cwd, not the daemon's.
+
+This module is imported by the thin client, so it only uses the standard
+library at import time.
+"""
+from __future__ import annotations
+import io
+import json
+import os
+import re
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+_RUNTIME = os.environ.get("XDG_RUNTIME_DIR")
+SOCKET_PATH = Path(_RUNTIME) / "ait.sock" if _RUNTIME else Path.home() / ".cache" / "ait" / "daemon.sock"
+LOG_PATH = SOCKET_PATH.with_suffix(".log")
+_HEADER = struct.Struct(">I")
+MAX_FRAME = 16 * 1024 * 1024
+
+
+# -----------------------------------------------------------------------
+# Framing
+# -----------------------------------------------------------------------
+def send_msg(sock: socket.socket, obj: Dict[str, Any]) -> None:
+    data = json.dumps(obj, separators=(",", ":")).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exact(sock: socket.socket, n: int) -> Optional[bytes]:
+    buf = bytearray()
+    while len(buf) < n:
+        part = sock.recv(n - len(buf))
+        if not part:
+            return None
+        buf += part
+    return bytes(buf)
+
+
+def recv_msg(sock: socket.socket) -> Optional[Dict[str, Any]]:
+    """Read one frame, or None when the peer closed the connection."""
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    (length,) = _HEADER.unpack(header)
+    if length > MAX_FRAME:
+        raise ValueError(f"frame too large: {length} bytes")
+    data = _recv_exact(sock, length)
+    return None if data is None else json.loads(data.decode("utf-8"))
+
+
+# -----------------------------------------------------------------------
+# Server
+# -----------------------------------------------------------------------
+class _ThreadStdout(io.TextIOBase):
+    """sys.stdout replacement that sends each thread's output to its own client.
+
+    Rich consoles created without an explicit file resolve sys.stdout at print
+    time, so every built-in module's output ends up on the right socket.
+    """
+
+    def __init__(self, fallback: Any) -> None:
+        self.fallback = fallback
+        self.local = threading.local()
+        self.in_flight: list = []
+        self.ttys: Dict[Any, bool] = {}       # sender -> is the client's stdout a terminal
+
+    def _target(self) -> Optional[Callable[[str], None]]:
+        send = getattr(self.local, "send", None)
+        # Helper threads (Rich progress refresh, worker pools) have no sender of
+        # their own; if only one command is running, their output is its output.
+        if send is None and len(self.in_flight) == 1:
+            send = self.in_flight[0]
+        return send
+
+    def write(self, text: str) -> int:
+        send = self._target()
+        if send is None:
+            return self.fallback.write(text)
+        if text:
+            send(text)
+        return len(text)
+
+    def flush(self) -> None:
+        if self._target() is None:
+            self.fallback.flush()
+
+    def isatty(self) -> bool:
+        # Answer for the client's own stdout, not for the daemon's log file.
+        send = self._target()
+        return self.ttys.get(send, False) if send is not None else self.fallback.isatty()
+
+    @property
+    def encoding(self) -> str:  # type: ignore[override]
+        return "utf-8"
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    server: "_Server"
+
+    def handle(self) -> None:
+        sock: socket.socket = self.request
+        stdout = self.server.stdout
+        owner = threading.get_ident()
+        guard = threading.Lock()
+        running = [False]
+
+        def send(text: str) -> None:
+            try:
+                send_msg(sock, {"out": text})
+            except OSError as e:
+                # The client hung up (Ctrl-C). Callbacks and helper threads may
+                # swallow this error, so interrupt the command itself.
+                with guard:
+                    if running[0]:
+                        running[0] = False
+                        _interrupt(owner)
+                # Not BrokenPipeError: Rich answers that by muting its console for good.
+                raise ConnectionAbortedError("client disconnected") from e
+
+        stdout.local.send = send
+        session = None
+        self.server.sessions += 1
+        try:
+            while True:
+                msg = recv_msg(sock)
+                if msg is None:
+                    break
+                op = msg.get("op")
+                if op == "ping":
+                    send_msg(sock, {"pong": True, "pid": os.getpid(),
+                                    "uptime": time.monotonic() - self.server.started,
+                                    "sessions": self.server.sessions - 1})   # not counting this ping
+                elif op == "stop":
+                    send_msg(sock, {"done": True, "alive": False})
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                    break
+                elif op == "open":
+                    stdout.ttys[send] = bool(msg.get("tty", True))
+                    session = self.server.open_session(bool(msg.get("banner", True)), msg.get("cwd"))
+                    send_msg(sock, {"done": True, "alive": session is not None})
+                elif op == "input" and session is not None:
+                    stdout.in_flight.append(send)
+                    running[0] = True
+                    try:
+                        try:
+                            alive = self.server.handle_input(session, msg.get("text", ""))
+                        except Exception as e:
+                            print(f"\x1b[31m✖ {type(e).__name__}: {e}\x1b[0m")
+                            alive = True
+                        finally:
+                            with guard:
+                                running[0] = False
+                    except KeyboardInterrupt:
+                        break       # cancelled: nobody is left to answer
+                    finally:
+                        stdout.in_flight.remove(send)
+                    send_msg(sock, {"done": True, "alive": alive})
+                else:
+                    send_msg(sock, {"done": True, "alive": False})
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError, ValueError):
+            pass
+        finally:
+            stdout.local.send = None
+            stdout.ttys.pop(send, None)
+            self.server.sessions -= 1
+
+
+def _interrupt(thread_id: int) -> None:
+    """Raise KeyboardInterrupt in another thread at its next Python instruction."""
+    import ctypes
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_id), ctypes.py_object(KeyboardInterrupt))
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, open_session: Callable[[bool, Optional[str]], Any],
+                 handle_input: Callable[[Any, str], bool]) -> None:
+        self.open_session = open_session
+        self.handle_input = handle_input
+        self.sessions = 0
+        self.started = time.monotonic()
+        # Held directly: libraries such as colorama may wrap sys.stdout later.
+        self.stdout = sys.stdout
+        super().__init__(path, _Handler)
+
+
+def serve(open_session: Callable[[bool, Optional[str]], Any], handle_input: Callable[[Any, str], bool],
+          warm: Optional[Callable[[], None]] = None) -> None:
+    """Run the daemon in the foreground until stopped."""
+    if is_running():
+        print(f"ait daemon already running on {SOCKET_PATH}")
+        return
+    SOCKET_PATH.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        SOCKET_PATH.unlink()
+    except FileNotFoundError:
+        pass
+
+    # Rich decides on colour when each Console is created; clients are terminals.
+    os.environ.setdefault("FORCE_COLOR", "1")
+    sys.stdout = _ThreadStdout(sys.stdout)
+
+    old_umask = os.umask(0o077)   # socket is private to this user
+    try:
+        server = _Server(str(SOCKET_PATH), open_session, handle_input)
+    finally:
+        os.umask(old_umask)
+    if warm:
+        warm()
+    print(f"ait daemon listening on {SOCKET_PATH} (pid {os.getpid()})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            SOCKET_PATH.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def start_background() -> None:
+    """Spawn `ait daemon run` detached, logging to LOG_PATH."""
+    import subprocess
+    if is_running():
+        print(f"ait daemon already running on {SOCKET_PATH}")
+        return
+    LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    ait_py = Path(__file__).resolve().parent.parent / "ait.py"
+    with open(LOG_PATH, "ab") as log:
+        subprocess.Popen([sys.executable, str(ait_py), "daemon", "run"], stdin=subprocess.DEVNULL,
+                         stdout=log, stderr=log, start_new_session=True)
+    for _ in range(100):
+        if is_running():
+            print(f"✔ ait daemon started on {SOCKET_PATH}")
+            return
+        time.sleep(0.05)
+    print(f"✖ ait daemon did not come up; see {LOG_PATH}")
+
+
+# -----------------------------------------------------------------------
+# Thin client
+# -----------------------------------------------------------------------
+def _connect(timeout: Optional[float] = None) -> Optional[socket.socket]:
+    if not SOCKET_PATH.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(SOCKET_PATH))
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+_ANSI = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+
+
+def _request(sock: socket.socket, msg: Dict[str, Any]) -> Optional[bool]:
+    """Send msg, stream output to our stdout, return the session's alive flag.
+
+    Returns None when the user pressed Ctrl-C: the connection is dropped,
+    which makes the daemon abandon the command.
+    """
+    plain = not sys.stdout.isatty()     # the daemon colours everything; strip it for pipes
+    try:
+        send_msg(sock, msg)
+        while True:
+            reply = recv_msg(sock)
+            if reply is None:
+                return False
+            if "out" in reply:
+                sys.stdout.write(_ANSI.sub("", reply["out"]) if plain else reply["out"])
+                sys.stdout.flush()
+            elif reply.get("done"):
+                return bool(reply.get("alive"))
+    except KeyboardInterrupt:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        print("\n✖ Cancelled.")
+        return None
+
+
+def _open(banner: bool) -> Optional[socket.socket]:
+    """Connect and start a session, or None."""
+    sock = _connect()
+    if sock is None:
+        return None
+    if not _request(sock, {"op": "open", "banner": banner, "tty": sys.stdout.isatty(), "cwd": os.getcwd()}):
+        sock.close()
+        return None
+    return sock
+
+
+def status() -> Optional[Dict[str, Any]]:
+    sock = _connect(timeout=0.5)
+    if sock is None:
+        return None
+    try:
+        send_msg(sock, {"op": "ping"})
+        return recv_msg(sock)
+    except OSError:
+        return None
+    finally:
+        sock.close()
+
+
+def is_running() -> bool:
+    return status() is not None
+
+
+def stop() -> bool:
+    sock = _connect(timeout=2)
+    if sock is None:
+        return False
+    with sock:
+        return _request(sock, {"op": "stop"}) is False
+
+
+def run_client_chat(run_local: Callable[[str], None], is_local: Callable[[str], bool]) -> None:
+    """Chat through the daemon; lines for which is_local() is true go to run_local instead.
+
+    Those are the commands that must run in the user's own terminal: they
+    prompt for input, read keys or page their output, open files on the
+    user's display, or take paths relative to the user's working directory.
+    """
+    sock = _open(banner=True)
+    if sock is None:
+        return
+    try:
+        while True:
+            try:
+                user = input("\n[abhi] > ").strip()
+            except (KeyboardInterrupt, EOFError):
+                break
+            if is_local(user):
+                try:
+                    run_local(user)
+                except KeyboardInterrupt:
+                    print("\n✖ Cancelled.")
+                continue
+            alive = _request(sock, {"op": "input", "text": user})
+            if alive is None:
+                # Cancelling dropped the session: carry on in a fresh one.
+                sock.close()
+                sock = _open(banner=False)
+                if sock is None:
+                    return
+                print("(new session: earlier conversation is not remembered)")
+            elif not alive:
+                break
+    finally:
+        if sock is not None:
+            sock.close()
+
+
+def run_client_ask(question: str, run_local: Callable[[str], None], is_local: Callable[[str], bool]) -> None:
+    """Ask one question through the daemon, or run it with run_local when is_local() says so."""
+    if is_local(question):
+        try:
+            run_local(question)
+        except KeyboardInterrupt:
+            print("\n✖ Cancelled.")
+        return
+    sock = _open(banner=False)
+    if sock is None:
+        return
+    with sock:
+        _request(sock, {"op": "input", "text": question})
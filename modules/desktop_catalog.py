@@ -0,0 +1,210 @@
+"""desktop_catalog.py
+Cached index of installed .desktop entries (GUI applications).
+
+Covers the XDG application directories plus flatpak and snap export
+directories. The first build parses all files in parallel; afterwards a
+directory is only re-read when its mtime changes (files added, removed or
+replaced, which is how package managers install them), so listing and
+looking up apps by display name needs no file parsing at all.
+"""
+from __future__ import annotations
+import json
+import locale
+import os
+import shlex
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+import config
+
+CACHE_PATH = config.CACHE_DIR / "desktop_entries.json"
+CACHE_VERSION = 1
+_FIELD_CODES = {"%f", "%F", "%u", "%U", "%d", "%D", "%n", "%N", "%i", "%c", "%k", "%v", "%m"}
+# Interpreters and launchers at the front of an Exec line: their name says
+# nothing about the app, so it must not become a lookup key ("open tool python").
+_WRAPPERS = {"sh", "bash", "dash", "zsh", "env", "python", "perl", "ruby", "java", "node", "mono", "wine",
+             "flatpak", "snap", "gtk-launch", "xdg-open", "exo-open", "pkexec", "sudo", "gksu", "kdesu",
+             "nice", "ionice", "firejail", "gamemoderun", "bwrap"}
+
+
+@dataclass
+class DesktopEntry:
+    id: str
+    name: str
+    exec: str
+    path: str
+    names: Dict[str, str] = field(default_factory=dict)    # locale -> localized Name
+    generic_name: str = ""
+    terminal: bool = False
+    categories: List[str] = field(default_factory=list)
+    no_display: bool = False
+
+    def argv(self) -> List[str]:
+        """Exec line as an argument list, with %f/%u/... field codes removed."""
+        try:
+            words = shlex.split(self.exec)
+        except ValueError:
+            words = self.exec.split()
+        return [w.replace("%%", "%") for w in words if w not in _FIELD_CODES]
+
+    def display_name(self) -> str:
+        lang = (locale.getlocale()[0] or os.environ.get("LANG", "")).split(".")[0]
+        return self.names.get(lang) or self.names.get(lang.split("_")[0]) or self.name
+
+
+def application_dirs() -> List[str]:
+    """Directories searched for .desktop files, highest precedence first."""
+    home = os.path.expanduser("~")
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(home, ".local/share")
+    data_dirs = os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share"
+    dirs = [data_home] + [d for d in data_dirs.split(":") if d]
+    dirs += [
+        os.path.join(data_home, "flatpak/exports/share"),
+        "/var/lib/flatpak/exports/share",
+    ]
+    paths = [os.path.join(d, "applications") for d in dirs] + ["/var/lib/snapd/desktop/applications"]
+    return list(dict.fromkeys(paths))
+
+
+def parse_desktop_file(path: str) -> Optional[DesktopEntry]:
+    """Parse the [Desktop Entry] group of one file; None if it is not a launchable app."""
+    values: Dict[str, str] = {}
+    names: Dict[str, str] = {}
+    in_entry = False
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                if line.startswith("["):
+                    if in_entry:
+                        break           # only the main group matters
+                    in_entry = line == "[Desktop Entry]"
+                    continue
+                if not in_entry or "=" not in line:
+                    continue
+                key, value = (part.strip() for part in line.split("=", 1))
+                if key.startswith("Name[") and key.endswith("]"):
+                    names[key[5:-1]] = value
+                else:
+                    values.setdefault(key, value)
+    except OSError:
+        return None
+
+    if values.get("Type", "Application") != "Application" or not values.get("Name") or not values.get("Exec"):
+        return None
+    return DesktopEntry(
+        id=os.path.basename(path),
+        name=values["Name"],
+        exec=values["Exec"],
+        path=path,
+        names=names,
+        generic_name=values.get("GenericName", ""),
+        terminal=values.get("Terminal", "").lower() == "true",
+        categories=[c for c in values.get("Categories", "").split(";") if c],
+        no_display=values.get("NoDisplay", "").lower() == "true" or values.get("Hidden", "").lower() == "true",
+    )
+
+
+def _parse_dir(directory: str, pool: ThreadPoolExecutor) -> List[Dict]:
+    try:
+        files = [e.path for e in os.scandir(directory) if e.name.endswith(".desktop")]
+    except OSError:
+        return []
+    return [asdict(entry) for entry in pool.map(parse_desktop_file, files) if entry]
+
+
+class Catalog:
+    """All visible and hidden desktop entries, keyed by desktop file id."""
+
+    def __init__(self) -> None:
+        self.dirs: Dict[str, Dict] = {}
+        self.entries: Dict[str, DesktopEntry] = {}
+        self._lookup: Dict[str, DesktopEntry] = {}
+        try:
+            cached = json.loads(CACHE_PATH.read_text())
+            if cached.get("version") == CACHE_VERSION:
+                self.dirs = cached["dirs"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def refresh(self) -> None:
+        """Re-read application directories whose mtime changed."""
+        stale = []
+        search = application_dirs()
+        for d in search:
+            try:
+                mtime = os.stat(d).st_mtime
+            except OSError:
+                mtime = None
+            cached = self.dirs.get(d)
+            if cached is None or cached["mtime"] != mtime:
+                stale.append((d, mtime))
+        if not stale and self.entries:
+            return
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=min(16, (os.cpu_count() or 4) * 2)) as pool:
+                for d, mtime in stale:
+                    self.dirs[d] = {"mtime": mtime, "entries": _parse_dir(d, pool) if mtime is not None else []}
+            self._save()
+
+        # Same id in several directories: the earliest directory wins (XDG rule).
+        entries: Dict[str, DesktopEntry] = {}
+        for d in reversed(search):
+            for raw in self.dirs.get(d, {}).get("entries", []):
+                entries[raw["id"]] = DesktopEntry(**raw)
+        self.entries = entries
+        self._lookup = {}
+        for entry in sorted(entries.values(), key=lambda e: e.no_display, reverse=True):
+            # Visible entries are added last so they win name clashes.
+            keys = [entry.name, entry.id[:-len(".desktop")], *entry.names.values()]
+            argv = entry.argv()
+            if argv:
+                exe = os.path.basename(argv[0])
+                if exe.rstrip("0123456789.") not in _WRAPPERS:      # python3.12 -> python
+                    keys.append(exe)
+            for key in keys:
+                self._lookup[key.casefold()] = entry
+
+    def _save(self) -> None:
+        try:
+            CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            tmp = CACHE_PATH.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"version": CACHE_VERSION, "dirs": self.dirs}))
+            tmp.replace(CACHE_PATH)
+        except OSError:
+            pass
+
+    def find(self, name: str) -> Optional[DesktopEntry]:
+        """Entry by display name (any language), desktop id or executable name."""
+        self.refresh()
+        return self._lookup.get(name.strip().casefold())
+
+    def apps(self, category: Optional[str] = None, include_hidden: bool = False) -> List[DesktopEntry]:
+        """Launchable apps sorted by name, optionally only those in category."""
+        self.refresh()
+        wanted = category.casefold() if category else None
+        result = [
+            e for e in self.entries.values()
+            if (include_hidden or not e.no_display)
+            and (wanted is None or any(c.casefold() == wanted for c in e.categories))
+        ]
+        return sorted(result, key=lambda e: e.display_name().casefold())
+
+    def categories(self) -> List[str]:
+        self.refresh()
+        return sorted({c for e in self.entries.values() if not e.no_display for c in e.categories})
+
+
+_CATALOG: Optional[Catalog] = None
+
+
+def catalog() -> Catalog:
+    """The process-wide catalog (loaded from disk on first use)."""
+    global _CATALOG
+    if _CATALOG is None:
+        _CATALOG = Catalog()
+    return _CATALOG
@@ -3,18 +3,28 @@
 Basic system health info using psutil.
 """
 from __future__ import annotations
+from typing import Any, Dict
+
 import psutil
 from rich.console import Console
 
 console = Console()
 
+def get_health(interval: float = 1.0) -> Dict[str, Any]:
+    """Return battery, CPU, memory and disk usage as a dict."""
+    bat = psutil.sensors_battery()
+    return {
+        "battery_percent": bat.percent if bat else None,
+        "charging": bat.power_plugged if bat else None,
+        "cpu_percent": psutil.cpu_percent(interval=interval),
+        "mem_percent": psutil.virtual_memory().percent,
+        "disk_percent": psutil.disk_usage('/').percent,
+    }
+
 def sys_health() -> None:
     """Print battery, CPU, memory, disk usage."""
     console.print("[cyan]System Health[/cyan]")
-    bat = psutil.sensors_battery()
-    if bat:
-        console.print(f"Battery: {bat.percent}% {'(Charging)' if bat.power_plugged else '(Discharging)'}")
-    cpu = psutil.cpu_percent(interval=1)
-    mem = psutil.virtual_memory()
-    disk = psutil.disk_usage('/')
-    console.print(f"CPU {cpu}% | MEM {mem.percent}% | DISK {disk.percent}%")
+    h = get_health()
+    if h["battery_percent"] is not None:
+        console.print(f"Battery: {h['battery_percent']}% {'(Charging)' if h['charging'] else '(Discharging)'}")
+    console.print(f"CPU {h['cpu_percent']}% | MEM {h['mem_percent']}% | DISK {h['disk_percent']}%")
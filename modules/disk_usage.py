@@ -0,0 +1,261 @@
+"""disk_usage.py
+Parallel disk-usage analyzer (`disk usage [dir]`).
+
+Directories are listed with os.scandir on a thread pool (the syscalls
+release the GIL, so a cold walk overlaps disk and metadata latency).
+Sizes are allocated blocks, like `du`: hardlinked files are counted once,
+symlinks are not followed and other filesystems are skipped, like `du -x`.
+
+Each directory's own total (its files, not its subdirectories) is cached
+in CACHE_DIR/disk_usage.json keyed by the directory's mtime. A re-run
+still stat()s every directory, but only re-lists those whose mtime moved.
+A directory's mtime changes when entries are created, deleted or renamed
+in it, not when an existing file grows, so a log being appended to keeps
+its old size until `--fresh` or until the cache is `du_cache_ttl` old.
+"""
+from __future__ import annotations
+import json
+import os
+import stat
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
+
+import config
+
+if TYPE_CHECKING:
+    from rich.tree import Tree
+
+CACHE_PATH = config.CACHE_DIR / "disk_usage.json"
+DEFAULT_WORKERS = 16
+DEFAULT_TTL = 24 * 3600
+BIG_FILES = 5                   # largest files remembered per directory
+BIG_FILE_MIN = 1 << 20          # ... if at least this big
+DRILL_SHARE = 0.05              # expand subtrees holding at least 5% of the total
+MAX_DEPTH = 4
+
+# Cached record per directory: [mtime_ns, own bytes, file count, subdir names,
+# hardlinked files [[inode, bytes]], biggest files [[name, bytes]], cached at]
+Record = List[Any]
+
+
+@dataclass
+class Usage:
+    root: str
+    totals: Dict[str, int]                       # directory -> bytes in its subtree
+    files: Dict[str, List[Tuple[str, int]]]      # directory -> its biggest files
+    file_count: int = 0
+    walked: int = 0                              # directories listed this run
+    reused: int = 0                              # directories taken from the cache
+    mounts: List[str] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return self.totals.get(self.root, 0)
+
+
+def human(n: float) -> str:
+    for unit in ("B", "K", "M", "G", "T"):
+        if n < 1024 or unit == "T":
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n:.1f}T"
+
+
+# -----------------------------------------------------------------------
+# Walking
+# -----------------------------------------------------------------------
+def _list(path: str, dir_st: os.stat_result) -> Tuple[Optional[Record], List[Tuple[str, os.stat_result]]]:
+    """Scan one directory: its record (None if unreadable) and its subdirectories."""
+    own, count = dir_st.st_blocks * 512, 0
+    subdirs: List[Tuple[str, os.stat_result]] = []
+    links: List[List[int]] = []
+    big: List[Tuple[int, str]] = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if stat.S_ISDIR(st.st_mode):
+                    subdirs.append((entry.name, st))
+                    continue
+                size = st.st_blocks * 512
+                count += 1
+                if st.st_nlink > 1:
+                    links.append([st.st_ino, size])
+                else:
+                    own += size
+                if size >= BIG_FILE_MIN:
+                    big.append((size, entry.name))
+    except OSError:
+        return None, []
+    big = sorted(big, reverse=True)[:BIG_FILES]
+    record = [dir_st.st_mtime_ns, own, count, [n for n, _ in subdirs], links,
+              [[name, size] for size, name in big], time.time()]
+    return record, subdirs
+
+
+def _visit(path: str, dir_st: os.stat_result, cached: Optional[Record],
+           max_age: float) -> Tuple[Optional[Record], List[Tuple[str, os.stat_result]], bool]:
+    """(record, subdirectories, reused) for one directory, from the cache when its mtime is unchanged."""
+    if cached and cached[0] == dir_st.st_mtime_ns and time.time() - cached[6] < max_age:
+        subdirs = []
+        for name in cached[3]:
+            try:
+                subdirs.append((name, os.stat(os.path.join(path, name), follow_symlinks=False)))
+            except OSError:
+                pass
+        return cached, subdirs, True
+    record, subdirs = _list(path, dir_st)
+    return record, subdirs, False
+
+
+def analyze(root: str, fresh: bool = False) -> Usage:
+    """Walk root (one filesystem) and total every directory's subtree."""
+    start = time.perf_counter()
+    root = os.path.realpath(os.path.expanduser(root))
+    root_st = os.stat(root)
+    if not stat.S_ISDIR(root_st.st_mode):
+        raise NotADirectoryError(f"{root} is not a directory")
+    cache = _load_cache()
+    lookup: Dict[str, Record] = {} if fresh else cache
+    workers = int(config.CONFIG.get("du_workers", DEFAULT_WORKERS))
+    max_age = float(config.CONFIG.get("du_cache_ttl", DEFAULT_TTL))
+
+    usage = Usage(root, {}, {})
+    records: Dict[str, Record] = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = {pool.submit(_visit, root, root_st, lookup.get(root), max_age): root}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                path = pending.pop(fut)
+                record, subdirs, reused = fut.result()
+                if record is None:
+                    usage.errors += 1
+                    continue
+                records[path] = record
+                usage.reused += reused
+                usage.walked += not reused
+                for name, st in subdirs:
+                    child = os.path.join(path, name)
+                    if st.st_dev != root_st.st_dev:
+                        usage.mounts.append(child)
+                    else:
+                        pending[pool.submit(_visit, child, st, lookup.get(child), max_age)] = child
+
+    # Totals bottom-up; a hardlinked inode counts where it is first met in path order.
+    seen: Set[int] = set()
+    for path in sorted(records):
+        record = records[path]
+        own = record[1]
+        for ino, size in record[4]:
+            if ino not in seen:
+                seen.add(ino)
+                own += size
+        usage.totals[path] = own
+        usage.file_count += record[2]
+        if record[5]:
+            usage.files[path] = [(name, size) for name, size in record[5]]
+    for path in sorted(records, key=lambda p: p.count("/"), reverse=True):
+        if path != root:
+            parent = os.path.dirname(path)
+            if parent in usage.totals:
+                usage.totals[parent] += usage.totals[path]
+
+    _save_cache(cache, records, root)
+    usage.elapsed = time.perf_counter() - start
+    return usage
+
+
+# -----------------------------------------------------------------------
+# Cache
+# -----------------------------------------------------------------------
+def _load_cache() -> Dict[str, Record]:
+    try:
+        with open(CACHE_PATH) as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache: Dict[str, Record], records: Dict[str, Record], root: str) -> None:
+    # Replace everything under root, so deleted directories drop out; keep other trees.
+    prefix = root.rstrip("/") + "/"
+    kept = {p: r for p, r in cache.items() if p != root and not p.startswith(prefix)}
+    kept.update(records)
+    try:
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp = CACHE_PATH.with_suffix(".tmp")
+        tmp.write_text(json.dumps(kept, separators=(",", ":")))
+        os.replace(tmp, CACHE_PATH)
+    except OSError:
+        pass
+
+
+# -----------------------------------------------------------------------
+# Output
+# -----------------------------------------------------------------------
+def top(usage: Usage, n: int = 10) -> List[Tuple[int, str, int, bool]]:
+    """Drill-down: (depth, path, bytes, is_dir), the top n entries per level, expanding heavy ones."""
+    out: List[Tuple[int, str, int, bool]] = []
+    total = usage.total or 1
+    subdirs: Dict[str, List[str]] = {}
+    for path in usage.totals:
+        if path != usage.root:
+            subdirs.setdefault(os.path.dirname(path), []).append(path)
+
+    def children(path: str) -> List[Tuple[str, int, bool]]:
+        kids = [(p, usage.totals[p], True) for p in subdirs.get(path, [])]
+        kids += [(os.path.join(path, name), size, False) for name, size in usage.files.get(path, [])]
+        return sorted(kids, key=lambda k: k[1], reverse=True)
+
+    def walk(path: str, depth: int) -> None:
+        for child, size, is_dir in children(path)[:n]:
+            out.append((depth, child, size, is_dir))
+            if is_dir and depth < MAX_DEPTH and size >= DRILL_SHARE * total:
+                walk(child, depth + 1)
+
+    walk(usage.root, 1)
+    return out
+
+
+def tree(usage: Usage, n: int = 10) -> Tree:
+    from rich.tree import Tree
+    total = usage.total or 1
+    root = Tree(f"[bold]{human(usage.total):>7}[/bold]  {usage.root}")
+    parents = {0: root}
+    for depth, path, size, is_dir in top(usage, n):
+        name = os.path.basename(path) + ("/" if is_dir else "")
+        style = "cyan" if is_dir else "white"
+        parents[depth] = parents[depth - 1].add(
+            f"[bold]{human(size):>7}[/bold] [grey70]{100 * size / total:5.1f}%[/grey70]  [{style}]{name}[/{style}]")
+    return root
+
+
+def rows(usage: Usage, n: int = 10) -> List[Tuple[str, int, str, str]]:
+    total = usage.total or 1
+    return [(path, size, human(size), f"{100 * size / total:.1f}%") for _, path, size, _ in top(usage, n)]
+
+
+def summary(usage: Usage) -> str:
+    text = (f"{human(usage.total)} in {usage.file_count} files under {usage.root} "
+            f"({usage.walked} directories listed, {usage.reused} from cache, {usage.elapsed:.2f}s)")
+    if usage.mounts:
+        text += f"; skipped {len(usage.mounts)} other filesystem(s)"
+    if usage.errors:
+        text += f"; {usage.errors} unreadable"
+    return text
+
+
+def as_context(usage: Usage, n: int = 10) -> str:
+    """Heaviest paths as a compact context block for the LLM."""
+    lines = [f"Disk usage: {summary(usage)}"]
+    lines += [f"{h:>7} {share:>6}  {path}" for path, _, h, share in rows(usage, n)]
+    return "\n".join(lines)
@@ -0,0 +1,358 @@
+"""doc_index.py
+Offline BM25 retrieval index over man pages, `--help` output and /usr/share/doc.
+
+The index is rebuilt incrementally: each source is re-read only when its
+mtime changes. Postings are stored term-major as NumPy arrays and memory-
+mapped at query time, so a lookup touches only the posting lists of the
+query terms.
+
+Files under CACHE_DIR/docs:
+    sources.pkl    per-source mtime, chunks and term counts (build cache)
+    terms.npy      sorted vocabulary, fixed-width bytes
+    term_ptr.npy   posting list boundaries per term
+    post_doc.npy   chunk id per posting (int32)
+    post_w.npy     precomputed BM25 weight per posting (float32)
+    doc_src.npy    source id per chunk
+    doc_off.npy    chunk boundaries in snippets.txt
+    snippets.txt   chunk text, UTF-8
+    meta.json      source names and build info
+"""
+from __future__ import annotations
+import gzip
+import json
+import math
+import os
+import pickle
+import re
+import subprocess
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import config
+
+INDEX_DIR = config.CACHE_DIR / "docs"
+MAN_DIRS = [Path("/usr/share/man/man1"), Path("/usr/share/man/man8")]
+DOC_DIR = Path("/usr/share/doc")
+DOC_NAMES = re.compile(r"^(readme|usage|howto|faq)[^/]*$|\.(md|txt|rst)(\.gz)?$", re.IGNORECASE)
+MAX_DOC_BYTES = 64 * 1024
+CHUNK_CHARS = 1200
+TERM_BYTES = 32
+K1, B = 1.2, 0.75
+
+_TOKEN_RE = re.compile(r"-{0,2}[a-z0-9][a-z0-9_+-]*")
+
+Chunk = Tuple[str, str, Counter]   # (title, text, term counts)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase terms; flags such as --script-args stay one token."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) <= TERM_BYTES]
+
+
+# -----------------------------------------------------------------------
+# Source readers
+# -----------------------------------------------------------------------
+_ROFF_FONT = re.compile(r"\\f(\[[^\]]*\]|\(..|.)")
+_ROFF_ESC = re.compile(r"\\(\(..|\[[^\]]*\]|[&/,:%|^])")
+
+
+def _roff_to_text(src: str) -> str:
+    """Strip roff markup well enough for retrieval (no layout)."""
+    out = []
+    for line in src.splitlines():
+        if line.startswith(('.\\"', "'\\\"")):
+            continue
+        if line.startswith("."):
+            parts = line.split(None, 1)
+            macro = parts[0]
+            if macro in (".SH", ".SS"):
+                out.append("\n" + (parts[1] if len(parts) > 1 else "").strip('"').upper())
+                continue
+            if len(parts) == 1 or macro in (".TH", ".so", ".de", ".ds", ".nr", ".ig"):
+                out.append("")
+                continue
+            line = parts[1].replace('"', "")
+        line = _ROFF_FONT.sub("", line)
+        line = line.replace("\\-", "-").replace("\\e", "\\")
+        out.append(_ROFF_ESC.sub("", line))
+    return "\n".join(out)
+
+
+def _read_text(path: Path) -> str:
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rb") as f:
+        return f.read(MAX_DOC_BYTES).decode("utf-8", errors="replace")
+
+
+def _chunk(title: str, text: str) -> List[Chunk]:
+    """Split text into ~CHUNK_CHARS pieces on paragraph boundaries."""
+    chunks: List[Chunk] = []
+    buf = ""
+    for para in re.split(r"\n\s*\n", text):
+        para = para.strip()
+        if not para:
+            continue
+        if buf and len(buf) + len(para) > CHUNK_CHARS:
+            chunks.append((title, buf, Counter(tokenize(buf))))
+            buf = ""
+        buf = f"{buf}\n\n{para}" if buf else para[:CHUNK_CHARS * 2]
+    if buf:
+        chunks.append((title, buf, Counter(tokenize(buf))))
+    return chunks
+
+
+def _man_chunks(path: Path) -> List[Chunk]:
+    name = path.name[:-3] if path.suffix == ".gz" else path.name
+    page, _, section = name.rpartition(".")
+    return _chunk(f"{page}({section})", _roff_to_text(_read_text(path)))
+
+
+def _doc_chunks(path: Path) -> List[Chunk]:
+    return _chunk(f"{path.parent.name}/{path.name}", _read_text(path))
+
+
+def _help_chunks(path: Path) -> List[Chunk]:
+    try:
+        res = subprocess.run([str(path), "--help"], capture_output=True, text=True, timeout=2,
+                             stdin=subprocess.DEVNULL, errors="replace")
+    except (OSError, subprocess.SubprocessError):
+        return []
+    text = (res.stdout or res.stderr)[:MAX_DOC_BYTES]
+    return _chunk(f"{path.name} --help", text) if text.strip() else []
+
+
+def _discover() -> Iterator[Tuple[str, Path]]:
+    """Yield (kind, path) for every source the index should cover."""
+    for d in MAN_DIRS:
+        if d.is_dir():
+            for entry in os.scandir(d):
+                if entry.is_file():
+                    yield "man", Path(entry.path)
+
+    if DOC_DIR.is_dir():
+        for pkg in os.scandir(DOC_DIR):
+            if not pkg.is_dir():
+                continue
+            for entry in os.scandir(pkg.path):
+                if entry.is_file() and DOC_NAMES.search(entry.name) and "changelog" not in entry.name.lower():
+                    yield "doc", Path(entry.path)
+
+    import shutil
+    from modules import tools
+    for name in tools.list_installed_terminal_tools():
+        exe = shutil.which(name)
+        if exe:
+            yield "help", Path(exe)
+
+
+_READERS = {"man": _man_chunks, "doc": _doc_chunks, "help": _help_chunks}
+# meta.json goes last on build and first on removal: it marks a complete index.
+_INDEX_FILES = ("meta.json", "terms.npy", "term_ptr.npy", "post_doc.npy", "post_w.npy", "doc_src.npy",
+                "doc_off.npy", "snippets.txt")
+
+
+# -----------------------------------------------------------------------
+# Build
+# -----------------------------------------------------------------------
+def build(index_dir: Path = INDEX_DIR) -> Dict[str, int]:
+    """Build or refresh the index. Returns counts of reused/read/total sources."""
+    global _INDEX
+    import numpy as np
+    from rich.progress import Progress
+
+    index_dir.mkdir(parents=True, exist_ok=True)
+    cache_path = index_dir / "sources.pkl"
+    try:
+        with open(cache_path, "rb") as f:
+            cache: Dict[str, Tuple[float, List[Chunk]]] = pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError):
+        cache = {}
+
+    fresh: Dict[str, Tuple[float, List[Chunk]]] = {}
+    stale: List[Tuple[str, str, Path, float]] = []
+    for kind, path in _discover():
+        key = f"{kind}:{path}"
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            continue
+        cached = cache.get(key)
+        if cached and cached[0] == mtime:
+            fresh[key] = cached
+        else:
+            stale.append((key, kind, path, mtime))
+
+    def read(item: Tuple[str, str, Path, float]) -> Tuple[str, float, List[Chunk]]:
+        key, kind, path, mtime = item
+        try:
+            return key, mtime, _READERS[kind](path)
+        except (OSError, EOFError, UnicodeError):
+            return key, mtime, []
+
+    if not stale and fresh.keys() == cache.keys() and is_built(index_dir):
+        return {"reused": len(fresh), "read": 0, "total": len(fresh), "chunks": -1}
+
+    with Progress(transient=True) as progress:
+        task = progress.add_task("Indexing docs", total=len(stale))
+        # Threads mostly wait on gzip/file IO and `--help` subprocesses.
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for key, mtime, chunks in pool.map(read, stale):
+                fresh[key] = (mtime, chunks)
+                progress.advance(task)
+
+    with open(cache_path, "wb") as f:
+        pickle.dump(fresh, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    # Flatten to chunk-level documents.
+    sources = sorted(fresh)
+    doc_src: List[int] = []
+    doc_len: List[int] = []
+    texts: List[bytes] = []
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    for sid, key in enumerate(sources):
+        for title, text, counts in fresh[key][1]:
+            did = len(doc_src)
+            doc_src.append(sid)
+            doc_len.append(sum(counts.values()))
+            texts.append(f"{title}\n{text}".encode("utf-8"))
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((did, tf))
+
+    n_docs = len(doc_src)
+    _INDEX = None
+    if not n_docs:
+        # Nothing to search: leave no index rather than an empty one.
+        for name in _INDEX_FILES:
+            (index_dir / name).unlink(missing_ok=True)
+        return {"reused": len(fresh) - len(stale), "read": len(stale), "total": len(fresh), "chunks": 0}
+    avgdl = sum(doc_len) / n_docs
+    dl = np.asarray(doc_len, dtype=np.float32)
+    terms = sorted(postings)
+    term_ptr = np.zeros(len(terms) + 1, dtype=np.int64)
+    post_doc = np.empty(sum(len(p) for p in postings.values()), dtype=np.int32)
+    post_w = np.empty_like(post_doc, dtype=np.float32)
+    pos = 0
+    for i, term in enumerate(terms):
+        plist = postings[term]
+        ids = np.fromiter((d for d, _ in plist), dtype=np.int32, count=len(plist))
+        tf = np.fromiter((t for _, t in plist), dtype=np.float32, count=len(plist))
+        idf = math.log(1 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+        post_doc[pos:pos + len(plist)] = ids
+        post_w[pos:pos + len(plist)] = idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * dl[ids] / avgdl))
+        pos += len(plist)
+        term_ptr[i + 1] = pos
+
+    offsets = np.zeros(n_docs + 1, dtype=np.int64)
+    np.cumsum([len(t) for t in texts], out=offsets[1:])
+    np.save(index_dir / "terms.npy", np.asarray(terms, dtype=f"S{TERM_BYTES}"))
+    np.save(index_dir / "term_ptr.npy", term_ptr)
+    np.save(index_dir / "post_doc.npy", post_doc)
+    np.save(index_dir / "post_w.npy", post_w)
+    np.save(index_dir / "doc_src.npy", np.asarray(doc_src, dtype=np.int32))
+    np.save(index_dir / "doc_off.npy", offsets)
+    (index_dir / "snippets.txt").write_bytes(b"".join(texts))
+    (index_dir / "meta.json").write_text(json.dumps({
+        "sources": [k.split(":", 1)[1] for k in sources],
+        "docs": n_docs,
+        "terms": len(terms),
+    }))
+    return {"reused": len(fresh) - len(stale), "read": len(stale), "total": len(fresh), "chunks": n_docs}
+
+
+# -----------------------------------------------------------------------
+# Query
+# -----------------------------------------------------------------------
+class _Index:
+    def __init__(self, index_dir: Path) -> None:
+        import mmap
+        import numpy as np
+        self.np = np
+        load = lambda name: np.load(index_dir / name, mmap_mode="r")
+        self.terms = load("terms.npy")
+        self.term_ptr = load("term_ptr.npy")
+        self.post_doc = load("post_doc.npy")
+        self.post_w = load("post_w.npy")
+        self.doc_src = load("doc_src.npy")
+        self.doc_off = load("doc_off.npy")
+        meta = json.loads((index_dir / "meta.json").read_text())
+        self.source_names = [Path(s).name.split(".")[0] for s in meta["sources"]]
+        with open(index_dir / "snippets.txt", "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            # mmap refuses empty files; an index without text has nothing to return.
+            self.snippets = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def term_id(self, term: str) -> Optional[int]:
+        key = term.encode("utf-8")
+        i = int(self.np.searchsorted(self.terms, key))
+        return i if i < len(self.terms) and self.terms[i] == key else None
+
+    def search(self, query: str, k: int) -> List[Tuple[float, str]]:
+        np = self.np
+        terms = set(tokenize(query))
+        scores = np.zeros(len(self.doc_src), dtype=np.float32)
+        for term in terms:
+            tid = self.term_id(term)
+            if tid is None:
+                continue
+            a, b = self.term_ptr[tid], self.term_ptr[tid + 1]
+            # A term appears at most once per chunk, so plain fancy-index add is safe.
+            scores[self.post_doc[a:b]] += self.post_w[a:b]
+        if not len(self.snippets) or not scores.any():
+            return []
+        top = np.argpartition(-scores, min(k, len(scores) - 1))[:k]
+        top = top[np.argsort(-scores[top])]
+        results = []
+        for d in top:
+            if scores[d] <= 0:
+                break
+            score = float(scores[d])
+            # Questions name the tool; prefer its own page over pages that mention it.
+            if self.source_names[self.doc_src[d]] in terms:
+                score *= 1.5
+            text = self.snippets[self.doc_off[d]:self.doc_off[d + 1]].decode("utf-8", errors="replace")
+            results.append((score, text))
+        return sorted(results, key=lambda r: r[0], reverse=True)
+
+
+_INDEX: Optional[_Index] = None
+
+
+def is_built(index_dir: Optional[Path] = None) -> bool:
+    return ((index_dir or INDEX_DIR) / "meta.json").exists()
+
+
+def search(query: str, k: int = 4) -> List[Tuple[float, str]]:
+    """Return up to k (score, snippet) pairs, best first. Empty if no index."""
+    global _INDEX
+    if _INDEX is None:
+        if not is_built():
+            return []
+        _INDEX = _Index(INDEX_DIR)
+    return _INDEX.search(query, k)
+
+
+def context_for(query: str, k: int = 4, token_budget: int = 600) -> str:
+    """Top-k snippets for query, trimmed to roughly token_budget tokens."""
+    budget = token_budget * 4   # ~4 chars per token
+    parts = []
+    for _, text in search(query, k):
+        if budget <= 80:
+            break
+        title, _, body = text.partition("\n")
+        piece = f"[{title}]\n{body.strip()[:budget]}"
+        parts.append(piece)
+        budget -= len(piece)
+    return "\n\n".join(parts)
+
+
+def ground_prompt(user: str, token_budget: int = 600) -> str:
+    """Prefix user with local documentation excerpts when any are relevant."""
+    ctx = context_for(user, token_budget=token_budget)
+    if not ctx:
+        return user
+    return (
+        "Local documentation from this machine (installed versions; prefer it over memory "
+        "when listing options):\n" + ctx + "\n\nQuestion: " + user
+    )
@@ -3,10 +3,30 @@
 Recursive file finder.
 """
 from __future__ import annotations
+import fnmatch
+import os
 import pathlib
-from typing import List
+import time
+from typing import Iterator, List, Optional
+
+def iter_files(pattern: str, root: pathlib.Path = pathlib.Path.home(),
+               deadline: Optional[float] = None) -> Iterator[pathlib.Path]:
+    """Lazily yield paths starting with pattern under root.
+
+    With a deadline (a time.monotonic() value) the walk stops once it passes,
+    even between matches.
+    """
+    if deadline is None:
+        return root.rglob(f"{pattern}*")
+    return _walk(f"{pattern}*", root, deadline)
+
+def _walk(glob: str, root: pathlib.Path, deadline: float) -> Iterator[pathlib.Path]:
+    for dirpath, dirnames, filenames in os.walk(root):
+        if time.monotonic() > deadline:
+            return
+        for name in fnmatch.filter(dirnames, glob) + fnmatch.filter(filenames, glob):
+            yield pathlib.Path(dirpath, name)
 
 def find_file(pattern: str, root: pathlib.Path = pathlib.Path.home()) -> List[pathlib.Path]:
     """Recursively search for files starting with pattern under root."""
-    return list(root.rglob(f"{pattern}*"))
-
+    return list(iter_files(pattern, root))
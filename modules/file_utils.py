@@ -1,8 +1,10 @@
 # modules/file_utils.py
 
+import mmap
 import os
 import subprocess
 import shutil
+from typing import Iterator, List, Tuple
 
 def open_file(path: str) -> str:
     """Open a file using available default application method."""
@@ -25,3 +27,24 @@ def open_file(path: str) -> str:
                 return f"[red]✖ Failed with {cmd}: {e}[/red]"
 
     return "[red]✖ No compatible file opener found (xdg-open, gio, etc.).[/red]"
+
+def iter_line_blocks(path: str, block_size: int = 4 * 1024 * 1024) -> Iterator[Tuple[int, List[str]]]:
+    """Yield (offset_after_block, lines) over a file through mmap.
+
+    Blocks end on a newline, so no line is split; memory stays at one block
+    no matter how large the file is.
+    """
+    full_path = os.path.expanduser(path.strip())
+    size = os.path.getsize(full_path)
+    if size == 0:
+        return
+    with open(full_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = 0
+        while pos < size:
+            end = min(pos + block_size, size)
+            if end < size:
+                nl = mm.rfind(b"\n", pos, end)
+                # A single line longer than the block: take it whole.
+                end = (nl + 1) if nl != -1 else ((mm.find(b"\n", end) + 1) or size)
+            yield end, mm[pos:end].decode("utf-8", errors="replace").splitlines()
+            pos = end
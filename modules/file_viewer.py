@@ -0,0 +1,487 @@
+"""file_viewer.py
+Memory-mapped pager for files of any size (`view <file>`).
+
+The file is never read into memory: each page is sliced out of an mmap,
+a sparse line index (one checkpoint per 64 KB) is built by a background
+thread, regex search runs directly over the mapped buffer, and follow mode
+(like `tail -f`) waits on inotify, falling back to polling.
+"""
+from __future__ import annotations
+import bisect
+import ctypes
+import mmap
+import os
+import re
+import select
+import sys
+import threading
+import time
+from array import array
+from typing import List, Optional, Tuple
+
+from rich.console import Console
+from rich.text import Text
+
+from modules import render
+
+console = Console()
+
+BLOCK = 64 * 1024            # index checkpoint spacing
+MAX_LINE_BYTES = 4096        # never decode more than this of one line per page
+SEARCH_WINDOW = 4 * 1024 * 1024
+POLL_SECONDS = 0.5
+PLAIN_LINES = 200            # lines printed when not attached to a terminal
+
+_KEYS = {
+    " ": "page_down", "f": "page_down", "\x1b[6~": "page_down", "\x06": "page_down",
+    "b": "page_up", "\x1b[5~": "page_up", "\x02": "page_up",
+    "j": "down", "\x1b[B": "down", "\r": "down", "k": "up", "\x1b[A": "up",
+    "g": "top", "<": "top", "\x1b[H": "top", "G": "bottom", ">": "bottom", "\x1b[F": "bottom",
+    ":": "goto", "/": "search", "?": "search_back", "n": "next", "N": "prev",
+    "F": "follow", "h": "help", "q": "quit", "\x1b": "quit", "\x03": "quit",
+}
+HELP = "space/b page  j/k line  g/G top/bottom  :N or :N% go to  /re ?re n/N search  F follow  q quit"
+
+
+class _Mapped:
+    """mmap of the file that can be re-opened when the file grows or is replaced.
+
+    Touching a mapped page past the end of a file that was truncated in place
+    (`> app.log`, logrotate's copytruncate) raises SIGBUS, so every access
+    first checks the open file's size and shrinks the map if it got smaller.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock = threading.RLock()
+        self.mm: Optional[mmap.mmap] = None
+        self.fd = -1
+        self.size = 0
+        self.ino = 0
+        self.truncated = False
+        self.remap()
+
+    def remap(self) -> str:
+        """Pick up changes on disk. Returns '', 'grown' or 'replaced'."""
+        with self.lock:
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                return ""
+            same = st.st_ino == self.ino and not self.truncated
+            if same and st.st_size == self.size and (self.mm or not st.st_size):
+                return ""
+            change = "grown" if same and st.st_size >= self.size else "replaced"
+            self.close()
+            self.size, self.ino, self.truncated = st.st_size, st.st_ino, False
+            try:
+                self.fd = os.open(self.path, os.O_RDONLY)
+                if self.size:
+                    self.mm = mmap.mmap(self.fd, self.size, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):       # gone or shrunk since the stat: try again later
+                self.close()
+                self.size, self.truncated = 0, True
+            return change
+
+    def _check(self) -> None:
+        """Shrink the map to the file if it was truncated. Call with the lock held."""
+        if self.mm is None:
+            return
+        size = os.fstat(self.fd).st_size
+        if size < self.size:
+            self.mm.close()
+            self.mm = mmap.mmap(self.fd, size, access=mmap.ACCESS_READ) if size else None
+            self.size = size
+            self.truncated = True       # the next remap() reports 'replaced'
+
+    def read(self, start: int, end: int) -> bytes:
+        with self.lock:
+            self._check()
+            return self.mm[max(0, start):min(end, self.size)] if self.mm else b""
+
+    def find(self, sub: bytes, start: int, end: Optional[int] = None) -> int:
+        with self.lock:
+            self._check()
+            return self.mm.find(sub, start, self.size if end is None else end) if self.mm else -1
+
+    def rfind(self, sub: bytes, start: int, end: int) -> int:
+        with self.lock:
+            self._check()
+            return self.mm.rfind(sub, start, end) if self.mm else -1
+
+    def search(self, pattern: "re.Pattern[bytes]", start: int, end: int) -> Optional[int]:
+        """Offset of the first match in [start, end), or None."""
+        with self.lock:
+            self._check()
+            m = pattern.search(self.mm, start, min(end, self.size)) if self.mm else None
+            return m.start() if m else None
+
+    def search_last(self, pattern: "re.Pattern[bytes]", start: int, end: int) -> Optional[int]:
+        """Offset of the last match in [start, end), or None."""
+        last = None
+        with self.lock:
+            self._check()
+            if self.mm is not None:
+                for m in pattern.finditer(self.mm, start, min(end, self.size)):
+                    last = m.start()
+        return last
+
+    def close(self) -> None:
+        with self.lock:
+            if self.mm is not None:
+                self.mm.close()
+                self.mm = None
+            if self.fd >= 0:
+                os.close(self.fd)
+                self.fd = -1
+
+
+class _LineIndex(threading.Thread):
+    """Sparse (offset, newlines before offset) checkpoints, built in the background."""
+
+    def __init__(self, data: _Mapped) -> None:
+        super().__init__(daemon=True)
+        self.data = data
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopped = False
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.offsets = array("Q", [0])
+            self.counts = array("Q", [0])
+            self.scanned = 0
+        self.wake.set()
+
+    def run(self) -> None:
+        while not self.stopped:
+            with self.lock:
+                start, before = self.scanned, self.counts[-1]
+            # read() re-checks the file's size, so a truncated file is never read past its end.
+            chunk = self.data.read(start, start + BLOCK)
+            if not chunk:
+                self.wake.wait()
+                self.wake.clear()
+                continue
+            with self.lock:
+                if self.scanned != start:
+                    continue            # reset while we were reading
+                self.scanned = start + len(chunk)
+                self.offsets.append(self.scanned)
+                self.counts.append(before + chunk.count(b"\n"))
+
+    @property
+    def done(self) -> bool:
+        return self.scanned >= self.data.size
+
+    def progress(self) -> int:
+        return 100 if not self.data.size else min(100, self.scanned * 100 // self.data.size)
+
+    def total_lines(self) -> Optional[int]:
+        if not self.done:
+            return None
+        trailing = self.data.size and self.data.read(self.data.size - 1, self.data.size) != b"\n"
+        return int(self.counts[-1]) + (1 if trailing else 0)
+
+    def line_of(self, offset: int) -> Optional[int]:
+        """0-based line number containing offset, if the index reaches that far."""
+        with self.lock:
+            if offset > self.scanned:
+                return None
+            i = bisect.bisect_right(self.offsets, offset) - 1
+            base, before = self.offsets[i], self.counts[i]
+        return int(before) + self.data.read(base, offset).count(b"\n")
+
+    def offset_of(self, line: int) -> Optional[int]:
+        """Start offset of 0-based line, waiting for the index if needed; None past EOF."""
+        while True:
+            with self.lock:
+                i = bisect.bisect_left(self.counts, line) - 1
+                ready = i + 1 < len(self.counts) or self.done
+                base, before = (self.offsets[i], self.counts[i]) if i >= 0 else (0, 0)
+            if ready:
+                break
+            time.sleep(0.02)
+        pos = int(base)
+        for _ in range(line - int(before)):
+            nl = self.data.find(b"\n", pos)
+            if nl == -1 or nl + 1 >= self.data.size:
+                return None
+            pos = nl + 1
+        return pos
+
+
+class _Inotify:
+    """Minimal inotify watch through libc (Linux)."""
+
+    MASK = 0x2 | 0x4 | 0x400 | 0x800          # MODIFY | ATTRIB | DELETE_SELF | MOVE_SELF
+
+    def __init__(self, path: str) -> None:
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watch(path)
+
+    def watch(self, path: str) -> None:
+        if self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.MASK) < 0:
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+
+    def drain(self) -> None:
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class Viewer:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.name = os.path.basename(path)
+        self.data = _Mapped(path)
+        self.index = _LineIndex(self.data)
+        self.index.start()
+        self.top = 0
+        self.pattern: Optional[Tuple[str, "re.Pattern[bytes]", "re.Pattern[str]"]] = None
+        self.message = ""
+
+    # -------------------------------------------------------------------
+    # Line arithmetic on byte offsets (works before the index is ready)
+    # -------------------------------------------------------------------
+    @property
+    def rows(self) -> int:
+        return max(console.size.height - 1, 3)
+
+    def _line_start(self, offset: int) -> int:
+        return self.data.rfind(b"\n", 0, offset) + 1 if offset > 0 else 0
+
+    def _next_line(self, offset: int) -> Optional[int]:
+        nl = self.data.find(b"\n", offset)
+        return nl + 1 if nl != -1 and nl + 1 < self.data.size else None
+
+    def _prev_line(self, offset: int) -> Optional[int]:
+        return self._line_start(offset - 1) if offset > 0 else None
+
+    def _move(self, lines: int) -> None:
+        step = self._next_line if lines > 0 else self._prev_line
+        for _ in range(abs(lines)):
+            nxt = step(self.top)
+            if nxt is None:
+                break
+            self.top = nxt
+
+    def _bottom(self) -> None:
+        self.top = self._line_start(self.data.size - 1) if self.data.size else 0
+        self._move(-(self.rows - 2))
+
+    # -------------------------------------------------------------------
+    # Drawing
+    # -------------------------------------------------------------------
+    def _page(self) -> List[Tuple[int, str]]:
+        out = []
+        pos: Optional[int] = self.top
+        while pos is not None and len(out) < self.rows - 1 and pos < self.data.size:
+            nl = self.data.find(b"\n", pos, pos + MAX_LINE_BYTES)
+            end = nl if nl != -1 else pos + MAX_LINE_BYTES
+            out.append((pos, self.data.read(pos, end).decode("utf-8", errors="replace").rstrip("\r")))
+            pos = self._next_line(pos)
+        return out
+
+    def draw(self, status: str = "") -> None:
+        page = self._page()
+        first = self.index.line_of(self.top)
+        width = console.size.width
+        gutter = len(str((first or 0) + len(page))) + 1 if first is not None else 0
+        text = Text(no_wrap=True, overflow="crop")
+        for i, (_, line) in enumerate(page):
+            if gutter:
+                text.append(f"{first + i + 1:>{gutter - 1}} ", style="grey50")
+            start, shown = len(text), line[: width - gutter].expandtabs(4)
+            text.append(shown)
+            if self.pattern:
+                # Match the line on its own so ^ anchors at the line, not the gutter.
+                for m in self.pattern[2].finditer(shown):
+                    text.stylize("black on yellow", start + m.start(), start + m.end())
+            text.append("\n")
+        for _ in range(self.rows - 1 - len(page)):
+            text.append("~\n", style="blue")
+
+        total = self.index.total_lines()
+        pct = 100 if not self.data.size else self.top * 100 // self.data.size
+        bar = f" {self.name}  line {first + 1 if first is not None else '?'}/{total if total is not None else '?'}  {pct}%"
+        if not self.index.done:
+            bar += f"  [indexing {self.index.progress()}%]"
+        bar += f"  {status or self.message or 'h help, q quit'}"
+        text.append(bar[:width].ljust(width), style="reverse")
+        console.clear()
+        console.print(text, end="")
+        self.message = ""
+
+    def _prompt(self, label: str) -> str:
+        sys.stdout.write(f"\r\x1b[K{label}")
+        sys.stdout.flush()
+        try:
+            return input().strip()
+        except (EOFError, KeyboardInterrupt):
+            return ""
+
+    # -------------------------------------------------------------------
+    # Commands
+    # -------------------------------------------------------------------
+    def goto(self, target: str) -> None:
+        try:
+            if target.endswith("%"):
+                pct = min(100.0, max(0.0, float(target[:-1])))
+                self.top = self._line_start(int(self.data.size * pct / 100))
+                return
+            line = max(1, int(target))
+        except ValueError:
+            self.message = f"Not a line number or percentage: {target}"
+            return
+        if not self.index.done:
+            self.draw(f"indexing to reach line {line}...")
+        offset = self.index.offset_of(line - 1)
+        if offset is None:
+            self.message = f"File has only {self.index.total_lines()} lines"
+            self._bottom()
+        else:
+            self.top = offset
+
+    def set_pattern(self, raw: str) -> bool:
+        if not raw:
+            return self.pattern is not None
+        flags = re.IGNORECASE if raw.islower() else 0       # smart case, like less -i
+        try:
+            self.pattern = (raw, re.compile(raw.encode("utf-8"), flags | re.MULTILINE),
+                            re.compile(raw, flags | re.MULTILINE))
+        except re.error as e:
+            self.message = f"Bad pattern: {e}"
+            return False
+        return True
+
+    def search(self, forward: bool = True) -> None:
+        if not self.pattern:
+            self.message = "No previous search"
+            return
+        rx = self.pattern[1]
+        if forward:
+            start = self._next_line(self.top)
+            hit = self.data.search(rx, start, self.data.size) if start is not None else None
+        else:
+            # re has no reverse search: scan windows backwards from the top line.
+            hit, end = None, self.top
+            while end > 0 and hit is None:
+                begin = max(0, end - SEARCH_WINDOW)
+                hit = self.data.search_last(rx, self._line_start(begin), end)
+                end = self._line_start(begin)
+        if hit is None:
+            self.message = f"Pattern not found: {self.pattern[0]}"
+        else:
+            self.top = self._line_start(hit)
+
+    def follow(self) -> None:
+        """Stay at the end of the file while it grows, until a key is pressed."""
+        import termios
+        import tty
+
+        try:
+            watcher: Optional[_Inotify] = _Inotify(self.path)
+        except (OSError, AttributeError):
+            watcher = None                  # not Linux, or out of watches: poll instead
+        fd = sys.stdin.fileno()
+        old = termios.tcgetattr(fd)
+        mode = "inotify" if watcher else "polling"
+        try:
+            tty.setcbreak(fd)
+            while True:
+                if self._refresh() == "replaced" and watcher:
+                    try:
+                        watcher.watch(self.path)    # a rotated log is a new inode
+                    except OSError:
+                        pass
+                self._bottom()
+                self.draw(f"following ({mode}), any key to stop")
+                waits = [fd] + ([watcher.fd] if watcher else [])
+                ready = select.select(waits, [], [], POLL_SECONDS * (4 if watcher else 1))[0]
+                if fd in ready:
+                    os.read(fd, 32)
+                    break
+                if watcher and watcher.fd in ready:
+                    watcher.drain()
+        finally:
+            termios.tcsetattr(fd, termios.TCSADRAIN, old)
+            if watcher:
+                watcher.close()
+
+    def _refresh(self) -> str:
+        change = self.data.remap()
+        if change == "replaced":            # truncated or rotated
+            self.index.reset()
+            self.top = 0
+        elif change == "grown":
+            self.index.wake.set()
+        return change
+
+    def run(self) -> None:
+        try:
+            while True:
+                if self.data.truncated:
+                    self._refresh()
+                self.draw()
+                action = _KEYS.get(render.read_key())
+                if action == "quit":
+                    break
+                elif action == "page_down":
+                    self._move(self.rows - 2)
+                elif action == "page_up":
+                    self._move(-(self.rows - 2))
+                elif action in ("down", "up"):
+                    self._move(1 if action == "down" else -1)
+                elif action == "top":
+                    self.top = 0
+                elif action == "bottom":
+                    self._refresh()
+                    self._bottom()
+                elif action == "goto":
+                    target = self._prompt("Go to line or N%: ")
+                    if target:
+                        self.goto(target)
+                elif action in ("search", "search_back"):
+                    if self.set_pattern(self._prompt("/" if action == "search" else "?")):
+                        self.search(forward=action == "search")
+                elif action in ("next", "prev"):
+                    self.search(forward=action == "next")
+                elif action == "follow":
+                    self.follow()
+                elif action == "help":
+                    self.message = HELP
+        finally:
+            self.index.stopped = True
+            self.index.wake.set()
+            self.data.close()
+            console.clear()
+
+
+def view_file(path: str) -> Optional[str]:
+    """Page through a file; returns an error message (rich markup) or None."""
+    full_path = os.path.expanduser(path.strip())
+    if not os.path.isfile(full_path):
+        return f"[red]✖ File does not exist: {full_path}[/red]"
+    if not os.access(full_path, os.R_OK):
+        return f"[red]✖ Permission denied: {full_path}[/red]"
+    if not render._interactive():
+        # Not a terminal: behave like head.
+        with open(full_path, "rb") as f:
+            for i, line in enumerate(f):
+                if i == PLAIN_LINES:
+                    sys.stdout.write(f"... (showing first {PLAIN_LINES} lines; run in a terminal to page)\n")
+                    break
+                sys.stdout.write(line.decode("utf-8", errors="replace"))
+        return None
+    Viewer(full_path).run()
+    return None
@@ -4,8 +4,12 @@ Recursive folder finder.
 """
 from __future__ import annotations
 import pathlib
-from typing import List
+from typing import Iterator, List
+
+def iter_folders(pattern: str, root: pathlib.Path = pathlib.Path.home()) -> Iterator[pathlib.Path]:
+    """Lazily yield folders starting with pattern under root."""
+    return (p for p in root.rglob(f"{pattern}*") if p.is_dir())
 
 def find_folder(pattern: str, root: pathlib.Path = pathlib.Path.home()) -> List[pathlib.Path]:
     """Recursively search for folders starting with pattern under root."""
-    return [p for p in root.rglob(f"{pattern}*") if p.is_dir()]
+    return list(iter_folders(pattern, root))
@@ -0,0 +1,344 @@
+"""http_client.py
+Shared HTTP client: one pooled keep-alive session plus an on-disk cache.
+
+The cache follows the parts of RFC 7234 that matter for a private client
+cache: Cache-Control max-age / no-store / no-cache, Expires, the
+Last-Modified heuristic, and revalidation with ETag / Last-Modified (a 304
+refreshes the stored copy). APIs that send no caching headers at all (IP and
+geo lookups) can be given a client-side `ttl`. The cache is bounded in size
+and evicts least recently used entries. Per-host counters show what the
+cache saved.
+"""
+from __future__ import annotations
+import email.utils
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlparse
+
+import config
+from modules import instrument
+
+CACHE_DIR = config.CACHE_DIR / "http"
+USER_AGENT = "ait (AI Terminal Assistant)"
+MAX_ENTRY_BYTES = 5 * 1024 * 1024
+HEURISTIC_FRACTION = 0.1          # of (Date - Last-Modified), RFC 7234 §4.2.2
+HEURISTIC_MAX = 24 * 3600
+_KEEP_HEADERS = ("content-type", "etag", "last-modified", "cache-control", "expires", "date", "age")
+
+_session: Any = None
+_session_lock = threading.Lock()
+_stats_lock = threading.Lock()
+
+
+def session() -> Any:
+    """The process-wide keep-alive requests.Session."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+            _session.headers["User-Agent"] = USER_AGENT
+    return _session
+
+
+# -----------------------------------------------------------------------
+# Stats
+# -----------------------------------------------------------------------
+@dataclass
+class HostStats:
+    requests: int = 0
+    network: int = 0          # requests that went out (including revalidations)
+    fresh_hits: int = 0       # answered from disk with no network at all
+    revalidated: int = 0      # 304: stored body reused
+    bytes_down: int = 0
+    bytes_saved: int = 0
+    network_ms: float = 0.0
+
+
+STATS: Dict[str, HostStats] = {}
+
+
+def _record(host: str, **delta: float) -> None:
+    with _stats_lock:
+        st = STATS.setdefault(host, HostStats())
+        for key, value in delta.items():
+            setattr(st, key, getattr(st, key) + value)
+
+
+def stats_rows() -> List[Tuple[str, int, int, int, int, str, str, str]]:
+    """(host, requests, network, fresh hits, 304s, downloaded, saved, avg ms) per host."""
+    rows = []
+    with _stats_lock:
+        for host, st in sorted(STATS.items(), key=lambda kv: -kv[1].requests):
+            avg = st.network_ms / st.network if st.network else 0.0
+            rows.append((host, st.requests, st.network, st.fresh_hits, st.revalidated,
+                         _size(st.bytes_down), _size(st.bytes_saved), f"{avg:.0f}"))
+    return rows
+
+
+def _size(n: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+# -----------------------------------------------------------------------
+# Responses
+# -----------------------------------------------------------------------
+@dataclass
+class Response:
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    content: bytes
+    from_cache: str = ""               # "", "fresh" or "revalidated"
+    truncated: bool = False
+    encoding: Optional[str] = field(default=None, repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or _charset(self.headers) or "utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} for {self.url}")
+
+
+def _charset(headers: Dict[str, str]) -> Optional[str]:
+    ctype = headers.get("content-type", "")
+    if "charset=" in ctype:
+        return ctype.split("charset=", 1)[1].split(";")[0].strip().strip('"')
+    return None
+
+
+# -----------------------------------------------------------------------
+# Cache entries
+# -----------------------------------------------------------------------
+def _key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+
+
+def _directives(headers: Dict[str, str]) -> Dict[str, Optional[str]]:
+    out: Dict[str, Optional[str]] = {}
+    for part in headers.get("cache-control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            out[name.lower()] = value.strip('"') or None
+    return out
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _freshness(headers: Dict[str, str]) -> float:
+    """Freshness lifetime in seconds (RFC 7234 §4.2.1)."""
+    cc = _directives(headers)
+    if "no-cache" in cc:
+        return 0.0
+    if cc.get("max-age") is not None:
+        try:
+            return max(0.0, float(cc["max-age"]))
+        except ValueError:
+            return 0.0
+    date = _http_date(headers.get("date")) or time.time()
+    expires = _http_date(headers.get("expires"))
+    if "expires" in headers:
+        return max(0.0, expires - date) if expires else 0.0
+    modified = _http_date(headers.get("last-modified"))
+    if modified:
+        return min(HEURISTIC_MAX, max(0.0, (date - modified) * HEURISTIC_FRACTION))
+    return 0.0
+
+
+def _load(key: str) -> Optional[Dict[str, Any]]:
+    """Stored metadata for key, or None (a miss) if it is absent or malformed."""
+    try:
+        with open(CACHE_DIR / f"{key}.json") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # A file from another version (or edited by hand) must not break every later request.
+    if (not isinstance(meta, dict) or not isinstance(meta.get("headers"), dict)
+            or not isinstance(meta.get("stored_at"), (int, float))):
+        return None
+    return meta
+
+
+def _body(key: str) -> Optional[bytes]:
+    try:
+        with open(CACHE_DIR / f"{key}.body", "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _touch(key: str) -> None:
+    try:
+        os.utime(CACHE_DIR / f"{key}.json")     # mtime is the LRU clock
+    except OSError:
+        pass
+
+
+def _write(path: Any, data: bytes) -> None:
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _store(key: str, url: str, headers: Dict[str, str], body: Optional[bytes]) -> None:
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        if body is not None:
+            _write(CACHE_DIR / f"{key}.body", body)
+        meta = {"url": url, "stored_at": time.time(),
+                "headers": {k: v for k, v in headers.items() if k in _KEEP_HEADERS}}
+        _write(CACHE_DIR / f"{key}.json", json.dumps(meta).encode("utf-8"))
+        if body is not None:
+            _evict()
+    except OSError:
+        pass
+
+
+def _evict() -> None:
+    """Drop least recently used entries until the cache fits http_cache_mb."""
+    limit = float(config.CONFIG.get("http_cache_mb", 50)) * 1024 * 1024
+    entries = []
+    total = 0
+    with os.scandir(CACHE_DIR) as it:
+        for e in it:
+            if e.name.endswith(".json"):
+                key = e.name[:-5]
+                try:
+                    size = e.stat().st_size + os.stat(CACHE_DIR / f"{key}.body").st_size
+                except OSError:
+                    size = e.stat().st_size
+                entries.append((e.stat().st_mtime, key, size))
+                total += size
+    if total <= limit:
+        return
+    for _, key, size in sorted(entries):
+        for suffix in (".json", ".body"):
+            try:
+                os.remove(CACHE_DIR / f"{key}{suffix}")
+            except OSError:
+                pass
+        total -= size
+        if total <= limit:
+            break
+
+
+def clear_cache() -> int:
+    """Delete every cached response. Returns the number removed."""
+    removed = 0
+    try:
+        with os.scandir(CACHE_DIR) as it:
+            for e in it:
+                os.remove(e.path)
+                removed += e.name.endswith(".json")
+    except OSError:
+        pass
+    return removed
+
+
+# -----------------------------------------------------------------------
+# Requests
+# -----------------------------------------------------------------------
+def get(url: str, *, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+        timeout: float = 10, ttl: Optional[float] = None, cache: bool = True,
+        max_bytes: Optional[int] = None) -> Response:
+    """GET through the shared session and disk cache.
+
+    ttl treats a stored response as fresh for at least that many seconds,
+    for APIs that send no caching headers. max_bytes stops reading after that
+    many bytes (truncated responses are not cached).
+    """
+    if params:
+        url = f"{url}{'&' if '?' in url else '?'}{urlencode(params)}"
+    host = urlparse(url).netloc
+    _record(host, requests=1)
+    key = _key(url)
+    meta = _load(key) if cache else None
+    stored = None
+    if meta is not None:
+        stored_headers = meta["headers"]
+        age = time.time() - meta["stored_at"] + float(stored_headers.get("age", 0) or 0)
+        lifetime = max(_freshness(stored_headers), ttl or 0.0)
+        stored = _body(key)
+        if stored is not None and age < lifetime:
+            _touch(key)
+            _record(host, fresh_hits=1, bytes_saved=len(stored))
+            return Response(url, 200, stored_headers, stored, from_cache="fresh")
+
+    send = dict(headers or {})
+    if stored is not None:
+        if meta["headers"].get("etag"):
+            send["If-None-Match"] = meta["headers"]["etag"]
+        if meta["headers"].get("last-modified"):
+            send["If-Modified-Since"] = meta["headers"]["last-modified"]
+
+    start = time.perf_counter()
+    with instrument.span(f"http {host}", cat="http", revalidate=stored is not None), \
+            session().get(url, headers=send, timeout=timeout, stream=True) as r:
+        body = bytearray()
+        truncated = False
+        if r.status_code != 304:
+            for block in r.iter_content(64 * 1024):
+                body += block
+                if max_bytes and len(body) >= max_bytes:
+                    truncated = True
+                    break
+        resp_headers = {k.lower(): v for k, v in r.headers.items()}
+        encoding = r.encoding if "charset=" in resp_headers.get("content-type", "") else None
+    _record(host, network=1, bytes_down=len(body), network_ms=(time.perf_counter() - start) * 1000)
+    instrument.count("http.bytes_down", len(body))
+
+    if r.status_code == 304 and stored is not None:
+        merged = {**meta["headers"], **{k: v for k, v in resp_headers.items() if k in _KEEP_HEADERS}}
+        _store(key, url, merged, None)
+        _record(host, revalidated=1, bytes_saved=len(stored))
+        return Response(url, 200, merged, stored, from_cache="revalidated")
+
+    response = Response(url, r.status_code, resp_headers, bytes(body), truncated=truncated, encoding=encoding)
+    cc = _directives(resp_headers)
+    if (cache and r.status_code == 200 and not truncated and len(body) <= MAX_ENTRY_BYTES
+            and "no-store" not in cc and resp_headers.get("vary", "accept-encoding").lower() in ("accept-encoding", "")
+            and (ttl or _freshness(resp_headers) or "etag" in resp_headers or "last-modified" in resp_headers)):
+        _store(key, url, resp_headers, bytes(body))
+    return response
+
+
+def stream(url: str, *, headers: Optional[Dict[str, str]] = None, timeout: float = 30) -> Any:
+    """Uncached streaming GET over the pooled session (a requests.Response; use as a context manager)."""
+    host = urlparse(url).netloc
+    start = time.perf_counter()
+    with instrument.span(f"http {host}", cat="http", stream=True):
+        r = session().get(url, headers=headers or {}, timeout=timeout, stream=True)
+    _record(host, requests=1, network=1, network_ms=(time.perf_counter() - start) * 1000,
+            bytes_down=int(r.headers.get("Content-Length", 0) or 0))
+    return r
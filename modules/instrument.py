@@ -0,0 +1,236 @@
+"""instrument.py
+Timing spans, byte/token counters and an optional sampling profiler.
+
+Spans read the monotonic perf_counter_ns clock and cost a few microseconds.
+They feed per-name latency percentiles for `stats` and a bounded event log
+that exports as Chrome trace-event JSON (chrome://tracing, ui.perfetto.dev).
+While the sampler is on, it records the Python stack of every thread that is
+inside a span; the samples go into the same trace.
+"""
+from __future__ import annotations
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+MAX_EVENTS = 20000            # trace events kept (oldest dropped first)
+MAX_DURATIONS = 2000          # per span name, for percentiles
+MAX_STACK = 48
+
+_T0 = time.perf_counter_ns()
+_PID = os.getpid()
+_lock = threading.Lock()
+_local = threading.local()
+_events: Deque[Dict[str, Any]] = deque(maxlen=MAX_EVENTS)
+_durations: Dict[str, Deque[float]] = {}
+_totals: Dict[str, List[Any]] = {}           # name -> [category, count, total ms]
+_threads: Dict[int, str] = {}
+_active: Dict[int, "Span"] = {}               # thread id -> innermost open span
+COUNTERS: Dict[str, float] = defaultdict(float)
+
+
+def _us(ns: int) -> float:
+    return (ns - _T0) / 1000
+
+
+class Span:
+    __slots__ = ("name", "cat", "args")
+
+    def __init__(self, name: str, cat: str, args: Dict[str, Any]) -> None:
+        self.name, self.cat, self.args = name, cat, args
+
+    def rename(self, name: str) -> None:
+        """Relabel once it is known what the span turned out to be."""
+        self.name = name
+
+
+@contextmanager
+def span(name: str, cat: str = "cmd", **args: Any) -> Iterator[Span]:
+    """Time the enclosed block."""
+    s = Span(name, cat, args)
+    stack = _local.__dict__.setdefault("stack", [])
+    tid = threading.get_ident()
+    stack.append(s)
+    with _lock:
+        _active[tid] = s
+    start = time.perf_counter_ns()
+    try:
+        yield s
+    finally:
+        dur = time.perf_counter_ns() - start
+        stack.pop()
+        with _lock:
+            if stack:
+                _active[tid] = stack[-1]
+            else:
+                _active.pop(tid, None)
+        _finish(s, start, dur, tid)
+
+
+def _finish(s: Span, start: int, dur: int, tid: int) -> None:
+    ms = dur / 1e6
+    with _lock:
+        if tid not in _threads:
+            _threads[tid] = threading.current_thread().name
+        q = _durations.get(s.name)
+        if q is None:
+            q = _durations[s.name] = deque(maxlen=MAX_DURATIONS)
+            _totals[s.name] = [s.cat, 0, 0.0]
+        q.append(ms)
+        _totals[s.name][1] += 1
+        _totals[s.name][2] += ms
+        _events.append({"name": s.name, "cat": s.cat, "ph": "X", "ts": _us(start), "dur": dur / 1000,
+                        "pid": _PID, "tid": tid, "args": s.args})
+
+
+def current() -> Optional[Span]:
+    """Innermost open span on this thread."""
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else None
+
+
+def count(name: str, n: float = 1) -> None:
+    """Add n to a counter (bytes, tokens, requests)."""
+    if not n:
+        return
+    with _lock:
+        COUNTERS[name] += n
+        _events.append({"name": name, "ph": "C", "ts": _us(time.perf_counter_ns()), "pid": _PID,
+                        "args": {"value": COUNTERS[name]}})
+
+
+def reset() -> None:
+    with _lock:
+        _events.clear()
+        _durations.clear()
+        _totals.clear()
+        COUNTERS.clear()
+        _samples.clear()
+
+
+# -----------------------------------------------------------------------
+# Sampling profiler
+# -----------------------------------------------------------------------
+_samples: Deque[Tuple[float, int, Tuple[str, ...]]] = deque(maxlen=MAX_EVENTS)
+_sampler: Optional["_Sampler"] = None
+
+
+def _frame_name(code: Any) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, interval: float) -> None:
+        super().__init__(name="ait-sampler", daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            with _lock:
+                tids = list(_active)
+            if not tids:
+                continue
+            frames = sys._current_frames()
+            now = _us(time.perf_counter_ns())
+            for tid in tids:
+                frame = frames.get(tid)
+                stack: List[str] = []
+                while frame is not None and len(stack) < MAX_STACK:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                if stack:
+                    _samples.append((now, tid, tuple(reversed(stack))))
+
+
+def start_profiler(interval_ms: float = 5.0) -> None:
+    """Sample the stacks of threads inside spans every interval_ms."""
+    global _sampler
+    stop_profiler()
+    _sampler = _Sampler(max(interval_ms, 0.5) / 1000)
+    _sampler.start()
+
+
+def stop_profiler() -> None:
+    global _sampler
+    if _sampler is not None:
+        _sampler.stopped.set()
+        _sampler = None
+
+
+def profiling() -> bool:
+    return _sampler is not None
+
+
+# -----------------------------------------------------------------------
+# Reports
+# -----------------------------------------------------------------------
+def _percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def stats_rows() -> List[Tuple[str, str, int, str, str, str, str, str]]:
+    """(name, category, count, p50, p95, p99, max, total) per span name, slowest total first."""
+    with _lock:
+        snapshot = [(name, *_totals[name], sorted(q)) for name, q in _durations.items()]
+    rows = []
+    for name, cat, n, total, values in sorted(snapshot, key=lambda r: -r[3]):
+        rows.append((name, cat, n, f"{_percentile(values, 50):.1f}", f"{_percentile(values, 95):.1f}",
+                     f"{_percentile(values, 99):.1f}", f"{values[-1]:.1f}", f"{total:.0f}"))
+    return rows
+
+
+def counter_rows() -> List[Tuple[str, str]]:
+    with _lock:
+        return [(name, f"{value:,.0f}") for name, value in sorted(COUNTERS.items())]
+
+
+def hot_rows(limit: int = 15) -> List[Tuple[str, int, str]]:
+    """Functions most often on top of the sampled stacks: (function, samples, share)."""
+    leaves: Dict[str, int] = defaultdict(int)
+    samples = list(_samples)
+    for _, _, stack in samples:
+        leaves[stack[-1]] += 1
+    ranked = sorted(leaves.items(), key=lambda kv: -kv[1])[:limit]
+    return [(name, n, f"{100 * n / len(samples):.0f}%") for name, n in ranked]
+
+
+def export_trace(path: str) -> int:
+    """Write the session as Chrome trace-event JSON. Returns the number of events."""
+    with _lock:
+        events = list(_events)
+        threads = dict(_threads)
+    events.append({"name": "process_name", "ph": "M", "pid": _PID, "args": {"name": "ait"}})
+    events += [{"name": "thread_name", "ph": "M", "pid": _PID, "tid": tid, "args": {"name": name}}
+               for tid, name in threads.items()]
+
+    # Samples reference a tree of stack frames shared by prefix.
+    frame_ids: Dict[Tuple[str, ...], str] = {}
+    stack_frames: Dict[str, Dict[str, str]] = {}
+    samples = []
+    for ts, tid, stack in list(_samples):
+        parent = None
+        for depth in range(1, len(stack) + 1):
+            key = stack[:depth]
+            fid = frame_ids.get(key)
+            if fid is None:
+                fid = frame_ids[key] = str(len(frame_ids) + 1)
+                stack_frames[fid] = {"name": stack[depth - 1], "category": "python"}
+                if parent:
+                    stack_frames[fid]["parent"] = parent
+            parent = fid
+        samples.append({"cpu": 0, "tid": tid, "ts": ts, "name": "sample", "sf": parent, "weight": 1})
+
+    trace = {"traceEvents": events, "displayTimeUnit": "ms", "stackFrames": stack_frames, "samples": samples}
+    tmp = f"{path}.tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(tmp, "w") as f:
+        json.dump(trace, f, separators=(",", ":"))
+    os.replace(tmp, path)
+    return len(events)
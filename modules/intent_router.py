@@ -0,0 +1,293 @@
+"""intent_router.py
+Local intent classifier that answers machine questions without an LLM round trip.
+
+Two layers, both compiled once at import time:
+- a regex table for phrasings we know are unambiguous (confidence 1.0)
+- a small word + character n-gram TF-IDF model, compared by cosine
+  similarity against per-intent centroids built from example phrases
+
+Anything below the confidence threshold, any request to change something and
+any line asking several questions at once falls through to the LLM.
+"""
+from __future__ import annotations
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from rich.console import Console
+
+console = Console()
+
+DEFAULT_THRESHOLD = 0.35
+MIN_MARGIN = 0.05
+
+
+@dataclass
+class Intent:
+    name: str
+    confidence: float
+    args: Dict[str, str] = field(default_factory=dict)
+
+
+# -----------------------------------------------------------------------
+# Regex table (high confidence, may capture arguments)
+# -----------------------------------------------------------------------
+RULES: List[Tuple[str, re.Pattern]] = [
+    ("check_tool", re.compile(r"^(?:is|do i have|have i got)\s+(?P<tool>[\w.+-]+)\s+(?:installed|available|present)\??$")),
+    ("check_tool", re.compile(r"^(?:is|does)\s+(?P<tool>[\w.+-]+)\s+(?:exist|exists)\s+(?:on|in)\s+(?:this|my)\s+(?:system|machine|box)\??$")),
+    ("top_memory", re.compile(r"^(?:which|what|top)\b[\w\s']*\bprocess(?:es)?\b[\w\s']*\b(?:memory|ram|mem)\b[\w\s']*\??$")),
+    ("top_cpu", re.compile(r"^(?:which|what|top)\b[\w\s']*\bprocess(?:es)?\b[\w\s']*\b(?:cpu|processor|load)\b[\w\s']*\??$")),
+    ("public_ip", re.compile(r"^(?:what(?:'s| is)?|show(?: me)?)\s+my\s+(?:public|external)\s+ip(?:v4)?(?:\s+address)?\??$")),
+    ("private_ip", re.compile(r"^(?:what(?:'s| is)?|show(?: me)?)\s+my\s+(?:private|local|internal|lan)\s+ip(?:v4)?(?:\s+address)?\??$")),
+    ("gateway", re.compile(r"^(?:what(?:'s| is)?|show(?: me)?)\s+my\s+(?:default\s+)?(?:gateway|router)(?:\s+ip)?(?:\s+address)?\??$")),
+    ("dns", re.compile(r"^(?:what(?:'s| are| is)?|show(?: me)?)\s+my\s+dns(?:\s+servers?)?\??$")),
+]
+
+# Questions that mention machine terms but want an explanation, a script or
+# a command from the LLM rather than a live reading.
+DEFER_TO_LLM = re.compile(
+    r"\b(?:how (?:do|can|to|would)|why|explain|write|script|code|command for|"
+    r"example|difference|python|bash|regex|cron|what (?:is|are) (?:a|an)|mean(?:s|ing)?)\b"
+)
+
+# Requests to change something, or questions about one named service or
+# port: a canned listing would only look like an answer.
+ACTIONS = re.compile(
+    r"\b(?:kill|delete|remove|stop|start|restart|scan|install|uninstall|update|upgrade|open|launch|"
+    r"run|block|close|create|mount|format|shutdown|reboot|enable|disable|free up|clean)\b"
+    r"|\bis\s+[\w.+-]+\s+(?:running|up|active|listening)\b|\bport\s+\d+"
+)
+
+# Several questions in one line: each clause must agree on one intent.
+CLAUSES = re.compile(r"\s*(?:,|;|&|\band\b|\balso\b|\bthen\b|\bplus\b)\s*")
+
+
+# -----------------------------------------------------------------------
+# Example phrases for the n-gram model
+# -----------------------------------------------------------------------
+EXAMPLES: Dict[str, List[str]] = {
+    "health": [
+        "system health", "how is my system doing", "battery level", "battery status",
+        "what's my cpu usage", "cpu usage", "cpu load right now", "memory usage",
+        "how much ram is used", "how much memory is free", "disk usage", "how full is my disk",
+        "check system resources", "current cpu load", "am i charging",
+    ],
+    "top_memory": [
+        "which process uses most memory", "top memory processes", "what is eating my ram",
+        "biggest memory hog", "processes sorted by memory", "what uses all my memory",
+    ],
+    "top_cpu": [
+        "which process uses most cpu", "top cpu processes", "what is eating my cpu",
+        "what is slowing down my machine", "processes sorted by cpu", "highest cpu process",
+    ],
+    "ps_list": [
+        "list running processes", "show processes", "what is running", "show all processes",
+        "running programs", "list all tasks",
+    ],
+    "ip_all": [
+        "what is my ip", "what's my ip address", "show my ip", "my network info",
+        "show network details", "ip address info",
+    ],
+    "public_ip": [
+        "what is my public ip", "external ip address", "my public ipv4", "internet facing ip",
+    ],
+    "private_ip": [
+        "what is my private ip", "local ip address", "my lan ip", "internal ip address",
+    ],
+    "gateway": [
+        "what is my gateway", "default gateway", "router ip address", "show default route",
+    ],
+    "dns": [
+        "what dns servers am i using", "show dns servers", "my nameservers", "which dns resolver",
+    ],
+    "ipv6": [
+        "what is my ipv6", "show ipv6 address", "do i have ipv6", "my ipv6 info",
+    ],
+    "terminal_tools": [
+        "what terminal tools do i have", "list installed tools", "show installed cli tools",
+        "which command line tools are installed",
+    ],
+    "gui_tools": [
+        "what gui apps do i have", "list installed applications", "show desktop apps",
+        "which graphical tools are installed",
+    ],
+}
+
+
+# -----------------------------------------------------------------------
+# TF-IDF model
+# -----------------------------------------------------------------------
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _features(text: str) -> Counter:
+    """Word unigrams/bigrams plus character 3-grams of each word."""
+    words = _WORD_RE.findall(text.lower())
+    feats: Counter = Counter()
+    for w in words:
+        feats["w:" + w] += 1
+        padded = f" {w} "
+        for i in range(len(padded) - 2):
+            feats["c:" + padded[i:i + 3]] += 1
+    for a, b in zip(words, words[1:]):
+        feats[f"b:{a}_{b}"] += 1
+    return feats
+
+
+class _NgramModel:
+    def __init__(self, examples: Dict[str, List[str]]) -> None:
+        docs = [(_features(t), intent) for intent, texts in examples.items() for t in texts]
+        df: Counter = Counter()
+        for feats, _ in docs:
+            df.update(feats.keys())
+        n = len(docs)
+        self.idf = {f: math.log((1 + n) / (1 + c)) + 1.0 for f, c in df.items()}
+
+        sums: Dict[str, Dict[str, float]] = {}
+        for feats, intent in docs:
+            acc = sums.setdefault(intent, {})
+            for f, w in self._vector(feats).items():
+                acc[f] = acc.get(f, 0.0) + w
+        self.centroids = {intent: self._normalize(vec) for intent, vec in sums.items()}
+
+    @staticmethod
+    def _normalize(vec: Dict[str, float]) -> Dict[str, float]:
+        norm = math.sqrt(sum(w * w for w in vec.values())) or 1.0
+        return {f: w / norm for f, w in vec.items()}
+
+    def _vector(self, feats: Counter) -> Dict[str, float]:
+        # Features never seen in training carry no signal; ignoring them keeps
+        # unrelated words from diluting the match.
+        vec = {f: (1 + math.log(c)) * self.idf[f] for f, c in feats.items() if f in self.idf}
+        return self._normalize(vec)
+
+    def rank(self, text: str) -> List[Tuple[str, float]]:
+        feats = _features(text)
+        vec = self._vector(feats)
+        if not vec:
+            return []
+        # Penalise long inputs whose content is mostly unknown to the model.
+        coverage = sum(c for f, c in feats.items() if f in self.idf) / max(sum(feats.values()), 1)
+        scores = [
+            (intent, coverage * sum(w * centroid.get(f, 0.0) for f, w in vec.items()))
+            for intent, centroid in self.centroids.items()
+        ]
+        return sorted(scores, key=lambda s: s[1], reverse=True)
+
+
+_MODEL = _NgramModel(EXAMPLES)
+
+
+def classify(text: str, threshold: float = DEFAULT_THRESHOLD) -> Optional[Intent]:
+    """Return the local intent for text, or None if the LLM should handle it."""
+    q = text.strip().lower()
+    if not q:
+        return None
+
+    if DEFER_TO_LLM.search(q) or ACTIONS.search(q):
+        return None
+
+    # "is nmap installed and what's my gateway?" needs both answers: leave it to the LLM.
+    intents = [_classify_clause(c, threshold) for c in CLAUSES.split(q) if c.strip()]
+    if not intents or any(i is None for i in intents):
+        return None
+    if len({(i.name, tuple(sorted(i.args.items()))) for i in intents}) > 1:
+        return None
+    return min(intents, key=lambda i: i.confidence)
+
+
+def _classify_clause(q: str, threshold: float) -> Optional[Intent]:
+    for name, pattern in RULES:
+        m = pattern.match(q)
+        if m:
+            return Intent(name, 1.0, {k: v for k, v in m.groupdict().items() if v})
+
+    ranked = _MODEL.rank(q)
+    if not ranked:
+        return None
+    name, score = ranked[0]
+    runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+    # Require a clear winner, not just a score over the line.
+    if score < threshold or score - runner_up < MIN_MARGIN:
+        return None
+    return Intent(name, round(score, 3))
+
+
+# -----------------------------------------------------------------------
+# Dispatch to built-in modules
+# -----------------------------------------------------------------------
+def _check_tool(intent: Intent) -> None:
+    from modules import tools
+    name = intent.args.get("tool", "")
+    path = tools.which(name)
+    if path:
+        console.print(f"[green]✔ Tool '{name}' is installed[/green] [grey70]({path})[/grey70]")
+    else:
+        console.print(f"[red]✖ Tool '{name}' is NOT installed.[/red]")
+        similar = tools.suggest_tools(name)
+        if similar:
+            console.print(f"[yellow]Did you mean:[/yellow] {', '.join(similar)}")
+
+
+def _list_tools(gui: bool) -> Callable[[Intent], None]:
+    def handler(intent: Intent) -> None:
+        from modules import render, tools
+        if gui:
+            render.show(tools.list_installed_gui_apps(), title="GUI Applications Found:",
+                        style="blue", empty="No GUI apps found.")
+        else:
+            render.show(tools.list_installed_terminal_tools(), title="Terminal Tools Found:",
+                        style="green", empty="No terminal tools found.")
+    return handler
+
+
+def _ip(name: str) -> Callable[[Intent], None]:
+    def handler(intent: Intent) -> None:
+        from modules import ip_info
+        console.print(getattr(ip_info, name)())
+    return handler
+
+
+def _health(intent: Intent) -> None:
+    from modules import diagnostics
+    diagnostics.sys_health()
+
+
+def _top(sort_by: str) -> Callable[[Intent], None]:
+    def handler(intent: Intent) -> None:
+        from modules import process_scan
+        process_scan.top_processes(sort_by=sort_by)
+    return handler
+
+
+def _ps_list(intent: Intent) -> None:
+    from modules import process_scan
+    process_scan.scan_processes()
+
+
+HANDLERS: Dict[str, Callable[[Intent], None]] = {
+    "health": _health,
+    "top_memory": _top("memory"),
+    "top_cpu": _top("cpu"),
+    "ps_list": _ps_list,
+    "ip_all": _ip("show_ip_info"),
+    "public_ip": _ip("show_public_ip"),
+    "private_ip": _ip("show_private_ip"),
+    "gateway": _ip("show_gateway"),
+    "dns": _ip("show_dns"),
+    "ipv6": _ip("show_ipv6_info"),
+    "terminal_tools": _list_tools(gui=False),
+    "gui_tools": _list_tools(gui=True),
+    "check_tool": _check_tool,
+}
+
+
+def dispatch(intent: Intent) -> bool:
+    """Run the built-in handler for intent. Return False if there is none."""
+    handler = HANDLERS.get(intent.name)
+    if handler is None:
+        return False
+    handler(intent)
+    return True
@@ -1,10 +1,14 @@
 # modules/ip_info.py
 
 import socket
-import requests
 import subprocess
 import re
 
+from modules import http_client
+
+# Public IP answers carry no cache headers; a minute is short enough to notice a VPN switch.
+PUBLIC_IP_TTL = 60
+
 def get_private_ipv4() -> str:
     try:
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -18,7 +22,7 @@ def get_private_ipv4() -> str:
 
 def get_public_ipv4() -> str:
     try:
-        ip = requests.get("https://api.ipify.org", timeout=3).text.strip()
+        ip = http_client.get("https://api.ipify.org", timeout=3, ttl=PUBLIC_IP_TTL).text.strip()
         return ip
     except Exception:
         return "Unavailable"
@@ -33,7 +37,7 @@ def get_private_ipv6() -> str:
 
 def get_public_ipv6() -> str:
     try:
-        ip = requests.get("https://api64.ipify.org", timeout=3).text.strip()
+        ip = http_client.get("https://api64.ipify.org", timeout=3, ttl=PUBLIC_IP_TTL).text.strip()
         return ip if ":" in ip else "Not assigned"
     except Exception:
         return "Unavailable"
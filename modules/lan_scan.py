@@ -0,0 +1,350 @@
+"""lan_scan.py
+LAN neighbour discovery (`scan lan`).
+
+Starts from the kernel's neighbour table (/proc/net/arp and `ip neigh`),
+then sweeps the local IPv4 subnet with concurrent asyncio probes: TCP
+connects to a few common ports plus a UDP datagram to an unused port (a
+closed-port ICMP reply proves the host is up). Every probe also makes the
+kernel ARP for the address, so hosts that silently drop everything still
+show up in the neighbour table afterwards. Hosts are then named by reverse
+DNS in parallel and tagged with the vendor from their MAC prefix.
+
+Results are cached per subnet for `lan_cache_ttl` seconds.
+"""
+from __future__ import annotations
+import asyncio
+import ipaddress
+import json
+import os
+import re
+import socket
+import subprocess
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import config
+from modules import ip_info, port_scan
+
+CACHE_PATH = config.CACHE_DIR / "lan_scan.json"
+DEFAULT_TTL = 300
+PROBE_PORTS = (80, 443, 22, 445, 139, 53, 8080, 62078)     # 62078: iOS lockdownd
+UDP_PORT = 33434                                           # traceroute's: almost never open
+PROBE_TIMEOUT = 1.0
+CONCURRENCY = 512
+DNS_TIMEOUT = 2.0
+MAX_SWEEP_PREFIX = 22          # wider subnets are swept as the /24 around our address
+
+# Full IEEE registries, when installed (nmap on Kali, ieee-data on Debian/Ubuntu).
+OUI_FILES = ("/usr/share/nmap/nmap-mac-prefixes", "/usr/share/ieee-data/oui.txt",
+             "/usr/share/misc/oui.txt", "/var/lib/ieee-data/oui.txt")
+# Compact fallback: vendors common on home and lab networks.
+OUI = {
+    "000C29": "VMware", "005056": "VMware", "000569": "VMware", "080027": "VirtualBox",
+    "525400": "QEMU/KVM", "00155D": "Microsoft Hyper-V", "001C42": "Parallels", "00163E": "Xen",
+    "B827EB": "Raspberry Pi", "DCA632": "Raspberry Pi", "E45F01": "Raspberry Pi", "28CDC1": "Raspberry Pi",
+    "D83ADD": "Raspberry Pi", "000393": "Apple", "000A95": "Apple", "000D93": "Apple", "0017F2": "Apple",
+    "001B63": "Apple", "001CB3": "Apple", "001EC2": "Apple", "001FF3": "Apple", "0021E9": "Apple",
+    "0023DF": "Apple", "002500": "Apple", "0026BB": "Apple", "001A11": "Google", "3C5AB4": "Google",
+    "F4F5D8": "Google", "641666": "Nest Labs", "18B430": "Nest Labs",
+    "44650D": "Amazon", "F0272D": "Amazon", "24A43C": "Ubiquiti", "002722": "Ubiquiti",
+    "FCECDA": "Ubiquiti", "00000C": "Cisco", "00180A": "Cisco Meraki", "001D7E": "Cisco-Linksys",
+    "00146C": "Netgear", "00095B": "Netgear", "000FB5": "Netgear", "00184D": "Netgear",
+    "50C7BF": "TP-Link", "001E58": "D-Link", "00055D": "D-Link", "C83A35": "Tenda",
+    "74DA38": "Edimax", "240AC4": "Espressif", "30AEA4": "Espressif",
+    "84F3EB": "Espressif", "18FE34": "Espressif", "001132": "Synology", "00089B": "QNAP",
+    "245EBE": "QNAP", "000E58": "Sonos", "001788": "Philips Hue", "00E04C": "Realtek",
+    "001B21": "Intel", "0024D7": "Intel", "3C970E": "Intel", "00044B": "NVIDIA", "001422": "Dell",
+    "001F29": "HP", "00215A": "HP", "3CD92B": "HP", "008077": "Brother", "000048": "Epson",
+    "001DD8": "Microsoft", "281878": "Microsoft", "0050F2": "Microsoft",
+    "0012FB": "Samsung", "001632": "Samsung", "009ACD": "Huawei", "00E0FC": "Huawei",
+    "00090F": "Fortinet", "000DB9": "PC Engines", "000B82": "Grandstream", "0004F2": "Polycom",
+    "0090A9": "Western Digital", "001018": "Broadcom",
+}
+
+
+@dataclass
+class Neighbor:
+    ip: str
+    mac: str = ""
+    vendor: str = ""
+    hostname: str = ""
+    sources: List[str] = field(default_factory=list)    # arp, probe, self
+    notes: List[str] = field(default_factory=list)      # gateway, this host, random MAC
+
+    def seen(self, source: str) -> None:
+        if source not in self.sources:
+            self.sources.append(source)
+
+
+@dataclass
+class LanReport:
+    subnet: str
+    interface: str
+    scanned_at: float
+    hosts: List[Neighbor]
+    probed: int = 0
+    elapsed: float = 0.0
+    note: str = ""
+    from_cache: bool = False
+
+
+# -----------------------------------------------------------------------
+# Local network facts
+# -----------------------------------------------------------------------
+_NEIGH = re.compile(r"^(\S+) dev (\S+)(?: lladdr ([0-9a-f:]{17}))?.*?(\S+)\s*$")
+
+
+def neighbor_table() -> Dict[str, Tuple[str, str]]:
+    """ip -> (mac, interface) for resolved neighbours, from /proc/net/arp and `ip neigh`."""
+    table: Dict[str, Tuple[str, str]] = {}
+    try:
+        with open("/proc/net/arp") as f:
+            next(f, None)
+            for line in f:
+                parts = line.split()
+                # Flags 0x0 = incomplete (no reply to our ARP).
+                if len(parts) >= 6 and parts[2] != "0x0" and parts[3] != "00:00:00:00:00:00":
+                    table[parts[0]] = (parts[3].lower(), parts[5])
+    except OSError:
+        pass
+    try:
+        out = subprocess.run(["ip", "neigh", "show"], capture_output=True, text=True, timeout=3).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        out = ""
+    for line in out.splitlines():
+        m = _NEIGH.match(line.strip())
+        if m and m.group(3) and m.group(4) not in ("FAILED", "INCOMPLETE"):
+            table.setdefault(m.group(1), (m.group(3).lower(), m.group(2)))
+    return table
+
+
+def local_network() -> Tuple[Optional[ipaddress.IPv4Interface], str]:
+    """Our IPv4 address with its prefix, and the interface it is on."""
+    own = ip_info.get_private_ipv4()
+    try:
+        out = subprocess.run(["ip", "-o", "-4", "addr", "show"], capture_output=True, text=True, timeout=3).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        out = ""
+    for line in out.splitlines():
+        m = re.search(r"^\d+:\s+(\S+)\s+inet\s+([\d.]+/\d+)", line)
+        if m and m.group(2).split("/")[0] == own:
+            return ipaddress.IPv4Interface(m.group(2)), m.group(1)
+    try:
+        return ipaddress.IPv4Interface(f"{own}/24"), ""
+    except ValueError:
+        return None, ""
+
+
+def _own_mac(interface: str) -> str:
+    try:
+        with open(f"/sys/class/net/{interface}/address") as f:
+            return f.read().strip().lower()
+    except OSError:
+        return ""
+
+
+# -----------------------------------------------------------------------
+# Vendors
+# -----------------------------------------------------------------------
+def random_mac(mac: str) -> bool:
+    """Locally administered address: phones' per-network random MACs, VMs, containers."""
+    try:
+        return bool(int(mac[:2], 16) & 0x02)
+    except ValueError:
+        return False
+
+
+def vendors(macs: Iterable[str]) -> Dict[str, str]:
+    """OUI prefix -> vendor for the given MACs, from the system registry or the bundled table."""
+    wanted = {m.replace(":", "").upper()[:6] for m in macs if m}
+    found = {p: OUI[p] for p in wanted if p in OUI}
+    missing = wanted - set(found)
+    for path in OUI_FILES:
+        if not missing:
+            break
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    if "(hex)" in line:                     # IEEE: "00-00-0C   (hex)\t\tCisco Systems, Inc"
+                        prefix, _, name = line.partition("(hex)")
+                        prefix = prefix.strip().replace("-", "")
+                    elif len(line) > 7 and line[6] == " ":   # nmap: "00000C Cisco Systems"
+                        prefix, name = line[:6], line[7:]
+                    else:
+                        continue
+                    if prefix.upper() in missing:
+                        found[prefix.upper()] = name.strip()
+                        missing.discard(prefix.upper())
+                        if not missing:
+                            break
+        except OSError:
+            continue
+    return found
+
+
+# -----------------------------------------------------------------------
+# Probing
+# -----------------------------------------------------------------------
+async def _udp_alive(ip: str, timeout: float) -> bool:
+    loop = asyncio.get_running_loop()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    try:
+        sock.connect((ip, UDP_PORT))
+        await loop.sock_sendall(sock, b"\x00")
+        await asyncio.wait_for(loop.sock_recv(sock, 64), timeout)
+        return True                         # something answered
+    except ConnectionRefusedError:
+        return True                         # ICMP port unreachable: the host is up
+    except (asyncio.TimeoutError, OSError):
+        return False
+    finally:
+        sock.close()
+
+
+async def _host_alive(ip: str, gate: asyncio.Semaphore, timeout: float) -> bool:
+    rtt = port_scan.Rtt(timeout)
+    async with gate:
+        probes = [asyncio.ensure_future(port_scan.probe(ip, p, rtt, False, 0.0)) for p in PROBE_PORTS]
+        probes.append(asyncio.ensure_future(_udp_alive(ip, timeout)))
+        try:
+            for fut in asyncio.as_completed(probes):
+                r = await fut
+                if r is True or getattr(r, "state", "") in ("open", "closed"):
+                    return True
+            return False
+        finally:
+            for p in probes:
+                p.cancel()
+
+
+async def _sweep(hosts: List[str], timeout: float) -> Set[str]:
+    # Each host holds len(PROBE_PORTS) + 1 sockets while it is probed.
+    slots = max(1, port_scan.raise_fd_limit(CONCURRENCY) // (len(PROBE_PORTS) + 1))
+    gate = asyncio.Semaphore(slots)
+    alive = await asyncio.gather(*(_host_alive(ip, gate, timeout) for ip in hosts))
+    return {ip for ip, up in zip(hosts, alive) if up}
+
+
+async def _reverse_dns(ips: List[str]) -> Dict[str, str]:
+    loop = asyncio.get_running_loop()
+
+    async def one(ip: str) -> str:
+        try:
+            host, _ = await asyncio.wait_for(loop.getnameinfo((ip, 0), socket.NI_NAMEREQD), DNS_TIMEOUT)
+            return host
+        except (asyncio.TimeoutError, OSError):
+            return ""
+
+    names = await asyncio.gather(*(one(ip) for ip in ips))
+    return {ip: name for ip, name in zip(ips, names) if name}
+
+
+# -----------------------------------------------------------------------
+# Cache
+# -----------------------------------------------------------------------
+def _load_cache(subnet: str, ttl: float) -> Optional[LanReport]:
+    try:
+        with open(CACHE_PATH) as f:
+            data = json.load(f).get(subnet)
+    except (OSError, ValueError, AttributeError):
+        return None
+    if not data or time.time() - data["scanned_at"] > ttl:
+        return None
+    data["hosts"] = [Neighbor(**h) for h in data["hosts"]]
+    return LanReport(**{**data, "from_cache": True})
+
+
+def _save_cache(report: LanReport) -> None:
+    try:
+        with open(CACHE_PATH) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    cache[report.subnet] = asdict(report)
+    try:
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp = CACHE_PATH.with_suffix(".tmp")
+        tmp.write_text(json.dumps(cache))
+        os.replace(tmp, CACHE_PATH)
+    except OSError:
+        pass
+
+
+# -----------------------------------------------------------------------
+# Entry point
+# -----------------------------------------------------------------------
+def scan(fresh: bool = False) -> LanReport:
+    """Discover hosts on the local IPv4 subnet (cached for lan_cache_ttl seconds)."""
+    iface, dev = local_network()
+    if iface is None:
+        raise ValueError("no local IPv4 address (not connected?)")
+    network, note = iface.network, ""
+    if network.prefixlen < MAX_SWEEP_PREFIX:
+        network = ipaddress.IPv4Interface(f"{iface.ip}/24").network
+        note = f"{iface.network} is large; swept {network} only"
+    ttl = float(config.CONFIG.get("lan_cache_ttl", DEFAULT_TTL))
+    if not fresh:
+        cached = _load_cache(str(network), ttl)
+        if cached is not None:
+            return cached
+
+    start = time.perf_counter()
+    gateway = ip_info.get_gateway()
+    targets = [str(h) for h in network.hosts() if h != iface.ip]
+    timeout = float(config.CONFIG.get("scan_timeout", PROBE_TIMEOUT))
+
+    async def run() -> Tuple[Set[str], Dict[str, Tuple[str, str]], Dict[str, str]]:
+        alive = await _sweep(targets, timeout)
+        table = neighbor_table()            # now holds everything that answered ARP
+        known = {ip for ip in table if ipaddress.ip_address(ip) in network} | alive | {str(iface.ip)}
+        names = await _reverse_dns(sorted(known))
+        return alive, table, names
+
+    alive, table, names = asyncio.run(run())
+
+    hosts: Dict[str, Neighbor] = {}
+    for ip, (mac, _) in table.items():
+        if ipaddress.ip_address(ip) in network:
+            hosts.setdefault(ip, Neighbor(ip, mac)).seen("arp")
+    for ip in alive:
+        hosts.setdefault(ip, Neighbor(ip)).seen("probe")
+    me = hosts.setdefault(str(iface.ip), Neighbor(str(iface.ip), _own_mac(dev)))
+    me.seen("self")
+    me.notes.append("this host")
+
+    vendor_of = vendors(h.mac for h in hosts.values())
+    for h in hosts.values():
+        h.hostname = names.get(h.ip, "")
+        if h.mac:
+            h.vendor = vendor_of.get(h.mac.replace(":", "").upper()[:6], "")
+            if random_mac(h.mac):
+                h.notes.append("random MAC")
+        if h.ip == gateway:
+            h.notes.insert(0, "gateway")
+
+    report = LanReport(str(network), dev, time.time(), sorted(hosts.values(), key=lambda h: ipaddress.ip_address(h.ip)),
+                       probed=len(targets), elapsed=time.perf_counter() - start, note=note)
+    _save_cache(report)
+    return report
+
+
+def rows(report: LanReport) -> List[Tuple[str, str, str, str, str]]:
+    return [(h.ip, h.mac, h.vendor, h.hostname, ", ".join(h.notes)) for h in report.hosts]
+
+
+def summary(report: LanReport) -> str:
+    if report.from_cache:
+        age = time.time() - report.scanned_at
+        return f"{len(report.hosts)} hosts on {report.subnet} (cached {age:.0f}s ago; scan lan --fresh to rescan)"
+    text = f"{len(report.hosts)} hosts on {report.subnet} ({report.probed} addresses probed in {report.elapsed:.1f}s)"
+    return f"{text}. {report.note}" if report.note else text
+
+
+def as_context(report: LanReport) -> str:
+    """Discovered hosts as a compact context block for the LLM."""
+    lines = [f"LAN neighbours: {summary(report)}"]
+    for ip, mac, vendor, name, notes in rows(report):
+        lines.append(" ".join(x for x in (ip, mac, vendor and f"[{vendor}]", name, notes and f"({notes})") if x))
+    return "\n".join(lines)
@@ -0,0 +1,283 @@
+"""llm_tools.py
+Expose the built-in modules to the LLM as function-calling tools.
+
+When the model asks for several tools in one turn they run concurrently,
+each with its own timeout, and come back as compact JSON strings.
+"""
+from __future__ import annotations
+import json
+import pathlib
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Callable, Dict, List, Tuple
+
+from modules import instrument
+
+MAX_RESULT_CHARS = 4000
+MAX_TOOL_ROUNDS = 4
+MAX_WORKERS = 8
+
+
+@dataclass
+class Tool:
+    name: str
+    description: str
+    func: Callable[..., Any]
+    parameters: Dict[str, Any] = field(default_factory=dict)
+    required: List[str] = field(default_factory=list)
+    timeout: float = 8.0
+
+
+# -----------------------------------------------------------------------
+# Tool implementations (imports deferred so unused tools cost nothing)
+# -----------------------------------------------------------------------
+def _check_tool(name: str) -> Dict[str, Any]:
+    from modules import tools
+    path = tools.which(name)
+    result: Dict[str, Any] = {"name": name, "installed": path is not None, "path": path}
+    if path is None:
+        result["similar"] = tools.suggest_tools(name)
+    return result
+
+
+def _ip(func_name: str) -> Callable[[], Any]:
+    def call() -> Any:
+        from modules import ip_info
+        return getattr(ip_info, func_name)()
+    return call
+
+
+def _system_health() -> Dict[str, Any]:
+    from modules import diagnostics
+    return diagnostics.get_health(interval=0.5)
+
+
+def _top_processes(sort_by: str = "memory", limit: int = 10) -> List[Dict[str, Any]]:
+    from modules import process_scan
+    return process_scan.get_top_processes(sort_by, min(int(limit), 50))
+
+
+def _find_files(pattern: str, limit: int = 25) -> Dict[str, Any]:
+    from modules import file_search
+    # Give up walking when the tool call times out, instead of running on unseen.
+    deadline = time.monotonic() + TOOLS["find_files"].timeout
+    found = [str(p) for p in islice(file_search.iter_files(pattern, pathlib.Path.home(), deadline),
+                                    min(int(limit), 200))]
+    return {"pattern": pattern, "matches": found}
+
+
+TOOLS: Dict[str, Tool] = {t.name: t for t in [
+    Tool("check_tool", "Check whether a command-line tool is installed on this machine.", _check_tool,
+         {"name": {"type": "string", "description": "Executable name, e.g. nmap"}}, ["name"], timeout=3.0),
+    Tool("get_public_ipv4", "Public IPv4 address of this machine.", _ip("get_public_ipv4"), timeout=5.0),
+    Tool("get_public_ipv6", "Public IPv6 address of this machine.", _ip("get_public_ipv6"), timeout=5.0),
+    Tool("get_private_ipv4", "Private (LAN) IPv4 address of this machine.", _ip("get_private_ipv4"), timeout=3.0),
+    Tool("get_private_ipv6", "Global-scope IPv6 address assigned to this machine.", _ip("get_private_ipv6"), timeout=3.0),
+    Tool("get_gateway", "Default gateway IP address.", _ip("get_gateway"), timeout=3.0),
+    Tool("get_dns_servers", "DNS servers from /etc/resolv.conf.", _ip("get_dns_servers"), timeout=3.0),
+    Tool("system_health", "Current CPU, memory, disk and battery usage in percent.", _system_health, timeout=5.0),
+    Tool("top_processes", "Heaviest running processes by memory or CPU.", _top_processes,
+         {"sort_by": {"type": "string", "enum": ["memory", "cpu"]},
+          "limit": {"type": "integer", "description": "How many processes, default 10"}}, timeout=5.0),
+    Tool("find_files", "Find files under the user's home directory whose names start with pattern.", _find_files,
+         {"pattern": {"type": "string", "description": "Filename prefix"},
+          "limit": {"type": "integer", "description": "Max results, default 25"}}, ["pattern"], timeout=15.0),
+]}
+
+
+# -----------------------------------------------------------------------
+# Backend schemas
+# -----------------------------------------------------------------------
+def openai_tools() -> List[Dict[str, Any]]:
+    """Tool declarations for the OpenAI chat-completions `tools` parameter."""
+    return [
+        {
+            "type": "function",
+            "function": {
+                "name": t.name,
+                "description": t.description,
+                "parameters": {"type": "object", "properties": t.parameters, "required": t.required},
+            },
+        }
+        for t in TOOLS.values()
+    ]
+
+
+def _gemini_schema(genai: Any, schema: Dict[str, Any]) -> Any:
+    kwargs: Dict[str, Any] = {"type_": getattr(genai.protos.Type, schema["type"].upper())}
+    if "description" in schema:
+        kwargs["description"] = schema["description"]
+    if "enum" in schema:
+        kwargs["enum"] = schema["enum"]
+    if "properties" in schema:
+        kwargs["properties"] = {k: _gemini_schema(genai, v) for k, v in schema["properties"].items()}
+    if schema.get("required"):
+        kwargs["required"] = schema["required"]
+    return genai.protos.Schema(**kwargs)
+
+
+def gemini_tools(genai: Any) -> List[Any]:
+    """Tool declarations for `genai.GenerativeModel(tools=...)`."""
+    decls = []
+    for t in TOOLS.values():
+        kwargs: Dict[str, Any] = {"name": t.name, "description": t.description}
+        # Gemini rejects an OBJECT schema with no properties.
+        if t.parameters:
+            kwargs["parameters"] = _gemini_schema(
+                genai, {"type": "object", "properties": t.parameters, "required": t.required}
+            )
+        decls.append(genai.protos.FunctionDeclaration(**kwargs))
+    return [genai.protos.Tool(function_declarations=decls)]
+
+
+# -----------------------------------------------------------------------
+# Parallel execution
+# -----------------------------------------------------------------------
+def _compact(value: Any) -> str:
+    text = json.dumps(value, separators=(",", ":"), default=str)
+    if len(text) > MAX_RESULT_CHARS:
+        # Stay valid JSON: Gemini function responses are parsed back into a dict.
+        text = json.dumps({"truncated": text[:MAX_RESULT_CHARS]}, separators=(",", ":"))
+    return text
+
+
+def _timed(tool: Tool, kwargs: Dict[str, Any]) -> Any:
+    with instrument.span(f"tool {tool.name}", cat="tool"):
+        return tool.func(**kwargs)
+
+
+def run_calls(calls: List[Tuple[str, str, Any]]) -> List[Tuple[str, str, str]]:
+    """Run (call_id, name, args) tool calls concurrently.
+
+    args may be a dict or a JSON string. Returns (call_id, name, json_result)
+    in the same order; failures and timeouts become {"error": ...} results.
+    """
+    # A pool per batch: a tool that overruns its timeout keeps only its own
+    # thread busy, never the workers later calls need.
+    pool = ThreadPoolExecutor(max_workers=max(1, min(len(calls), MAX_WORKERS)), thread_name_prefix="ait-tool")
+    futures = []
+    for call_id, name, args in calls:
+        tool = TOOLS.get(name)
+        if tool is None:
+            futures.append((call_id, name, None, None))
+            continue
+        try:
+            kwargs = json.loads(args or "{}") if isinstance(args, str) else dict(args or {})
+        except ValueError:
+            kwargs = {}
+        futures.append((call_id, name, tool, pool.submit(_timed, tool, kwargs)))
+
+    # Every call started at roughly the same moment, so each deadline is
+    # measured from here rather than from when we get round to waiting on it.
+    start = time.monotonic()
+    results = []
+    try:
+        for call_id, name, tool, fut in futures:
+            if fut is None:
+                results.append((call_id, name, _compact({"error": f"unknown tool {name}"})))
+                continue
+            try:
+                value = fut.result(timeout=max(0.0, tool.timeout - (time.monotonic() - start)))
+                results.append((call_id, name, _compact({"result": value})))
+            except TimeoutError:
+                results.append((call_id, name, _compact({"error": f"timed out after {tool.timeout}s"})))
+            except Exception as e:
+                results.append((call_id, name, _compact({"error": str(e)})))
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+# -----------------------------------------------------------------------
+# Timed LLM requests
+# -----------------------------------------------------------------------
+def _openai_create(client: Any, model: str, messages: List[Dict[str, Any]], **kwargs: Any) -> Any:
+    with instrument.span(f"llm {model}", cat="llm", messages=len(messages)):
+        resp = client.chat.completions.create(model=model, messages=messages, **kwargs)
+    instrument.count("llm.requests")
+    instrument.count("llm.bytes_sent", sum(len(str(m.get("content") or "").encode()) for m in messages))
+    usage = getattr(resp, "usage", None)
+    if usage is not None:
+        instrument.count("llm.prompt_tokens", getattr(usage, "prompt_tokens", 0) or 0)
+        instrument.count("llm.completion_tokens", getattr(usage, "completion_tokens", 0) or 0)
+    return resp
+
+
+def _gemini_send(send: Callable[[Any], Any], content: Any, model: str) -> Any:
+    with instrument.span(f"llm {model}", cat="llm"):
+        response = send(content)
+    instrument.count("llm.requests")
+    if isinstance(content, str):
+        instrument.count("llm.bytes_sent", len(content.encode()))
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        instrument.count("llm.prompt_tokens", getattr(usage, "prompt_token_count", 0) or 0)
+        instrument.count("llm.completion_tokens", getattr(usage, "candidates_token_count", 0) or 0)
+    return response
+
+
+# -----------------------------------------------------------------------
+# Chat turns with tool use
+# -----------------------------------------------------------------------
+def openai_reply(client: Any, model: str, history: List[Dict[str, Any]], use_tools: bool = True) -> str:
+    """Complete history (ending in the user turn), running any requested tools.
+
+    Tool call/result messages stay in a scratch copy so history keeps plain
+    user/assistant pairs.
+    """
+    kwargs: Dict[str, Any] = {"tools": openai_tools()} if use_tools else {}
+    messages = list(history)
+    msg = _openai_create(client, model, messages, **kwargs).choices[0].message
+    for round_no in range(MAX_TOOL_ROUNDS):
+        if not msg.tool_calls:
+            break
+        messages.append({
+            "role": "assistant",
+            "content": msg.content,
+            "tool_calls": [
+                {"id": tc.id, "type": "function",
+                 "function": {"name": tc.function.name, "arguments": tc.function.arguments}}
+                for tc in msg.tool_calls
+            ],
+        })
+        calls = [(tc.id, tc.function.name, tc.function.arguments) for tc in msg.tool_calls]
+        for call_id, _, out in run_calls(calls):
+            messages.append({"role": "tool", "tool_call_id": call_id, "content": out})
+        if round_no == MAX_TOOL_ROUNDS - 1:
+            # Out of rounds: the last request must answer with what it has.
+            kwargs["tool_choice"] = "none"
+        msg = _openai_create(client, model, messages, **kwargs).choices[0].message
+    return (msg.content or "").strip()
+
+
+def _gemini_text(response: Any) -> str:
+    # response.text raises when a part is a function call; take the text parts.
+    return "".join(getattr(p, "text", "") or "" for p in response.parts).strip()
+
+
+def gemini_reply(genai: Any, chat_session: Any, user: str, model: str) -> str:
+    """Send user to a Gemini chat session, answering any function calls."""
+    response = _gemini_send(chat_session.send_message, user, model)
+    for round_no in range(MAX_TOOL_ROUNDS):
+        calls = [p.function_call for p in response.parts if p.function_call.name]
+        if not calls:
+            break
+        results = run_calls([(fc.name, fc.name, dict(fc.args)) for fc in calls])
+        kwargs: Dict[str, Any] = {}
+        if round_no == MAX_TOOL_ROUNDS - 1:
+            kwargs["tool_config"] = {"function_calling_config": {"mode": "NONE"}}
+        response = _gemini_send(lambda content: chat_session.send_message(content, **kwargs), [
+            genai.protos.Part(function_response=genai.protos.FunctionResponse(name=name, response=json.loads(out)))
+            for _, name, out in results
+        ], model)
+    return _gemini_text(response)
+
+
+def complete(backend: str, client: Any, model: str, prompt: str) -> str:
+    """One-shot completion without history or tools."""
+    if backend == "gemini":
+        return _gemini_text(_gemini_send(client.GenerativeModel(model).generate_content, prompt, model))
+    resp = _openai_create(client, model, [{"role": "user", "content": prompt}])
+    return (resp.choices[0].message.content or "").strip()
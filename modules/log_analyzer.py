@@ -0,0 +1,210 @@
+"""log_analyzer.py
+Map-reduce analysis of large files and logs through the LLM.
+
+The file is streamed through mmap (file_utils.iter_line_blocks), repeated
+lines are collapsed with cheap local normalisation, the survivors are cut
+into token-sized chunks, and chunk prompts run concurrently under a request
+rate limit. Partial answers are then reduced into one response. A total
+token cap keeps cost predictable on multi-GB inputs.
+"""
+from __future__ import annotations
+import os
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from rich.console import Console
+from rich.markup import escape
+from rich.progress import BarColumn, DownloadColumn, Progress, TextColumn, TimeRemainingColumn
+
+from modules import file_utils
+
+console = Console()
+
+CHARS_PER_TOKEN = 4
+DEFAULT_QUESTION = "Summarise what happened in this file and point out anything suspicious or erroneous."
+
+# Parts of a line that vary between otherwise identical events. IP addresses
+# and user names are deliberately kept: they are what the analysis is about.
+_TIMESTAMP = re.compile(
+    r"^(?:\w{3}\s+\d{1,2}\s+\d\d:\d\d:\d\d|\d{4}-\d\d-\d\d[T ]\d\d:\d\d:\d\d(?:[.,]\d+)?(?:Z|[+-]\d\d:?\d\d)?)\s*"
+)
+_VOLATILE = re.compile(r"\[\d+\]|\bport \d+|\b0x[0-9a-f]+\b|\b[0-9a-f]{16,}\b", re.IGNORECASE)
+_MAX_TEMPLATES = 500_000
+
+
+@dataclass
+class Settings:
+    chunk_tokens: int = 3000
+    max_tokens: int = 120_000
+    concurrency: int = 4
+    requests_per_minute: int = 30
+
+
+class _RateLimiter:
+    """Space request starts at least 60/rpm seconds apart across threads."""
+
+    def __init__(self, per_minute: int) -> None:
+        self.interval = 60.0 / max(per_minute, 1)
+        self.next_at = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_at - now
+            self.next_at = max(now, self.next_at) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _template(line: str) -> str:
+    return _VOLATILE.sub("#", _TIMESTAMP.sub("", line)).strip()
+
+
+def _chunks(path: str, settings: Settings, grep: Optional[re.Pattern],
+            repeats: Counter, on_bytes: Callable[[int], None]) -> Iterator[str]:
+    """Yield prompt-sized chunks of first-seen lines."""
+    limit = settings.chunk_tokens * CHARS_PER_TOKEN
+    buf: List[str] = []
+    size = 0
+    for offset, lines in file_utils.iter_line_blocks(path):
+        for line in lines:
+            if not line.strip() or (grep and not grep.search(line)):
+                continue
+            key = _template(line)
+            if key in repeats:
+                repeats[key] += 1
+                continue
+            if len(repeats) < _MAX_TEMPLATES:
+                repeats[key] = 1
+            buf.append(line[:1000])
+            size += len(buf[-1]) + 1
+            if size >= limit:
+                yield "\n".join(buf)
+                buf, size = [], 0
+        on_bytes(offset)
+    if buf:
+        yield "\n".join(buf)
+
+
+def analyze(path: str, question: str, complete: Callable[[str], str],
+            settings: Optional[Settings] = None, grep: Optional[str] = None) -> str:
+    """Answer question about the file at path. complete(prompt) -> reply.
+
+    Returns console markup: the answer, or why there is none.
+    """
+    settings = settings or Settings()
+    full_path = os.path.expanduser(path.strip())
+    if not os.path.isfile(full_path):
+        return f"[red]✖ File does not exist: {full_path}[/red]"
+    question = question.strip() or DEFAULT_QUESTION
+    try:
+        pattern = re.compile(grep) if grep else None
+    except re.error as e:
+        return (f"[red]✖ Invalid --grep pattern {escape(repr(grep))}: {e}[/red]\n"
+                "[yellow]Usage: analyze <file> [--grep REGEX] \\[question][/yellow]")
+    limiter = _RateLimiter(settings.requests_per_minute)
+    repeats: Counter = Counter()
+
+    def map_chunk(index: int, chunk: str) -> Tuple[int, str]:
+        limiter.wait()
+        prompt = (
+            f"You are analysing part {index + 1} of the file {os.path.basename(full_path)}. "
+            "Repeated lines were removed; only the first occurrence is shown.\n"
+            f"Question: {question}\n"
+            "Report only findings from this part that help answer the question, tersely, "
+            "quoting exact values (IPs, users, timestamps). Say 'nothing relevant' if none.\n\n"
+            f"---\n{chunk}\n---"
+        )
+        try:
+            return index, complete(prompt)
+        except Exception as e:
+            return index, f"(part {index + 1} failed: {e})"
+
+    partials: List[Tuple[int, str]] = []
+    budget = settings.max_tokens
+    truncated_at: Optional[int] = None
+    total = os.path.getsize(full_path)
+
+    with Progress(
+        TextColumn("[cyan]Analysing[/cyan]"), BarColumn(), DownloadColumn(), TimeRemainingColumn(),
+        console=console, transient=True,
+    ) as progress:
+        task = progress.add_task("analyse", total=total)
+        with ThreadPoolExecutor(max_workers=settings.concurrency) as pool:
+            inflight: List[Future] = []
+            last_offset = 0
+
+            def seen(offset: int) -> None:
+                nonlocal last_offset
+                last_offset = offset
+                progress.update(task, completed=offset)
+
+            for i, chunk in enumerate(_chunks(full_path, settings, pattern, repeats, seen)):
+                cost = len(chunk) // CHARS_PER_TOKEN
+                if cost > budget:
+                    truncated_at = last_offset
+                    break
+                budget -= cost
+                inflight.append(pool.submit(map_chunk, i, chunk))
+                # Bound memory: never hold more than a few pending chunks.
+                while sum(not f.done() for f in inflight) >= settings.concurrency * 2:
+                    time.sleep(0.05)
+            for fut in inflight:
+                partials.append(fut.result())
+
+    partials.sort()
+    notes = [text for _, text in partials if "nothing relevant" not in text.lower()]
+    top = "\n".join(f"{n}x  {t[:200]}" for t, n in repeats.most_common(15) if n > 1)
+    coverage = ""
+    if truncated_at is not None:
+        coverage = f"Only the first {truncated_at * 100 // max(total, 1)}% of the file fit the token cap.\n"
+
+    if not partials:
+        return "[yellow]Nothing to analyse after filtering.[/yellow]"
+    return _reduce(question, notes or ["nothing relevant"], top, coverage, complete, settings)
+
+
+def _reduce(question: str, notes: List[str], top: str, coverage: str,
+            complete: Callable[[str], str], settings: Settings) -> str:
+    limit = settings.chunk_tokens * CHARS_PER_TOKEN
+    # Merge in groups until everything fits into a single prompt.
+    while len(notes) > 1 and sum(len(n) for n in notes) > limit:
+        groups, group, size = [], [], 0
+        for n in notes:
+            if group and size + len(n) > limit:
+                groups.append(group)
+                group, size = [], 0
+            group.append(n)
+            size += len(n)
+        groups.append(group)
+        if len(groups) == len(notes):
+            break   # every note is already oversized on its own; merging won't shrink it
+        notes = [_merge(question, g, complete) for g in groups]
+
+    prompt = (
+        f"Question: {question}\n{coverage}"
+        "Below are findings from consecutive parts of one file, followed by the most repeated "
+        "line patterns with counts. Write one concise answer.\n\n"
+        + "\n\n".join(f"Part {i + 1}:\n{n}" for i, n in enumerate(notes))
+        + (f"\n\nMost repeated lines:\n{top}" if top else "")
+    )
+    try:
+        answer = complete(prompt)
+    except Exception as e:
+        # Keep the per-part findings rather than losing the whole run.
+        answer = f"(final summary failed: {e})\n\n" + "\n\n".join(notes)
+    return f"[blue]abhi AI:[/blue] {escape(coverage + answer)}"
+
+
+def _merge(question: str, group: List[str], complete: Callable[[str], str]) -> str:
+    try:
+        return complete(f"Merge these partial findings about one file into one list, dropping duplicates.\n"
+                        f"Question: {question}\n\n" + "\n\n".join(group))
+    except Exception:
+        return "\n\n".join(group)     # unmerged, but nothing lost
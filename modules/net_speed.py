@@ -1,9 +1,10 @@
-import requests
 import time
 import subprocess
 import re
 from colorama import init, Fore, Style
 
+from modules import http_client, instrument
+
 init(autoreset=True)
 
 def is_speed_test_query(user_input: str) -> bool:
@@ -83,7 +84,7 @@ def test_download_speed():
     print(Fore.YELLOW + "[*] Testing download speed...", end=" ")
     start_time = time.time()
     try:
-        response = requests.get(FILE_URL, stream=True, timeout=10)
+        response = http_client.stream(FILE_URL, timeout=10)
     except:
         print(Fore.RED + "Failed (network error)")
         return 0.0
@@ -109,11 +110,14 @@ def test_download_speed():
           Fore.YELLOW + " seconds")
     return speed_mbps
 
+def _ping(count, **kwargs):
+    with instrument.span(f"ping -c {count}", cat="subprocess"):
+        return subprocess.run(["ping", "-c", str(count), "8.8.8.8"], stdout=subprocess.PIPE, text=True, **kwargs)
+
 def test_latency():
     print(Fore.YELLOW + "[*] Testing latency (ping)...", end=" ")
     try:
-        result = subprocess.run(["ping", "-c", "1", "8.8.8.8"],
-                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        result = _ping(1, stderr=subprocess.PIPE)
         match = re.search(r'time=(\d+\.\d+)', result.stdout)
         if match:
             latency = float(match.group(1))
@@ -130,8 +134,7 @@ def test_jitter(samples=5):
     print(Fore.YELLOW + "[*] Testing jitter...", end=" ")
     times = []
     for _ in range(samples):
-        result = subprocess.run(["ping", "-c", "1", "8.8.8.8"],
-                                stdout=subprocess.PIPE, text=True)
+        result = _ping(1)
         match = re.search(r'time=(\d+\.\d+)', result.stdout)
         if match:
             times.append(float(match.group(1)))
@@ -146,8 +149,7 @@ def test_jitter(samples=5):
 def test_packet_loss():
     print(Fore.YELLOW + "[*] Testing packet loss...", end=" ")
     try:
-        result = subprocess.run(["ping", "-c", "5", "8.8.8.8"],
-                                stdout=subprocess.PIPE, text=True)
+        result = _ping(5)
         match = re.search(r'(\d+)% packet loss', result.stdout)
         if match:
             loss = float(match.group(1))
@@ -164,7 +166,7 @@ def test_packet_loss():
 def get_ip_info():
     print(Fore.YELLOW + "[*] Fetching IP & location info...")
     try:
-        res = requests.get("https://ipinfo.io/json", timeout=5)
+        res = http_client.get("https://ipinfo.io/json", timeout=5, ttl=600)
         data = res.json()
         return {
             "ip": data.get("ip", "N/A"),
@@ -0,0 +1,335 @@
+"""port_scan.py
+Native asyncio TCP connect scanner with optional banner grabbing (`scan ports`).
+
+Probes are non-blocking connects started as fast as a semaphore allows
+(thousands in flight), so memory stays flat however many ports are scanned.
+Each host's connect timeout adapts to its measured round-trip time the way
+TCP's retransmission timer does (RFC 6298): refused and accepted connects
+are both RTT samples, so a quiet LAN host stops costing a full second per
+filtered port after the first few answers. A timeout on a host that does
+answer is retried once with the full timeout before the port counts as
+filtered.
+"""
+from __future__ import annotations
+import asyncio
+import errno
+import ipaddress
+import resource
+import socket
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_CONCURRENCY = 1000
+DEFAULT_TIMEOUT = 1.0          # before a host has answered anything; also the ceiling
+MIN_TIMEOUT = 0.1
+DEFAULT_MAX_HOSTS = 1024
+BANNER_BYTES = 256
+
+# Most commonly open TCP ports (the classic top-100 list).
+TOP_PORTS = [
+    7, 9, 13, 21, 22, 23, 25, 26, 37, 53, 79, 80, 81, 88, 106, 110, 111, 113, 119, 135, 139, 143, 144,
+    179, 199, 389, 427, 443, 444, 445, 465, 513, 514, 515, 543, 544, 548, 554, 587, 631, 646, 873, 990,
+    993, 995, 1025, 1026, 1027, 1028, 1029, 1110, 1433, 1720, 1723, 1755, 1900, 2000, 2001, 2049, 2121,
+    2717, 3000, 3128, 3306, 3389, 3986, 4899, 5000, 5009, 5051, 5060, 5101, 5190, 5357, 5432, 5631,
+    5666, 5800, 5900, 6000, 6001, 6646, 7070, 8000, 8008, 8009, 8080, 8081, 8443, 8888, 9100, 9999,
+    10000, 32768, 49152, 49153, 49154, 49155, 49156, 49157,
+]
+# Services that wait for the client to speak first.
+_HTTP_PORTS = {80, 81, 591, 3000, 5000, 7070, 8000, 8008, 8080, 8081, 8888, 9000}
+_TLS_PORTS = {443, 465, 636, 853, 990, 993, 995, 8443}
+_UNREACHABLE = {errno.EHOSTUNREACH, errno.ENETUNREACH, errno.EHOSTDOWN}
+_OUT_OF_SOCKETS = {errno.EMFILE, errno.ENFILE, errno.ENOBUFS}
+
+
+@dataclass
+class PortResult:
+    host: str
+    port: int
+    state: str                  # open | closed | filtered | unreachable | error
+    rtt_ms: Optional[float] = None
+    service: str = ""
+    banner: str = ""
+    error: str = ""             # why an "error" probe could not be made
+
+
+@dataclass
+class ScanReport:
+    target: str
+    ports: str
+    hosts: List[str]
+    open: List[PortResult] = field(default_factory=list)
+    closed: int = 0
+    filtered: int = 0
+    unreachable: int = 0
+    errors: Dict[str, int] = field(default_factory=dict)       # error message -> probes not made
+    probes: int = 0
+    elapsed: float = 0.0
+    timeouts: Dict[str, float] = field(default_factory=dict)   # final adaptive timeout per host
+    interrupted: bool = False
+
+
+# -----------------------------------------------------------------------
+# Targets
+# -----------------------------------------------------------------------
+def parse_ports(spec: str) -> List[int]:
+    """'22,80,8000-8100', 'top' (default) or 'all'."""
+    spec = (spec or "top").strip().lower()
+    if spec == "top":
+        return list(TOP_PORTS)
+    if spec == "all":
+        return list(range(1, 65536))
+    ports: Dict[int, None] = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        lo, _, hi = part.partition("-")
+        start, end = int(lo), int(hi or lo)
+        if not (1 <= start <= end <= 65535):
+            raise ValueError(f"bad port range: {part}")
+        ports.update(dict.fromkeys(range(start, end + 1)))
+    if not ports:
+        raise ValueError("no ports given")
+    return list(ports)
+
+
+def parse_targets(target: str, max_hosts: int = DEFAULT_MAX_HOSTS) -> List[str]:
+    """Hosts for an IP, a CIDR block or a host name (resolved to its first address)."""
+    target = target.strip()
+    try:
+        net = ipaddress.ip_network(target, strict=False)
+    except ValueError:
+        try:
+            info = socket.getaddrinfo(target, None, type=socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise ValueError(f"cannot resolve {target}: {e.strerror}") from None
+        return [info[0][4][0]]
+    if net.num_addresses > max_hosts + 2:
+        raise ValueError(f"{target} has {net.num_addresses} addresses; the limit is {max_hosts} (scan_max_hosts)")
+    hosts = [str(h) for h in net.hosts()] if net.num_addresses > 2 else [str(h) for h in net]
+    return hosts or [str(net.network_address)]
+
+
+def _service(port: int) -> str:
+    try:
+        return socket.getservbyport(port, "tcp")
+    except OSError:
+        return ""
+
+
+def raise_fd_limit(want: int) -> int:
+    """Raise the soft open-file limit towards want; returns how many sockets we may hold."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = want + 64
+    if soft != resource.RLIM_INFINITY and soft < target:
+        new = target if hard == resource.RLIM_INFINITY else min(target, hard)
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (new, hard))
+            soft = new
+        except (ValueError, OSError):
+            pass
+    return want if soft == resource.RLIM_INFINITY else max(16, min(want, soft - 64))
+
+
+# -----------------------------------------------------------------------
+# Probing
+# -----------------------------------------------------------------------
+class Rtt:
+    """Smoothed RTT and variance per host (RFC 6298) -> connect timeout."""
+
+    def __init__(self, ceiling: float) -> None:
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self.ceiling = ceiling
+
+    def sample(self, rtt: float) -> None:
+        if self.srtt is None:
+            self.srtt, self.rttvar = rtt, rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+
+    @property
+    def timeout(self) -> float:
+        if self.srtt is None:
+            return self.ceiling
+        return min(self.ceiling, max(MIN_TIMEOUT, self.srtt + 4 * self.rttvar))
+
+
+def _clean_banner(data: bytes) -> str:
+    text = data.decode("utf-8", errors="replace")
+    line = next((ln.strip() for ln in text.splitlines() if ln.strip()), "")
+    return "".join(ch if ch.isprintable() else "." for ch in line)[:120]
+
+
+async def _grab_banner(loop: asyncio.AbstractEventLoop, sock: socket.socket, host: str, port: int,
+                       wait: float) -> str:
+    if port in _TLS_PORTS:
+        return "(TLS)"
+    try:
+        if port in _HTTP_PORTS:
+            await loop.sock_sendall(sock, f"HEAD / HTTP/1.0\r\nHost: {host}\r\n\r\n".encode())
+        data = await asyncio.wait_for(loop.sock_recv(sock, BANNER_BYTES), wait)
+        if not data and port not in _HTTP_PORTS:
+            return ""
+        return _clean_banner(data)
+    except (asyncio.TimeoutError, OSError):
+        return ""
+
+
+async def probe(host: str, port: int, rtt: Rtt, banners: bool, banner_wait: float,
+                 timeout: Optional[float] = None) -> PortResult:
+    """One TCP connect to host:port, timed against rtt (or the given timeout)."""
+    loop = asyncio.get_running_loop()
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock: Optional[socket.socket] = None
+    start = time.perf_counter()
+    try:
+        # Inside the try: running out of descriptors is a result, not a crash.
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        await asyncio.wait_for(loop.sock_connect(sock, (host, port)), timeout or rtt.timeout)
+        elapsed = time.perf_counter() - start
+        rtt.sample(elapsed)
+        result = PortResult(host, port, "open", elapsed * 1000, _service(port))
+        if banners:
+            result.banner = await _grab_banner(loop, sock, host, port, banner_wait)
+        else:
+            # Close with RST rather than FIN: no TIME_WAIT pile-up on big scans.
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        return result
+    except asyncio.TimeoutError:
+        return PortResult(host, port, "filtered")
+    except ConnectionRefusedError:
+        elapsed = time.perf_counter() - start
+        rtt.sample(elapsed)
+        return PortResult(host, port, "closed", elapsed * 1000)
+    except OSError as e:
+        if e.errno in _OUT_OF_SOCKETS:
+            return PortResult(host, port, "error", error=e.strerror or str(e))
+        return PortResult(host, port, "unreachable" if e.errno in _UNREACHABLE else "filtered")
+    finally:
+        if sock is not None:
+            sock.close()
+
+
+async def _scan(report: ScanReport, ports: List[int], concurrency: int, timeout: float, banners: bool,
+                on_result: Optional[Callable[[PortResult], None]]) -> None:
+    rtts = {h: Rtt(timeout) for h in report.hosts}
+    gate = asyncio.Semaphore(concurrency)
+    pending: set = set()
+    retry: List[PortResult] = []
+    failures: List[BaseException] = []
+
+    def record(result: PortResult) -> None:
+        report.probes += 1
+        if result.state == "open":
+            report.open.append(result)
+        elif result.state == "closed":
+            report.closed += 1
+        elif result.state == "unreachable":
+            report.unreachable += 1
+        elif result.state == "error":
+            report.errors[result.error] = report.errors.get(result.error, 0) + 1
+        else:
+            report.filtered += 1
+        if on_result:
+            on_result(result)
+
+    def done(task: "asyncio.Task[PortResult]", final: bool) -> None:
+        pending.discard(task)
+        gate.release()
+        if task.cancelled() or failures:
+            return
+        # The loop only logs what a done callback raises; keep failures (a
+        # bug in probe, or on_result raising) to stop the scan and re-raise.
+        try:
+            result = task.result()
+            # A timeout on a host that answers other ports may just have been a short
+            # adaptive timeout or a dropped SYN: try once more with the full timeout.
+            if result.state == "filtered" and not final and rtts[result.host].srtt is not None:
+                retry.append(result)
+            else:
+                record(result)
+        except BaseException as e:
+            failures.append(e)
+
+    async def launch(host: str, port: int, final: bool, probe_timeout: Optional[float] = None) -> None:
+        await gate.acquire()
+        rtt = rtts[host]
+        task = asyncio.ensure_future(probe(host, port, rtt, banners, max(0.5, 3 * (rtt.srtt or timeout)),
+                                            probe_timeout))
+        pending.add(task)
+        task.add_done_callback(lambda t: done(t, final))
+
+    def check() -> None:
+        if failures:
+            for task in pending:
+                task.cancel()
+            raise failures[0]
+
+    # Port-major order spreads load across hosts and gives every host RTT samples early.
+    for port in ports:
+        for host in report.hosts:
+            check()
+            await launch(host, port, final=False)
+    if pending:
+        await asyncio.wait(set(pending))
+    for r in retry:
+        check()
+        await launch(r.host, r.port, final=True, probe_timeout=timeout)
+    if pending:
+        await asyncio.wait(set(pending))
+    check()
+    report.timeouts = {h: round(r.timeout * 1000, 1) for h, r in rtts.items()}
+
+
+def scan(target: str, ports: str = "top", banners: bool = False,
+         on_result: Optional[Callable[[PortResult], None]] = None) -> ScanReport:
+    """Scan target (IP, CIDR or host name); on_result sees every probe as it finishes."""
+    import config
+    max_hosts = int(config.CONFIG.get("scan_max_hosts", DEFAULT_MAX_HOSTS))
+    timeout = float(config.CONFIG.get("scan_timeout", DEFAULT_TIMEOUT))
+    concurrency = raise_fd_limit(int(config.CONFIG.get("scan_concurrency", DEFAULT_CONCURRENCY)))
+
+    port_list = parse_ports(ports)
+    report = ScanReport(target, ports or "top", parse_targets(target, max_hosts))
+    start = time.perf_counter()
+    try:
+        asyncio.run(_scan(report, port_list, concurrency, timeout, banners, on_result))
+    except KeyboardInterrupt:
+        report.interrupted = True
+    report.elapsed = time.perf_counter() - start
+    report.open.sort(key=lambda r: (ipaddress.ip_address(r.host), r.port))
+    return report
+
+
+# -----------------------------------------------------------------------
+# Output
+# -----------------------------------------------------------------------
+def rows(report: ScanReport) -> Iterator[Tuple[str, str, str, str, str]]:
+    for r in report.open:
+        yield r.host, f"{r.port}/tcp", r.service, f"{r.rtt_ms:.1f}" if r.rtt_ms is not None else "", r.banner
+
+
+def summary(report: ScanReport) -> str:
+    hosts_up = len({r.host for r in report.open})
+    text = (f"Scanned {report.probes} ports on {len(report.hosts)} host(s) in {report.elapsed:.1f}s: "
+            f"{len(report.open)} open on {hosts_up} host(s), {report.closed} closed, {report.filtered} filtered")
+    if report.unreachable:
+        text += f", {report.unreachable} unreachable"
+    for error, n in report.errors.items():
+        text += f", {n} not probed ({error})"
+    return text + (" (interrupted)" if report.interrupted else "")
+
+
+def as_context(report: ScanReport, max_lines: int = 200) -> str:
+    """Scan results as a compact context block for the LLM."""
+    lines = [f"TCP port scan of {report.target} (ports: {report.ports}). {summary(report)}."]
+    for host, port, service, _, banner in list(rows(report))[:max_lines]:
+        lines.append(f"{host} {port} open {service}{f' banner: {banner}' if banner else ''}".rstrip())
+    if len(report.open) > max_lines:
+        lines.append(f"... {len(report.open) - max_lines} more open ports not listed")
+    return "\n".join(lines)
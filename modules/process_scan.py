@@ -6,26 +6,63 @@ from __future__ import annotations
 import psutil
 from rich.console import Console
 from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+from modules import render
 
 console = Console()
 
+
 @dataclass
 class ProcessInfo:
     pid: int
     name: str
     cmdline: str
 
-def scan_processes(interactive: bool = False) -> None:
-    """Print a table of running processes. If interactive, allow selecting PID for detail."""
-    procs = []
+
+def iter_processes() -> Iterator[ProcessInfo]:
+    """Lazily yield running processes."""
     for p in psutil.process_iter(['pid', 'name', 'cmdline']):
         try:
             info = p.info
-            procs.append(ProcessInfo(pid=info['pid'], name=info['name'] or '', cmdline=' '.join(info['cmdline'] or [])))
+            yield ProcessInfo(pid=info['pid'], name=info['name'] or '', cmdline=' '.join(info['cmdline'] or []))
         except (psutil.AccessDenied, psutil.ZombieProcess):
             continue
 
-    # Simple output
-    for pi in procs:
-        console.print(f"{pi.pid:>6} | {pi.name[:25]:25} | {pi.cmdline[:60]}")
-    console.print(f"[green]{len(procs)} processes listed.[/green]")
+
+def scan_processes(fmt: Optional[str] = None) -> None:
+    """Show running processes, paged in an interactive terminal."""
+    rows = ((pi.pid, pi.name, pi.cmdline) for pi in iter_processes())
+    count = render.show(rows, ["PID", "NAME", "COMMAND"], fmt=fmt, empty="No processes found.")
+    if fmt in (None, "rich"):
+        console.print(f"[green]{count} processes listed.[/green]")
+
+
+def get_top_processes(sort_by: str = "memory", limit: int = 10) -> List[Dict[str, Any]]:
+    """Return the heaviest processes by 'memory' or 'cpu', heaviest first."""
+    procs = list(psutil.process_iter(['pid', 'name', 'memory_percent']))
+    if sort_by == "cpu":
+        # cpu_percent needs two samples; prime every process, then read once.
+        for p in procs:
+            try:
+                p.cpu_percent(None)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                pass
+        psutil.cpu_percent(interval=0.5)
+
+    rows = []
+    for p in procs:
+        try:
+            value = p.cpu_percent(None) if sort_by == "cpu" else (p.info['memory_percent'] or 0.0)
+            rows.append({"pid": p.info['pid'], "name": p.info['name'] or '', sort_by: round(value, 1)})
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            continue
+    rows.sort(key=lambda r: r[sort_by], reverse=True)
+    return rows[:limit]
+
+
+def top_processes(sort_by: str = "memory", limit: int = 10, fmt: Optional[str] = None) -> None:
+    """Show the heaviest processes by 'memory' or 'cpu'."""
+    label = "CPU%" if sort_by == "cpu" else "MEM%"
+    rows = [(r['pid'], r['name'], f"{r[sort_by]:5.1f}") for r in get_top_processes(sort_by, limit)]
+    render.show(rows, ["PID", "NAME", label], fmt=fmt, title=f"Top {limit} processes by {sort_by}")
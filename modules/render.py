@@ -0,0 +1,181 @@
+"""render.py
+Shared result renderer for search results, process lists and tool lists.
+
+Rows are formatted in bulk and written once (a single Rich Table or Text,
+never one console.print per row). In an interactive terminal, results are
+paged lazily: the generator behind them is only advanced as far as the
+page being shown. `--plain` and `--json` give markup-free output for pipes.
+"""
+from __future__ import annotations
+import json
+import sys
+from itertools import chain, islice
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from rich.console import Console
+from rich.table import Table
+from rich.text import Text
+
+console = Console()
+
+Row = Union[str, Sequence[Any]]
+_FLAGS = {"--json": "json", "--plain": "plain", "| json": "json", "| plain": "plain"}
+
+
+def split_format(text: str) -> Tuple[str, Optional[str]]:
+    """Strip a trailing --json/--plain flag. Returns (text, fmt or None)."""
+    stripped = text.rstrip()
+    for flag, fmt in _FLAGS.items():
+        if stripped.endswith(flag):
+            return stripped[: -len(flag)].rstrip(), fmt
+    return text, None
+
+
+def _interactive() -> bool:
+    return sys.stdin.isatty() and console.is_terminal
+
+
+# -----------------------------------------------------------------------
+# Bulk formatting
+# -----------------------------------------------------------------------
+def _cells(row: Row) -> List[str]:
+    return [row] if isinstance(row, str) else ["" if c is None else str(c) for c in row]
+
+
+def _as_plain(rows: Iterable[Row]) -> str:
+    return "".join("\t".join(_cells(r)) + "\n" for r in rows)
+
+
+def _as_json(rows: Iterable[Row], columns: Optional[Sequence[str]]) -> str:
+    if columns:
+        items = [dict(zip(columns, r)) for r in rows]
+    else:
+        items = list(rows)
+    return json.dumps(items, indent=1, default=str) + "\n"
+
+
+def _as_rich(rows: List[Row], columns: Optional[Sequence[str]], style: Optional[str]) -> Any:
+    if not columns:
+        # Text, not markup: file names can contain '[' and must not be parsed.
+        return Text("\n".join(r if isinstance(r, str) else " ".join(_cells(r)) for r in rows), style=style or "")
+    table = Table(show_edge=False, pad_edge=False, header_style="bold cyan")
+    for col in columns:
+        table.add_column(col, no_wrap=True, overflow="ellipsis")
+    for r in rows:
+        table.add_row(*_cells(r), style=style)
+    return table
+
+
+# -----------------------------------------------------------------------
+# Keyboard input for the pager
+# -----------------------------------------------------------------------
+_KEYS = {
+    " ": "next", "n": "next", "j": "next", "\r": "next", "\x1b[6~": "next", "\x1b[B": "next",
+    "b": "prev", "p": "prev", "k": "prev", "\x1b[5~": "prev", "\x1b[A": "prev",
+    "g": "first", "\x1b[H": "first", "G": "last", "\x1b[F": "last",
+    "q": "quit", "\x1b": "quit", "\x03": "quit",
+}
+
+
+def read_key() -> str:
+    """Read one keypress (including arrow/PgUp/PgDn escape sequences) in raw mode."""
+    import os
+    import select
+    import termios
+    import tty
+
+    fd = sys.stdin.fileno()
+    old = termios.tcgetattr(fd)
+    try:
+        tty.setraw(fd)
+        key = os.read(fd, 1).decode(errors="ignore")
+        if key == "\x1b":
+            # Escape sequences arrive together; a lone Esc does not.
+            while select.select([fd], [], [], 0.03)[0]:
+                key += os.read(fd, 1).decode(errors="ignore")
+                if key[-1].isalpha() or key[-1] == "~":
+                    break
+        return key
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, old)
+
+
+def _page(rows: Iterator[Row], columns: Optional[Sequence[str]], title: Optional[str],
+          style: Optional[str]) -> int:
+    size = max(console.size.height - 4, 5)
+    seen: List[Row] = []
+    exhausted = False
+    start = 0
+
+    def fill(upto: int) -> None:
+        nonlocal exhausted
+        if not exhausted and len(seen) < upto:
+            more = list(islice(rows, upto - len(seen)))
+            seen.extend(more)
+            exhausted = len(seen) < upto
+
+    while True:
+        fill(start + size + 1)          # one extra row tells us whether there is a next page
+        if not seen:
+            return 0
+        console.clear()
+        if title:
+            console.print(Text(title, style="bold cyan"))
+        console.print(_as_rich(seen[start:start + size], columns, style))
+        more = not exhausted or len(seen) > start + size
+        total = f"{len(seen)}" if exhausted else f"{len(seen) - 1}+"
+        console.print(
+            Text(f"-- rows {start + 1}-{min(start + size, len(seen))} of {total} "
+                 f"{'[space] next ' if more else ''}[b] back [g/G] first/last [q] quit --", style="grey70"),
+            end="",
+        )
+        action = _KEYS.get(read_key())
+        console.print()
+        if action == "next" and more:
+            start += size
+        elif action == "prev":
+            start = max(0, start - size)
+        elif action == "first":
+            start = 0
+        elif action == "last":
+            fill(sys.maxsize)
+            start = max(0, (len(seen) - 1) // size * size)
+        elif action == "quit" or (action == "next" and not more):
+            return len(seen)
+
+
+# -----------------------------------------------------------------------
+# Entry point
+# -----------------------------------------------------------------------
+def show(rows: Iterable[Row], columns: Optional[Sequence[str]] = None, *, fmt: Optional[str] = None,
+         title: Optional[str] = None, empty: str = "No results.", style: Optional[str] = None) -> int:
+    """Render rows (strings, or sequences matching columns). Returns rows shown.
+
+    fmt is 'rich', 'plain' or 'json'; None means rich on a terminal and plain
+    otherwise. Interactive rich output pages through rows lazily.
+    """
+    fmt = fmt or ("rich" if console.is_terminal else "plain")
+    it = iter(rows)
+    if fmt == "rich" and _interactive():
+        # Only take over the screen when there is more than one page.
+        size = max(console.size.height - 4, 5)
+        head = list(islice(it, size + 1))
+        if len(head) > size:
+            return _page(chain(head, it), columns, title, style)
+        it = iter(head)
+
+    data = list(it)
+    if fmt == "json":
+        sys.stdout.write(_as_json(data, columns))
+        return len(data)
+    if fmt == "plain":
+        sys.stdout.write(_as_plain(data))
+        return len(data)
+
+    if not data:
+        console.print(Text(empty, style="red"))
+        return 0
+    if title:
+        console.print(Text(title, style="bold cyan"))
+    console.print(_as_rich(data, columns, style))
+    return len(data)
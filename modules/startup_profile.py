@@ -0,0 +1,119 @@
+"""startup_profile.py
+Import-time and init-time breakdown for `ait --profile-startup`.
+
+Like `python -X importtime`, but aggregated per top-level package (and per
+built-in module under `modules`), plus named init phases. Must be installed
+before anything heavy is imported.
+"""
+from __future__ import annotations
+import builtins
+import os
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+TARGET_MS = 150.0
+
+_T0 = time.perf_counter()
+_orig_import = builtins.__import__
+_stack: List[List[float]] = []          # [child_seconds, child_module_count] per active import
+_self_time: Dict[str, float] = defaultdict(float)
+_self_count: Dict[str, int] = defaultdict(int)
+_phases: List[Tuple[str, float]] = []
+
+
+def _group(name: str, fromlist: Any, globals_: Any, level: int) -> str:
+    if level:
+        name = (globals_ or {}).get("__package__", "") or name
+    parts = name.split(".")
+    if parts[0] == "modules":
+        if len(parts) > 1:
+            return ".".join(parts[:2])
+        if fromlist and len(fromlist) == 1:
+            return f"modules.{fromlist[0]}"
+    return parts[0]
+
+
+def _timed_import(name: str, globals: Any = None, locals: Any = None, fromlist: Any = (), level: int = 0) -> Any:
+    if level == 0 and not fromlist and name in sys.modules:
+        return _orig_import(name, globals, locals, fromlist, level)
+    before = len(sys.modules)
+    start = time.perf_counter()
+    _stack.append([0.0, 0])
+    try:
+        return _orig_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        loaded = len(sys.modules) - before
+        child_time, child_count = _stack.pop()
+        if _stack:
+            _stack[-1][0] += elapsed
+            _stack[-1][1] += loaded
+        if loaded:
+            key = _group(name, fromlist, globals, level)
+            _self_time[key] += elapsed - child_time
+            _self_count[key] += loaded - child_count
+
+
+def install() -> None:
+    """Start timing imports."""
+    builtins.__import__ = _timed_import
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time an init phase, e.g. config load or client construction."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, time.perf_counter() - start))
+
+
+def _interpreter_ms() -> float | None:
+    """Milliseconds from process start to this module's import (Linux only)."""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    since_start = uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    return max(0.0, (since_start - (time.perf_counter() - _T0)) * 1000)
+
+
+def report() -> None:
+    """Print the breakdown and stop timing imports."""
+    builtins.__import__ = _orig_import
+    total = (time.perf_counter() - _T0) * 1000
+
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+    imports = Table(title="Imports (self time)", show_edge=False)
+    imports.add_column("package")
+    imports.add_column("modules", justify="right")
+    imports.add_column("ms", justify="right")
+    for key, secs in sorted(_self_time.items(), key=lambda kv: kv[1], reverse=True)[:25]:
+        imports.add_row(key, str(_self_count[key]), f"{secs * 1000:.1f}")
+    console.print(imports)
+
+    phases = Table(title="Init phases", show_edge=False)
+    phases.add_column("phase")
+    phases.add_column("ms", justify="right")
+    for name, secs in _phases:
+        phases.add_row(name, f"{secs * 1000:.1f}")
+    console.print(phases)
+
+    interp = _interpreter_ms()
+    import_ms = sum(_self_time.values()) * 1000
+    line = f"imports {import_ms:.1f} ms | ait.py → ready {total:.1f} ms"
+    cold = total + (interp or 0.0)
+    if interp is not None:
+        line += f" | interpreter {interp:.1f} ms | cold start {cold:.1f} ms"
+    color = "green" if cold <= TARGET_MS else "yellow"
+    console.print(f"[{color}]{line} (target {TARGET_MS:.0f} ms)[/{color}]")
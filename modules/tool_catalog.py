@@ -0,0 +1,196 @@
+"""tool_catalog.py
+Cached catalog of every executable on PATH.
+
+Built with os.scandir and stored in CACHE_DIR/path_catalog.json. Each PATH
+directory is rescanned only when its mtime changes, so lookups after the
+first run cost a handful of stat() calls plus a dict lookup. Also provides
+dpkg package ownership (indexed once per change of /var/lib/dpkg/info) and
+"did you mean" suggestions.
+"""
+from __future__ import annotations
+import json
+import os
+import stat
+import time
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Set, Tuple
+
+import config
+
+CATALOG_PATH = config.CACHE_DIR / "path_catalog.json"
+DPKG_INFO = "/var/lib/dpkg/info"
+DPKG_INDEX_PATH = config.CACHE_DIR / "dpkg_index.json"
+REVALIDATE_SECS = 2.0
+
+
+def _scan_dir(path: str) -> List[str]:
+    names = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    st = entry.stat()   # follows symlinks, like `which`
+                except OSError:
+                    continue
+                if stat.S_ISREG(st.st_mode) and st.st_mode & 0o111:
+                    names.append(entry.name)
+    except OSError:
+        pass
+    return names
+
+
+class Catalog:
+    """name -> full path for the first PATH directory that has it."""
+
+    def __init__(self) -> None:
+        self.dirs: Dict[str, Dict] = {}
+        self.by_name: Dict[str, str] = {}
+        self.path_env = ""
+        self.checked_at = 0.0
+        self._trigrams: Optional[Dict[str, Set[str]]] = None
+        try:
+            self.dirs = json.loads(CATALOG_PATH.read_text()).get("dirs", {})
+        except (OSError, ValueError):
+            pass
+
+    def refresh(self, force: bool = False) -> None:
+        """Rescan PATH directories whose mtime changed since they were cached."""
+        now = time.monotonic()
+        path_env = os.environ.get("PATH", "")
+        if not force and path_env == self.path_env and now - self.checked_at < REVALIDATE_SECS:
+            return
+        self.checked_at = now
+
+        changed = path_env != self.path_env
+        self.path_env = path_env
+        for d in dict.fromkeys(p for p in path_env.split(os.pathsep) if p):
+            try:
+                mtime = os.stat(d).st_mtime
+            except OSError:
+                mtime = None
+            cached = self.dirs.get(d)
+            if force or cached is None or cached["mtime"] != mtime:
+                self.dirs[d] = {"mtime": mtime, "exes": _scan_dir(d) if mtime is not None else []}
+                changed = True
+
+        if changed or not self.by_name:
+            by_name: Dict[str, str] = {}
+            # Reverse PATH order so earlier directories win, as in the shell.
+            for d in reversed([p for p in path_env.split(os.pathsep) if p]):
+                for name in self.dirs.get(d, {}).get("exes", []):
+                    by_name[name] = os.path.join(d, name)
+            self.by_name = by_name
+            self._trigrams = None
+            self._save()
+
+    def _save(self) -> None:
+        try:
+            CATALOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+            tmp = CATALOG_PATH.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"dirs": self.dirs}))
+            tmp.replace(CATALOG_PATH)
+        except OSError:
+            pass
+
+    def which(self, name: str) -> Optional[str]:
+        self.refresh()
+        return self.by_name.get(name)
+
+    def names(self) -> List[str]:
+        self.refresh()
+        return sorted(self.by_name)
+
+    # -------------------------------------------------------------------
+    # Fuzzy suggestions
+    # -------------------------------------------------------------------
+    def suggest(self, name: str, limit: int = 5, min_score: float = 0.6) -> List[str]:
+        """Installed names closest to name.
+
+        The trigram index narrows 1000+ names to those sharing a trigram with
+        the query; only those are scored with difflib, which (unlike trigram
+        overlap) also rates short transpositions such as gerp -> grep highly.
+        """
+        self.refresh()
+        if self._trigrams is None:
+            index: Dict[str, Set[str]] = defaultdict(set)
+            for n in self.by_name:
+                for g in _trigrams(n):
+                    index[g].add(n)
+            self._trigrams = index
+        candidates: Set[str] = set()
+        for g in _trigrams(name):
+            candidates.update(self._trigrams.get(g, ()))
+        matcher = SequenceMatcher(b=name.lower())
+        scored = []
+        for n in candidates:
+            matcher.set_seq1(n.lower())
+            if matcher.real_quick_ratio() >= min_score and matcher.quick_ratio() >= min_score:
+                score = matcher.ratio()
+                if score >= min_score:
+                    scored.append((score, n))
+        scored.sort(key=lambda s: (-s[0], len(s[1]), s[1]))
+        return [n for _, n in scored[:limit]]
+
+
+def _trigrams(name: str) -> Set[str]:
+    padded = f"  {name.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# -----------------------------------------------------------------------
+# dpkg ownership
+# -----------------------------------------------------------------------
+def _dpkg_index() -> Dict[str, str]:
+    """Executable basename -> owning package, from dpkg *.list files."""
+    try:
+        mtime = os.stat(DPKG_INFO).st_mtime
+    except OSError:
+        return {}
+    try:
+        cached = json.loads(DPKG_INDEX_PATH.read_text())
+        if cached.get("mtime") == mtime:
+            return cached["owners"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    owners: Dict[str, str] = {}
+    with os.scandir(DPKG_INFO) as it:
+        for entry in it:
+            if not entry.name.endswith(".list"):
+                continue
+            package = entry.name[:-5].split(":", 1)[0]   # strip multiarch suffix
+            try:
+                with open(entry.path, encoding="utf-8", errors="replace") as f:
+                    for line in f:
+                        d, _, base = line.rstrip("\n").rpartition("/")
+                        if base and d.endswith(("/bin", "/sbin")):
+                            owners.setdefault(base, package)
+            except OSError:
+                continue
+    try:
+        DPKG_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+        DPKG_INDEX_PATH.write_text(json.dumps({"mtime": mtime, "owners": owners}))
+    except OSError:
+        pass
+    return owners
+
+
+_CATALOG: Optional[Catalog] = None
+
+
+def catalog() -> Catalog:
+    """The process-wide catalog (loaded from disk on first use)."""
+    global _CATALOG
+    if _CATALOG is None:
+        _CATALOG = Catalog()
+    return _CATALOG
+
+
+def by_package() -> List[Tuple[str, List[str]]]:
+    """[(package, [tools])] for every executable on PATH, sorted by package."""
+    owners = _dpkg_index()
+    groups: Dict[str, List[str]] = defaultdict(list)
+    for name in catalog().names():
+        groups[owners.get(name, "(not from a package)")].append(name)
+    return sorted(groups.items())
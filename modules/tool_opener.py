@@ -1,32 +1,45 @@
 # modules/tool_opener.py
 
 import subprocess
-import shutil
-from modules import tools
-
-GUI_NAMES = {
-    "Wireshark": "wireshark",
-    "GParted": "gparted",
-    "Burp Suite": "burpsuite",
-    "Firefox": "firefox",
-    "Chromium": "chromium",
-    "Nmap (Zenmap)": "zenmap",
-}
+from modules import desktop_catalog, tools
+
+def _terminal() -> str | None:
+    return (
+        tools.which("x-terminal-emulator")
+        or tools.which("gnome-terminal")
+        or tools.which("konsole")
+    )
+
+def open_app(name: str) -> bool:
+    """Launch a GUI app by its display name (e.g. "Burp Suite") via its desktop entry."""
+    entry = desktop_catalog.catalog().find(name)
+    if entry is None or not entry.argv():
+        return False
+    try:
+        if entry.terminal:
+            terminal = _terminal()
+            subprocess.Popen([terminal, "-e", *entry.argv()] if terminal else entry.argv())
+        else:
+            subprocess.Popen(entry.argv(), start_new_session=True,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return True
+    except Exception as e:
+        print(f"Error launching {entry.name}: {e}")
+        return False
 
 def open_tool(command: str) -> bool:
-    """Try to open a terminal or GUI tool by full command."""
+    """Try to open a terminal or GUI tool by full command or app display name."""
     command = command.strip()
+    if not command:
+        return False
 
-    # Split command for tool check (e.g., "wpscan --url ..." → "wpscan")
+    # Split command for tool check (e.g., "wpscan --url ..." → "wpscan").
+    # A tool on PATH wins over a desktop entry that merely mentions the same name.
     toolname = command.split()[0]
 
     if tools.check_tool(toolname):
         try:
-            terminal = (
-                shutil.which("x-terminal-emulator")
-                or shutil.which("gnome-terminal")
-                or shutil.which("konsole")
-            )
+            terminal = _terminal()
 
             if terminal:
                 # Run command and keep shell open
@@ -38,12 +51,5 @@ def open_tool(command: str) -> bool:
             print(f"Error launching terminal tool: {e}")
             return False
 
-    # Fallback for GUI tools (only support basic names, not args)
-    if shutil.which(toolname):
-        try:
-            subprocess.Popen(command.split())
-            return True
-        except Exception:
-            return False
-
-    return False
+    # Display names can contain spaces ("Burp Suite"), so look up the whole string.
+    return open_app(command)
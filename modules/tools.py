@@ -1,8 +1,9 @@
 # modules/tools.py
 
 import os
-import glob
-import shutil
+
+# The catalogs (and config with them) are imported by the functions that use
+# them, so importing this module at startup stays cheap.
 
 COMMON_TERMINAL_TOOLS = [
     "nmap", "curl", "wget", "git", "python3", "pip", "docker", "netstat",
@@ -12,29 +13,44 @@ COMMON_TERMINAL_TOOLS = [
 
 def list_installed_terminal_tools() -> list[str]:
     """Return a sorted list of common terminal tools available in the PATH."""
-    return sorted([tool for tool in COMMON_TERMINAL_TOOLS if shutil.which(tool)])
-
-def list_installed_gui_apps() -> list[str]:
-    """Return a sorted list of GUI application names by parsing .desktop files."""
-    desktop_dirs = [
-        "/usr/share/applications/",
-        os.path.expanduser("~/.local/share/applications/")
-    ]
-    apps = set()
-    for directory in desktop_dirs:
-        if os.path.isdir(directory):
-            for file in glob.glob(os.path.join(directory, "*.desktop")):
-                try:
-                    with open(file, encoding="utf-8") as f:
-                        for line in f:
-                            if line.startswith("Name="):
-                                app_name = line.strip().split("=", 1)[1]
-                                apps.add(app_name)
-                                break
-                except Exception:
-                    pass
-    return sorted(apps)
+    from modules import tool_catalog
+    catalog = tool_catalog.catalog()
+    return sorted([tool for tool in COMMON_TERMINAL_TOOLS if catalog.which(tool)])
+
+def list_all_terminal_tools() -> list[str]:
+    """Return every executable name on PATH (from the cached catalog)."""
+    from modules import tool_catalog
+    return tool_catalog.catalog().names()
+
+def tools_by_package() -> list[tuple[str, list[str]]]:
+    """Return [(package, [tools])] for every executable on PATH, using dpkg metadata."""
+    from modules import tool_catalog
+    return tool_catalog.by_package()
+
+def list_installed_gui_apps(category: str | None = None) -> list[str]:
+    """Return a sorted list of GUI application names from the desktop-entry catalog."""
+    from modules import desktop_catalog
+    return list(dict.fromkeys(app.display_name() for app in desktop_catalog.catalog().apps(category)))
+
+def list_gui_categories() -> list[str]:
+    """Return the desktop categories used by installed GUI apps."""
+    from modules import desktop_catalog
+    return desktop_catalog.catalog().categories()
+
+def which(name: str) -> str | None:
+    """Full path of a terminal tool, or None if it is not installed."""
+    from modules import tool_catalog
+    name = name.strip()
+    if os.sep in name:
+        return name if os.path.isfile(name) and os.access(name, os.X_OK) else None
+    return tool_catalog.catalog().which(name)
 
 def check_tool(name: str) -> bool:
     """Check if a given terminal tool is installed."""
-    return shutil.which(name.strip()) is not None
+    return which(name) is not None
+
+def suggest_tools(name: str, limit: int = 5) -> list[str]:
+    """Installed tools whose names are close to a mistyped name."""
+    from modules import tool_catalog
+    return tool_catalog.catalog().suggest(name.strip(), limit=limit)
+
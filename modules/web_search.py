@@ -3,9 +3,28 @@
 web_search.py
 Opens search queries or URLs in the default web browser.
 Supports Google or DuckDuckGo based on query.
+
+Searches can also run inside the terminal: the DuckDuckGo HTML results page
+and the top result pages are fetched concurrently through http_client,
+their readable text is extracted, and the passages that best match the query
+are shown (and can be handed to the LLM as context).
 """
+from __future__ import annotations
 
+import os
+import re
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote_plus, urljoin, urlparse
+
+DEFAULT_BASE_URL = "https://html.duckduckgo.com/html/"
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+MAX_PAGE_BYTES = 1_500_000
+PASSAGE_CHARS = 320
+SEARCH_TTL = 600
 
 def open_site_or_search(query: str) -> str:
     """Open a site (if it's a URL) or perform a web search."""
@@ -18,7 +37,7 @@ def open_site_or_search(query: str) -> str:
     # Case: starts with 'google something' → Google Search
     elif query.lower().startswith("google "):
         search_term = query[7:].strip()
-        target = f"https://www.google.com/search?q={search_term}"
+        target = f"https://www.google.com/search?q={quote_plus(search_term)}"
 
     # Case: site or url
     elif query.lower().startswith(("site ", "url ")):
@@ -29,7 +48,252 @@ def open_site_or_search(query: str) -> str:
 
     else:
         # Default: DuckDuckGo search
-        target = f"https://duckduckgo.com/?q={query}"
+        target = f"https://duckduckgo.com/?q={quote_plus(query)}"
 
     webbrowser.open(target)
     return f"✔ Opened in browser: {target}"
+
+def wants_terminal(query: str) -> bool:
+    """Whether a plain `search <query>` should show results here instead of a browser."""
+    import config
+    if query.lower() == "google" or query.lower().startswith(("google ", "site ", "url ")):
+        return False
+    mode = str(config.CONFIG.get("search_mode", "auto")).lower()
+    if mode in ("terminal", "browser"):
+        return mode == "terminal"
+    # auto: a browser is only useful with a display (not over SSH / on a console)
+    return not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+# ---------------------------------------------
+# Fetching
+# ---------------------------------------------
+def _get_html(url: str, timeout: float, params: Optional[Dict[str, str]] = None,
+              ttl: Optional[float] = None) -> str:
+    """GET an HTML page, reading at most MAX_PAGE_BYTES. Empty string for non-HTML."""
+    from modules import http_client
+    r = http_client.get(url, params=params, timeout=timeout, ttl=ttl, max_bytes=MAX_PAGE_BYTES,
+                        headers={"User-Agent": USER_AGENT})
+    r.raise_for_status()
+    if "html" not in r.headers.get("content-type", "text/html"):
+        return ""
+    return r.text
+
+# ---------------------------------------------
+# HTML parsing
+# ---------------------------------------------
+class _ResultsParser(HTMLParser):
+    """Pulls (title, href, snippet) out of DuckDuckGo's HTML results page."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.results: List[Dict[str, str]] = []
+        self._field: Optional[str] = None
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag != "a":
+            return
+        a = dict(attrs)
+        classes = (a.get("class") or "").split()
+        if "result__a" in classes:
+            self.results.append({"title": "", "href": a.get("href") or "", "snippet": ""})
+            self._field = "title"
+        elif "result__snippet" in classes and self.results:
+            self._field = "snippet"
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "a":
+            self._field = None
+
+    def handle_data(self, data: str) -> None:
+        if self._field:
+            self.results[-1][self._field] += data
+
+class _TextParser(HTMLParser):
+    """Readable text of a page as blocks, skipping scripts, styles and page chrome."""
+
+    SKIP = {"script", "style", "noscript", "svg", "nav", "header", "footer", "aside", "form", "button", "iframe"}
+    BLOCK = {"p", "div", "li", "pre", "td", "th", "h1", "h2", "h3", "h4", "h5", "h6",
+             "section", "article", "blockquote", "dd", "dt", "br", "tr"}
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.blocks: List[str] = []
+        self.title = ""
+        self._buf: List[str] = []
+        self._skip = 0
+        self._in_title = False
+
+    def _flush(self) -> None:
+        text = " ".join("".join(self._buf).split())
+        if text:
+            self.blocks.append(text)
+        self._buf = []
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag in self.SKIP:
+            self._skip += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in self.BLOCK:
+            self._flush()
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self.SKIP:
+            self._skip = max(0, self._skip - 1)
+        elif tag == "title":
+            self._in_title = False
+        elif tag in self.BLOCK:
+            self._flush()
+
+    def handle_data(self, data: str) -> None:
+        if self._in_title:
+            self.title += data
+        elif not self._skip:
+            self._buf.append(data)
+
+    def close(self) -> None:
+        super().close()
+        self._flush()
+
+def _unwrap(href: str, base_url: str) -> str:
+    """DuckDuckGo links go through /l/?uddg=<target>; return the real target."""
+    url = urljoin(base_url, href)
+    target = parse_qs(urlparse(url).query).get("uddg")
+    return target[0] if target else url
+
+# ---------------------------------------------
+# Ranking
+# ---------------------------------------------
+_WORD = re.compile(r"[a-z0-9][a-z0-9_+.-]*")
+
+def _terms(text: str) -> List[str]:
+    return [w for w in _WORD.findall(text.lower()) if len(w) > 1]
+
+def _passages(blocks: List[str]) -> List[str]:
+    """Split page blocks into passages of at most about PASSAGE_CHARS.
+
+    Paragraphs stay separate; tiny blocks (menus, bylines) are folded into
+    the text that follows them.
+    """
+    out: List[str] = []
+    cur = ""
+    for block in blocks:
+        for sentence in re.split(r"(?<=[.!?])\s+", block):
+            if cur and len(cur) + len(sentence) > PASSAGE_CHARS:
+                out.append(cur)
+                cur = ""
+            cur = f"{cur} {sentence}".strip()
+        if len(cur) >= 60:
+            out.append(cur)
+            cur = ""
+    if cur:
+        out.append(cur)
+    return out
+
+def _score(passage: str, query_terms: List[str]) -> float:
+    words = _terms(passage)
+    if not words:
+        return 0.0
+    counts: Dict[str, int] = {}
+    for w in words:
+        counts[w] = counts.get(w, 0) + 1
+    # Distinct query terms matter most; repeats saturate (BM25-style).
+    return sum(c / (c + 1.2) for t in set(query_terms) if (c := counts.get(t, 0)))
+
+@dataclass
+class Result:
+    rank: int
+    title: str
+    url: str
+    snippet: str
+    passages: List[str] = field(default_factory=list)
+    score: float = 0.0
+    error: str = ""
+
+def _fetch_page(result: Result, query_terms: List[str], timeout: float, per_page: int) -> Result:
+    try:
+        parser = _TextParser()
+        parser.feed(_get_html(result.url, timeout))
+        parser.close()
+    except Exception as e:
+        result.error = type(e).__name__
+        result.score = _score(result.snippet, query_terms) + 1.0 / result.rank
+        return result
+    ranked = sorted(((_score(p, query_terms), p) for p in _passages(parser.blocks)), key=lambda sp: -sp[0])
+    result.passages = [p for s, p in ranked[:per_page] if s > 0]
+    best = ranked[0][0] if ranked else 0.0
+    # The search engine's own order is a strong prior; page text refines it.
+    result.score = max(best, _score(result.snippet, query_terms)) + 1.0 / result.rank
+    if not result.title and parser.title:
+        result.title = parser.title.strip()
+    return result
+
+def search(query: str, limit: Optional[int] = None, base_url: Optional[str] = None,
+           timeout: Optional[float] = None, per_page: int = 2) -> List[Result]:
+    """Search, fetch the top `limit` result pages concurrently and rank their passages."""
+    import config
+    base_url = base_url or config.CONFIG.get("search_base_url", DEFAULT_BASE_URL)
+    limit = int(limit or config.CONFIG.get("search_results", 5))
+    timeout = float(timeout or config.CONFIG.get("search_timeout", 8))
+
+    parser = _ResultsParser()
+    # Repeating a search within a few minutes is answered from the HTTP cache.
+    parser.feed(_get_html(base_url, timeout, params={"q": query}, ttl=SEARCH_TTL))
+    parser.close()
+    results = []
+    seen = set()
+    for r in parser.results:
+        url = _unwrap(r["href"], base_url)
+        if not url.startswith("http") or url in seen or "duckduckgo.com/y.js" in url:
+            continue                    # ads and duplicates
+        seen.add(url)
+        results.append(Result(len(results) + 1, " ".join(r["title"].split()), url, " ".join(r["snippet"].split())))
+        if len(results) == limit:
+            break
+
+    query_terms = _terms(query)
+    with ThreadPoolExecutor(max_workers=max(1, len(results))) as pool:
+        results = list(pool.map(lambda r: _fetch_page(r, query_terms, timeout, per_page), results))
+    return sorted(results, key=lambda r: -r.score)
+
+# ---------------------------------------------
+# Output
+# ---------------------------------------------
+def show(results: List[Result], fmt: Optional[str] = None) -> None:
+    """Print ranked results; fmt 'json'/'plain' go through the shared renderer."""
+    from modules import render
+    if fmt in ("json", "plain"):
+        rows = [(r.title, r.url, " … ".join(r.passages) or r.snippet) for r in results]
+        render.show(rows, ["title", "url", "snippet"], fmt=fmt)
+        return
+
+    from rich.console import Console
+    from rich.text import Text
+    console = Console()
+    if not results:
+        console.print("[red]No results.[/red]")
+        return
+    out = Text()
+    for i, r in enumerate(results, 1):
+        out.append(f"{i}. {r.title or r.url}\n", style="bold cyan")
+        out.append(f"   {r.url}\n", style="grey70")
+        for p in r.passages or ([r.snippet] if r.snippet else []):
+            out.append(f"   {p}\n")
+        if r.error and not r.passages:
+            out.append(f"   (page not loaded: {r.error})\n", style="yellow")
+        out.append("\n")
+    console.print(out, end="")
+
+def as_context(query: str, results: List[Result], token_budget: int = 1500) -> str:
+    """Results as a compact, numbered context block for the LLM."""
+    budget = token_budget * 4
+    lines = [f"Web search results for: {query}"]
+    for i, r in enumerate(results, 1):
+        entry = f"[{i}] {r.title} ({r.url})\n" + "\n".join(r.passages or [r.snippet])
+        if len(entry) > budget:
+            entry = entry[:budget]
+        budget -= len(entry)
+        lines.append(entry)
+        if budget <= 0:
+            break
+    return "\n\n".join(lines)
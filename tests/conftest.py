@@ -0,0 +1,41 @@
+"""conftest.py
+Shared fixtures: an isolated HOME and throwaway local HTTP servers.
+
+HOME and XDG_CACHE_HOME are pointed at a temporary directory before any
+module under test is imported, so config, caches and state never touch the
+real user's files.
+"""
+from __future__ import annotations
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterator, List, Type
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_HOME = tempfile.mkdtemp(prefix="ait-test-home-")
+os.environ["HOME"] = _HOME
+os.environ["XDG_CACHE_HOME"] = os.path.join(_HOME, ".cache")
+os.environ.pop("XDG_RUNTIME_DIR", None)      # never talk to a running daemon
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def serve() -> Iterator[Callable[[Type[BaseHTTPRequestHandler]], str]]:
+    """Start a local HTTP server for a handler class; returns its base URL."""
+    servers: List[ThreadingHTTPServer] = []
+
+    def start(handler: Type[BaseHTTPRequestHandler]) -> str:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
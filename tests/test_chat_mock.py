@@ -0,0 +1,50 @@
+"""test_chat_mock.py
+`ait ask` end to end against the mock OpenAI-compatible server in benchmarks/.
+"""
+from __future__ import annotations
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+
+import pytest
+
+from benchmarks import chat_load, mock_llm
+
+pytest.importorskip("openai")
+
+
+@pytest.fixture
+def server():
+    server = mock_llm.start(mock_llm.Behaviour(latency_ms=0, jitter_ms=0, tokens_per_sec=0, reply_tokens=8))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_ask_answers_through_the_mock(server, tmp_path) -> None:
+    env = chat_load._environment(str(tmp_path), server.base_url)
+    cmd = [sys.executable, os.path.join(chat_load.ROOT, "ait.py")]
+    session = chat_load.run_ask(cmd, env, ["explain what a TCP three-way handshake is"], timeout=60)
+
+    assert not session.error
+    assert [t.ok for t in session.turns] == [True]
+    stats = server.stats.snapshot()
+    assert stats["requests"] >= 1 and stats["errors"] == 0
+    assert stats["completion_tokens"] >= 1
+
+    report = chat_load.summarize([session], stats, 1.0)
+    assert report["failed_turns"] == 0 and report["turns"] == 1
+
+
+def test_injected_rate_limit(server) -> None:
+    server.behaviour.error_rate, server.behaviour.error_status = 1.0, 429
+    request = urllib.request.Request(
+        server.base_url + "/chat/completions", method="POST", headers={"Content-Type": "application/json"},
+        data=json.dumps({"model": "mock-1", "messages": [{"role": "user", "content": "hi"}]}).encode())
+    with pytest.raises(urllib.error.HTTPError) as err:
+        urllib.request.urlopen(request, timeout=10)
+    assert err.value.code == 429
+    assert err.value.headers["Retry-After"] == "0"
+    assert server.stats.snapshot()["errors"] == 1
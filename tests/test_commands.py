@@ -0,0 +1,102 @@
+"""test_commands.py
+Command resolution through the registry that ait.py fills, and the cached
+completion providers.
+"""
+from __future__ import annotations
+import threading
+import time
+
+import pytest
+
+import ait  # noqa: F401  (registers the built-in commands)
+from modules import commands
+
+
+def _resolve(line: str):
+    found = commands.resolve(line)
+    return (found[0].name, found[1]) if found else None
+
+
+def test_longest_phrase_wins_and_keeps_arguments(tmp_path) -> None:
+    (tmp_path / "My File.txt").write_text("x")
+    assert _resolve("open tool nmap -sV 10.0.0.1") == ("open tool", "nmap -sV 10.0.0.1")
+    assert _resolve(f"Open  {tmp_path}/My File.txt") == ("open", f"{tmp_path}/My File.txt")
+    assert _resolve("show gui tools Network") == ("gui tools", "Network")
+    assert _resolve("what is my ip") == ("ip", "")
+
+
+def test_commands_without_arguments_match_whole_lines_only() -> None:
+    assert _resolve("health") == ("health", "")
+    assert _resolve("health of my disk?") is None
+    assert _resolve("find files bigger than 1GB") is None
+    assert _resolve("show") is None
+
+
+def test_questions_that_start_with_command_words(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "app.log").write_text("x")
+    (tmp_path / "logs").mkdir()
+
+    for question in ["stats about linux kernel scheduling", "web servers compared: nginx vs apache",
+                     "view of experts on systemd?", "open ports explained", "search engines that respect privacy",
+                     "disk usage is high, what can I delete?", "analyze the difference between tcp and udp",
+                     "history of the unix shell", "scan lan speeds and cable categories"]:
+        assert _resolve(question) is None, question
+
+    assert _resolve("view app.log") == ("view", "app.log")
+    assert _resolve("view missing.log") == ("view", "missing.log")     # still says "does not exist"
+    assert _resolve("open ~/notes") == ("open", "~/notes")
+    assert _resolve("disk usage logs --top 5 --fresh") == ("disk usage", "logs --top 5 --fresh")
+    assert _resolve("disk usage --top five") is None
+    assert _resolve("analyze app.log who failed?") == ("analyze", "app.log who failed?")
+    assert _resolve("stats export trace.json") == ("stats", "export trace.json")
+    assert _resolve("stats profile on 2") == ("stats", "profile on 2")
+    assert _resolve("web hashcat mode 22000") == ("web", "hashcat mode 22000")
+    assert _resolve("search google kali metasploit") == ("search", "google kali metasploit")
+    assert _resolve("history last 3") == ("history", "last 3")
+    assert _resolve("scan lan --fresh") == ("scan lan", "--fresh")
+
+
+def test_local_commands() -> None:
+    assert ait._runs_locally("tools all --json")
+    assert ait._runs_locally("view /var/log/syslog")
+    assert not ait._runs_locally("ip")
+    assert not ait._runs_locally("explain nmap")
+
+
+def test_phrases_are_unique() -> None:
+    with pytest.raises(ValueError):
+        commands.register(["ps scan"], lambda session, args, fmt: None)
+
+
+def test_completion_of_words_and_paths(tmp_path) -> None:
+    assert commands.candidates("", "sc") == ["scan"]
+    assert commands.candidates("scan ", "") == ["lan", "ports"]
+    (tmp_path / "notes.txt").write_text("x")
+    (tmp_path / "logs").mkdir()
+    assert commands.candidates("view ", f"{tmp_path}/") == [f"{tmp_path}/logs/", f"{tmp_path}/notes.txt"]
+    assert commands.candidates("open ", f"{tmp_path}/no") == [f"{tmp_path}/notes.txt"]
+
+
+def test_provider_never_waits_for_a_slow_loader() -> None:
+    release = threading.Event()
+    loads = []
+
+    def load(key: str) -> list:
+        loads.append(key)
+        release.wait(5)
+        return [f"{key}-{len(loads)}"]
+
+    provider = commands.Provider(load, ttl=0.5, wait=0.05)
+    started = time.monotonic()
+    assert provider.get("k") == []              # cold: gives up after `wait`
+    assert time.monotonic() - started < 1
+    release.set()
+    time.sleep(0.1)
+    assert provider.get("k") == ["k-1"]         # loaded in the background
+
+    release.clear()
+    time.sleep(0.5)                             # past the ttl
+    assert provider.get("k") == ["k-1"]         # stale value while refreshing
+    assert provider.get("k") == ["k-1"] and len(loads) == 2
+    release.set()
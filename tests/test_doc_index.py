@@ -0,0 +1,47 @@
+"""test_doc_index.py
+Building and searching the documentation index, including an empty one.
+"""
+from __future__ import annotations
+from pathlib import Path
+
+import pytest
+
+from modules import doc_index
+
+
+@pytest.fixture
+def index_dir(tmp_path, monkeypatch) -> Path:
+    monkeypatch.setattr(doc_index, "INDEX_DIR", tmp_path / "docs")
+    monkeypatch.setattr(doc_index, "_INDEX", None)
+    return tmp_path / "docs"
+
+
+def test_build_and_search(index_dir, tmp_path, monkeypatch) -> None:
+    readme = tmp_path / "nmap" / "README.md"
+    readme.parent.mkdir()
+    readme.write_text("Use nmap -sS for a SYN scan of the top thousand ports.\n")
+    monkeypatch.setattr(doc_index, "_discover", lambda: iter([("doc", readme)]))
+
+    assert doc_index.build(index_dir)["chunks"] == 1
+    (score, text), = doc_index.search("nmap syn scan")
+    assert text.startswith("nmap/README.md\n") and "SYN scan" in text
+    assert "SYN scan" in doc_index.ground_prompt("how do I run a syn scan with nmap?")
+
+
+def test_empty_build_then_search(index_dir, monkeypatch) -> None:
+    monkeypatch.setattr(doc_index, "_discover", lambda: iter([]))
+
+    assert doc_index.build(index_dir)["chunks"] == 0
+    assert not doc_index.is_built(index_dir)
+    assert doc_index.search("warm up", k=1) == []
+    assert doc_index.ground_prompt("what is a socket?") == "what is a socket?"
+
+
+def test_index_with_empty_snippets(index_dir, tmp_path, monkeypatch) -> None:
+    readme = tmp_path / "README.txt"
+    readme.write_text("tcpdump captures packets\n")
+    monkeypatch.setattr(doc_index, "_discover", lambda: iter([("doc", readme)]))
+    doc_index.build(index_dir)
+    (index_dir / "snippets.txt").write_bytes(b"")    # left by an older build
+
+    assert doc_index.search("tcpdump") == []
@@ -0,0 +1,43 @@
+"""test_file_viewer.py
+The mmap pager on a log that is truncated in place while it is open.
+"""
+from __future__ import annotations
+import time
+
+from modules import file_viewer
+
+
+def _log(path, lines: int) -> None:
+    with open(path, "wb") as f:
+        f.write(b"".join(b"%08d some log line with padding to make it longer\n" % i for i in range(lines)))
+
+
+def test_truncate_while_open(tmp_path) -> None:
+    path = tmp_path / "app.log"
+    _log(path, 200_000)                         # ~10 MB
+    viewer = file_viewer.Viewer(str(path))
+    try:
+        viewer.goto("50%")
+        assert viewer.data.size > 9_000_000
+
+        with open(path, "r+b") as f:            # like `> app.log` or copytruncate
+            f.truncate(0)
+            f.write(b"fresh line 1\nfresh line 2\n")
+
+        # Without the size check these reads past the new end of file die with SIGBUS.
+        assert viewer.data.read(0, 40960) == b"fresh line 1\nfresh line 2\n"
+        assert viewer.data.find(b"\n", viewer.top) == -1
+        assert viewer._page() == []
+        assert viewer.data.truncated
+
+        assert viewer._refresh() == "replaced"
+        assert viewer.top == 0
+        assert [line for _, line in viewer._page()] == ["fresh line 1", "fresh line 2"]
+        deadline = time.monotonic() + 5
+        while viewer.index.total_lines() != 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert viewer.index.total_lines() == 2
+    finally:
+        viewer.index.stopped = True
+        viewer.index.wake.set()
+        viewer.data.close()
@@ -0,0 +1,70 @@
+"""test_port_scan.py
+`scan ports` against listeners on localhost.
+"""
+from __future__ import annotations
+import socket
+import threading
+from typing import Iterator, Tuple
+
+import pytest
+
+from modules import port_scan
+
+
+@pytest.fixture
+def ports() -> Iterator[Tuple[int, int]]:
+    """(open port that greets with a banner, closed port)."""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(16)
+    gone = socket.socket()
+    gone.bind(("127.0.0.1", 0))
+    closed = gone.getsockname()[1]
+    gone.close()
+
+    def greet() -> None:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            with conn:
+                try:
+                    conn.sendall(b"SSH-2.0-OpenSSH_test\r\n")
+                except OSError:
+                    pass
+
+    threading.Thread(target=greet, daemon=True).start()
+    yield server.getsockname()[1], closed
+    server.close()
+
+
+def test_scan_finds_open_port_and_banner(ports) -> None:
+    open_port, closed_port = ports
+    seen = []
+    report = port_scan.scan("127.0.0.1", f"{open_port},{closed_port}", banners=True, on_result=seen.append)
+
+    assert report.probes == 2 and len(seen) == 2
+    assert [r.port for r in report.open] == [open_port]
+    assert report.open[0].banner == "SSH-2.0-OpenSSH_test"
+    assert report.closed == 1 and report.filtered == 0 and not report.errors
+    assert "1 open on 1 host(s), 1 closed" in port_scan.summary(report)
+    assert f"127.0.0.1 {open_port}/tcp open" in port_scan.as_context(report)
+
+
+def test_failing_callback_stops_the_scan(ports) -> None:
+    calls = []
+
+    def fail(result: port_scan.PortResult) -> None:
+        calls.append(result)
+        raise RuntimeError("output closed")
+
+    with pytest.raises(RuntimeError, match="output closed"):
+        port_scan.scan("127.0.0.1", "1-2000", on_result=fail)
+    assert len(calls) == 1
+
+
+def test_bad_port_spec() -> None:
+    with pytest.raises(ValueError):
+        port_scan.parse_ports("80-70")
+    assert port_scan.parse_ports("22,80-82,22") == [22, 80, 81, 82]
@@ -0,0 +1,85 @@
+"""test_update_runner.py
+`update_runner.py --url/--dir` against a local server that honours ETags.
+"""
+from __future__ import annotations
+import io
+import json
+import os
+import subprocess
+import sys
+import zipfile
+from http.server import BaseHTTPRequestHandler
+from typing import Dict, List, Optional
+
+from conftest import ROOT
+
+FILES = {"ait.py": b"print('v1')\n", "modules/x.py": b"X = 1\n"}
+
+
+def _archive(files: Dict[str, bytes]) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, data in files.items():
+            z.writestr(f"ait-master/{name}", data)
+    return buf.getvalue()
+
+
+class _Archive(BaseHTTPRequestHandler):
+    body = _archive(FILES)
+    etag = '"v1"'
+    seen: List[Optional[str]] = []            # If-None-Match of each request
+
+    def log_message(self, fmt: str, *args: object) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        match = self.headers.get("If-None-Match")
+        type(self).seen.append(match)
+        if match == self.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+
+def _update(url: str, install_dir: str) -> str:
+    proc = subprocess.run([sys.executable, os.path.join(ROOT, "update_runner.py"), "--url", url,
+                           "--dir", install_dir, "--venv", install_dir + ".venv", "-y"],
+                          capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    return proc.stdout
+
+
+def test_conditional_update_and_repair(serve, tmp_path) -> None:
+    _Archive.seen = []
+    url = serve(_Archive) + "/master.zip"
+    install_dir = str(tmp_path / "ait")
+
+    out = _update(url, install_dir)
+    assert "Update complete" in out
+    for rel, data in FILES.items():
+        with open(os.path.join(install_dir, rel), "rb") as f:
+            assert f.read() == data
+    with open(os.path.join(install_dir, ".ait_update.json")) as f:
+        assert json.load(f)["etag"] == '"v1"'
+
+    # Unchanged upstream: the validator goes out and the 304 ends the run.
+    out = _update(url, install_dir)
+    assert "Already up to date" in out
+    assert _Archive.seen == [None, '"v1"']
+    assert not os.path.exists(install_dir + ".new")
+
+    # A damaged file drops the validator so the archive is fetched again.
+    with open(os.path.join(install_dir, "ait.py"), "wb") as f:
+        f.write(b"broken\n")
+    out = _update(url, install_dir)
+    assert "will be restored" in out
+    assert _Archive.seen[-1] is None
+    with open(os.path.join(install_dir, "ait.py"), "rb") as f:
+        assert f.read() == FILES["ait.py"]
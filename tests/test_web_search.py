@@ -0,0 +1,79 @@
+"""test_web_search.py
+In-terminal search against a local results page shaped like DuckDuckGo's HTML.
+"""
+from __future__ import annotations
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, quote, urlparse
+
+from modules import web_search
+
+RESULTS = """<html><body>
+<div class="result"><a class="result__a" href="/l/?uddg={quoted}%2Fnmap">Nmap &amp; friends</a>
+  <a class="result__snippet" href="#">Port scanning basics.</a></div>
+<div class="result"><a class="result__a" href="https://duckduckgo.com/y.js?ad=1">Sponsored</a></div>
+<div class="result"><a class="result__a" href="{base}/cooking">Pasta recipes</a>
+  <a class="result__snippet" href="#">Boil water.</a></div>
+<div class="result"><a class="result__a" href="/l/?uddg={quoted}%2Fnmap">Nmap again</a></div>
+<div class="result"><a class="result__a" href="{base}/missing">Gone</a>
+  <a class="result__snippet" href="#">nmap mirror</a></div>
+</body></html>"""
+
+PAGES = {
+    "/nmap": """<html><head><title>Nmap guide</title><script>var nmap = 1;</script></head><body>
+<nav>Home | nmap | About</nav>
+<p>Nmap sends SYN packets to find open ports on a host. Use nmap -sS for a SYN scan of the
+top thousand ports, or -p- to scan every port.</p>
+<p>This paragraph is about something else entirely and should rank below the scan advice.</p>
+</body></html>""",
+    "/cooking": "<html><body><p>Boil the pasta for nine minutes, then drain it well.</p></body></html>",
+}
+
+
+class _Site(BaseHTTPRequestHandler):
+    queries: list = []
+
+    def log_message(self, fmt: str, *args: object) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        base = f"http://{self.headers['Host']}"
+        if url.path == "/html/":
+            type(self).queries.append(parse_qs(url.query).get("q", [""])[0])
+            body = RESULTS.format(base=base, quoted=quote(base, safe=""))
+        elif url.path in PAGES:
+            body = PAGES[url.path]
+        else:
+            self.send_error(404)
+            return
+        data = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def test_search_parses_ranks_and_skips_ads(serve) -> None:
+    _Site.queries = []
+    base = serve(_Site)
+    results = web_search.search("nmap syn scan", limit=5, base_url=base + "/html/", timeout=5)
+
+    assert _Site.queries == ["nmap syn scan"]
+    urls = [r.url for r in results]
+    # Redirect links are unwrapped, the ad and the duplicate are dropped.
+    assert sorted(urls) == sorted([base + "/nmap", base + "/cooking", base + "/missing"])
+
+    best = results[0]
+    assert best.url == base + "/nmap"
+    assert best.title == "Nmap & friends"
+    assert "SYN scan" in best.passages[0]
+    # Script and navigation text are not passages.
+    assert not any("var nmap" in p or "Home |" in p for p in best.passages)
+
+    missing = next(r for r in results if r.url.endswith("/missing"))
+    assert missing.error and not missing.passages
+
+    context = web_search.as_context("nmap syn scan", results)
+    assert context.startswith("Web search results for: nmap syn scan")
+    assert "[1] Nmap & friends" in context
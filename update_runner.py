@@ -1,82 +1,441 @@
+import argparse
+import ctypes
+import hashlib
+import json
 import os
 import shutil
+import struct
 import subprocess
 import tempfile
 import zipfile
+import zlib
+import urllib.error
 import urllib.request
 
 GITHUB_ZIP_URL = "https://github.com/anodeus/ai_terminal_assistant/archive/refs/heads/master.zip"
 INSTALL_DIR = os.path.expanduser("~/abhi_ai")
 VENV_DIR = os.path.expanduser("~/.abhi_ai")
-PIP_PATH = os.path.join(VENV_DIR, "bin", "pip")
+STATE_FILE = ".ait_update.json"     # validators + per-file hashes, kept in the install dir
+CHUNK = 64 * 1024
+NEW_SUFFIX = ".new"                 # staging dir, a sibling so the swap is a rename
+PREV_SUFFIX = ".prev"               # previous version, for --rollback
 
-def run_update():
-    print("✓ Checking new version availability...")
+try:
+    # Pooled session + per-host stats, shared with the rest of ait.
+    from modules import http_client
+except Exception:
+    # The updater must still work (and be able to repair) when dependencies are
+    # broken or ~/.ait.yml does not parse.
+    http_client = None
+
+_LOCAL = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL = struct.Struct("<IHHHHHHIIIHHHHHII")
+_LOCAL_SIG, _CENTRAL_SIG, _DESCRIPTOR_SIG = 0x04034B50, 0x02014B50, 0x08074B50
+
+class BadArchive(Exception):
+    """The download is truncated, corrupt or fails its CRC check."""
+
+class _Unstreamable(Exception):
+    """The archive needs its central directory to be read (falls back to a temp file)."""
 
+def _sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _matches(path, digest):
     try:
-        req = urllib.request.Request(GITHUB_ZIP_URL, method="HEAD")
-        with urllib.request.urlopen(req) as response:
-            if response.status != 200:
-                print("x New version not available (status:", response.status, ")")
-                return
-    except Exception as e:
-        print("x Failed to reach server:", e)
-        return
+        return _sha256_file(path) == digest
+    except OSError:
+        return False
+
+def load_state(install_dir):
+    try:
+        with open(os.path.join(install_dir, STATE_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(install_dir, state):
+    path = os.path.join(install_dir, STATE_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+# ---------------------------------------------
+# Download
+# ---------------------------------------------
+def _open(url, headers):
+    """Streaming GET. Returns (status, headers, file-like body)."""
+    if http_client is not None:
+        r = http_client.stream(url, headers=headers)
+        r.raw.decode_content = True
+        return r.status_code, r.headers, r.raw
+    try:
+        r = urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=30)
+        return r.status, r.headers, r
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e
+
+def open_conditional(url, state):
+    """Conditional GET. Returns (status, headers, body); status 304 means unchanged."""
+    headers = {"User-Agent": "ait-update"}
+    if state.get("url") == url:
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+    return _open(url, headers)
+
+class _Reader:
+    """Buffered reader over the HTTP response that can push back over-read bytes."""
 
-    print("✓ Starting update")
+    def __init__(self, raw):
+        self.raw = raw
+        self.buf = b""
 
-    with tempfile.TemporaryDirectory() as tmp:
-        zip_path = os.path.join(tmp, "repo.zip")
+    def read_some(self, n=CHUNK):
+        if self.buf:
+            data, self.buf = self.buf[:n], self.buf[n:]
+            return data
+        return self.raw.read(n)
 
-        print("✓ Downloading latest version...")
+    def read_exact(self, n):
+        parts = []
+        while n:
+            data = self.read_some(n)
+            if not data:
+                raise BadArchive("download ended early")
+            parts.append(data)
+            n -= len(data)
+        return b"".join(parts)
+
+    def unread(self, data):
+        self.buf = data + self.buf
+
+# ---------------------------------------------
+# Streaming zip reader
+# ---------------------------------------------
+def _member_data(reader, flags, method, csize, crc, zip64):
+    """Yield one member's uncompressed bytes, verifying its CRC at the end."""
+    actual = 0
+    if method == zipfile.ZIP_DEFLATED:
+        d = zlib.decompressobj(-15)
+        while not d.eof:
+            data = reader.read_some()
+            if not data:
+                raise BadArchive("download ended inside a file")
+            out = d.decompress(data)
+            if out:
+                actual = zlib.crc32(out, actual)
+                yield out
+        reader.unread(d.unused_data)
+    elif method == zipfile.ZIP_STORED and not (flags & 0x08 and not csize):
+        remaining = csize
+        while remaining:
+            data = reader.read_some(min(CHUNK, remaining))
+            if not data:
+                raise BadArchive("download ended inside a file")
+            remaining -= len(data)
+            actual = zlib.crc32(data, actual)
+            yield data
+    else:
+        raise _Unstreamable(f"compression method {method}")
+
+    if flags & 0x08:
+        # Data descriptor: optional signature, CRC, then 4- or 8-byte sizes.
+        head = reader.read_exact(4)
+        if struct.unpack("<I", head)[0] == _DESCRIPTOR_SIG:
+            head = reader.read_exact(4)
+        crc = struct.unpack("<I", head)[0]
+        reader.read_exact(16 if zip64 else 8)
+    if actual != crc:
+        raise BadArchive("checksum mismatch")
+
+def _stream_members(reader, modes):
+    """Yield (name, chunks) from local headers as the download arrives.
+
+    Unix permissions live only in the central directory at the end of the
+    archive, so they are collected into modes once every member is done.
+    """
+    while True:
+        head = reader.read_exact(4)
+        sig = struct.unpack("<I", head)[0]
+        if sig == _CENTRAL_SIG:
+            break
+        if sig != _LOCAL_SIG:
+            raise BadArchive("not a zip archive")
+        (_, _, flags, method, _, _, crc, csize, usize,
+         name_len, extra_len) = _LOCAL.unpack(head + reader.read_exact(_LOCAL.size - 4))
+        if flags & 0x01:
+            raise BadArchive("encrypted archives are not supported")
+        name = reader.read_exact(name_len).decode("utf-8" if flags & 0x800 else "cp437")
+        extra = reader.read_exact(extra_len)
+        zip64 = False
+        while len(extra) >= 4:
+            tag, size = struct.unpack("<HH", extra[:4])
+            if tag == 0x0001:
+                zip64 = True
+                values = list(struct.unpack(f"<{size // 8}Q", extra[4:4 + size // 8 * 8]))
+                if usize == 0xFFFFFFFF and values:
+                    usize = values.pop(0)
+                if csize == 0xFFFFFFFF and values:
+                    csize = values.pop(0)
+            extra = extra[4 + size:]
+        yield name, _member_data(reader, flags, method, csize, crc, zip64)
+
+    while sig == _CENTRAL_SIG:
+        fields = _CENTRAL.unpack(head + reader.read_exact(_CENTRAL.size - 4))
+        flags, name_len, extra_len, comment_len, external = fields[3], fields[10], fields[11], fields[12], fields[15]
+        name = reader.read_exact(name_len).decode("utf-8" if flags & 0x800 else "cp437")
+        reader.read_exact(extra_len + comment_len)
+        modes[name] = external >> 16
+        head = reader.read_exact(4)
+        sig = struct.unpack("<I", head)[0]
+
+def _zipfile_members(zip_ref, modes):
+    """Same as _stream_members, for an archive already on disk."""
+    for info in zip_ref.infolist():
+        modes[info.filename] = info.external_attr >> 16
+        def chunks(info=info):
+            with zip_ref.open(info) as f:
+                yield from iter(lambda: f.read(CHUNK), b"")
+        yield info.filename, chunks()
+
+# ---------------------------------------------
+# Staging
+# ---------------------------------------------
+def _relpath(name):
+    """Path inside the install dir, with the archive's top folder stripped."""
+    parts = name.split("/", 1)
+    if len(parts) < 2 or not parts[1] or name.endswith("/"):
+        return None
+    rel = os.path.normpath(parts[1])
+    if rel.startswith("..") or os.path.isabs(rel):
+        return None
+    return rel
+
+def _copy(src, dest):
+    """Copy a file as a reflink where the filesystem supports it, else byte for byte.
+
+    Never a hardlink: live, staged and .prev must not share inodes, or a file
+    changed in place would change in every copy and rollback could not undo it.
+    """
+    with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
         try:
-            subprocess.run(["curl", "-L", GITHUB_ZIP_URL, "-o", zip_path], check=True)
-        except subprocess.CalledProcessError:
-            print("x Download failed. Check your internet. Try again!")
+            import fcntl
+            fcntl.ioctl(fdst.fileno(), 0x40049409, fsrc.fileno())    # FICLONE
+        except (ImportError, OSError):
+            shutil.copyfileobj(fsrc, fdst, CHUNK)
+    shutil.copystat(src, dest)
+
+def stage(members, modes, live_dir, staged_dir, old_files):
+    """Write members into staged_dir, noting which differ from the files in live_dir.
+
+    Every managed file is written from the download, so a locally modified or
+    corrupted live file is repaired. Returns (manifest, changed paths).
+    """
+    manifest, changed, written = {}, [], []
+    for name, chunks in members:
+        rel = _relpath(name)
+        if rel is None:
+            for _ in chunks:
+                pass
+            continue
+        dest = os.path.join(staged_dir, rel)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        h = hashlib.sha256()
+        with open(dest, "wb") as out:
+            for chunk in chunks:
+                h.update(chunk)
+                out.write(chunk)
+        manifest[rel] = h.hexdigest()
+        written.append((name, rel, dest))
+
+    # Modes come from the central directory, after the last member.
+    for name, rel, dest in written:
+        wanted = bool(modes.get(name, 0) & 0o111)
+        if wanted:
+            os.chmod(dest, 0o755)
+        # The old manifest only says what we installed; hash what is actually there.
+        digest, live = manifest[rel], os.path.join(live_dir, rel)
+        if (old_files.get(rel, digest) != digest or not os.path.isfile(live)
+                or _sha256_file(live) != digest or wanted != bool(os.stat(live).st_mode & 0o111)):
+            changed.append(rel)
+
+    # Keep anything in the live install that the update doesn't manage.
+    for root, dirs, files in os.walk(live_dir):
+        dirs[:] = [d for d in dirs if d != "__pycache__"]
+        for file in files:
+            rel = os.path.relpath(os.path.join(root, file), live_dir)
+            if rel in manifest or rel in old_files or rel == STATE_FILE:
+                continue
+            dest = os.path.join(staged_dir, rel)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            _copy(os.path.join(root, file), dest)
+    return manifest, changed
+
+# ---------------------------------------------
+# Atomic swap
+# ---------------------------------------------
+def _exchange(a, b):
+    """Atomically swap two paths with renameat2(RENAME_EXCHANGE). False if unsupported."""
+    try:
+        renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    except (OSError, AttributeError):
+        return False
+    renameat2.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    AT_FDCWD, RENAME_EXCHANGE = -100, 2
+    return renameat2(AT_FDCWD, os.fsencode(a), AT_FDCWD, os.fsencode(b), RENAME_EXCHANGE) == 0
+
+def swap_in(staged, live):
+    """Make staged the live install; the old one becomes live + PREV_SUFFIX."""
+    prev = live + PREV_SUFFIX
+    if os.path.isdir(prev):
+        shutil.rmtree(prev)
+    if os.path.isdir(live):
+        if _exchange(staged, live):
+            os.rename(staged, prev)         # staged now holds the old version
             return
+        # No renameat2 (old kernel/libc or filesystem): two renames, briefly no live dir.
+        os.rename(live, prev)
+    os.rename(staged, live)
 
-        print("✓ Reading files...")
-        try:
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(tmp)
-        except zipfile.BadZipFile:
-            print("x Invalid or corrupted file. Try again!")
+def _sync_requirements(old_hash, state, install_dir, venv_dir):
+    pip_path = os.path.join(venv_dir, "bin", "pip")
+    req_file = os.path.join(install_dir, "requirements.txt")
+    if state.get("requirements") == old_hash:
+        print("✓ Dependencies unchanged, skipping pip.")
+        return
+    if os.path.exists(pip_path) and os.path.exists(req_file):
+        if subprocess.run([pip_path, "install", "-r", req_file]).returncode == 0:
             return
+    else:
+        print("x Cannot find pip or requirements.txt.")
+    state["requirements"] = None        # retry pip next time
+    save_state(install_dir, state)
+
+def rollback(install_dir=INSTALL_DIR, venv_dir=VENV_DIR):
+    """Swap the previous version back in (running it again undoes the rollback)."""
+    prev = install_dir + PREV_SUFFIX
+    if not os.path.isdir(prev):
+        print("x No previous version to roll back to.")
+        return
+    old_hash = load_state(install_dir).get("requirements")
+    if not _exchange(prev, install_dir):
+        tmp = install_dir + NEW_SUFFIX
+        if os.path.isdir(tmp):
+            shutil.rmtree(tmp)
+        os.rename(install_dir, tmp)
+        os.rename(prev, install_dir)
+        os.rename(tmp, prev)
+    print("✓ Rolled back to the previous version.")
+    _sync_requirements(old_hash, load_state(install_dir), install_dir, venv_dir)
+
+# ---------------------------------------------
+# Update
+# ---------------------------------------------
+def run_update(url=GITHUB_ZIP_URL, install_dir=INSTALL_DIR, venv_dir=VENV_DIR, assume_yes=False):
+    print("✓ Checking new version availability...")
+    install_dir = os.path.abspath(install_dir)
+    state = load_state(install_dir)
+    req_file = os.path.join(install_dir, "requirements.txt")
+    if "requirements" not in state and os.path.isfile(req_file):
+        state["requirements"] = _sha256_file(req_file)   # installed by install.sh, pip already ran
+    old_files = state.get("files", {})
+
+    damaged = [rel for rel, digest in old_files.items() if not _matches(os.path.join(install_dir, rel), digest)]
+    if damaged:
+        # A 304 would keep them as they are: fetch the archive unconditionally to repair them.
+        print(f"! {len(damaged)} installed file(s) differ from the last update, they will be restored.")
+        state = {k: v for k, v in state.items() if k not in ("etag", "last_modified")}
+
+    try:
+        status, headers, body = open_conditional(url, state)
+    except Exception as e:
+        print("x Failed to reach server:", e)
+        return
+    if status == 304:
+        body.close()
+        print("✓ Already up to date.")
+        return
+    if status != 200:
+        body.close()
+        print("x New version not available (status:", status, ")")
+        return
+    etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+
+    staged = install_dir + NEW_SUFFIX
+    if os.path.isdir(staged):
+        shutil.rmtree(staged)
+    os.makedirs(staged)
+
+    print("✓ Downloading and verifying latest version...")
+    try:
+        modes = {}
+        try:
+            with body:
+                manifest, changed = stage(_stream_members(_Reader(body), modes), modes,
+                                          install_dir, staged, old_files)
+        except _Unstreamable:
+            # Rare layouts (stored entries with trailing sizes) need random access.
+            shutil.rmtree(staged)
+            os.makedirs(staged)
+            with tempfile.TemporaryFile() as tmp:
+                again_status, _, again = _open(url, {"User-Agent": "ait-update"})
+                with again:
+                    if again_status != 200:
+                        raise BadArchive(f"download failed (status {again_status})")
+                    shutil.copyfileobj(again, tmp, CHUNK)
+                with zipfile.ZipFile(tmp) as zip_ref:
+                    manifest, changed = stage(_zipfile_members(zip_ref, modes), modes,
+                                              install_dir, staged, old_files)
+    except (BadArchive, zipfile.BadZipFile, zlib.error, OSError) as e:
+        shutil.rmtree(staged, ignore_errors=True)
+        print(f"x Invalid or corrupted download ({e}). Try again!")
+        return
 
-        new_code = os.path.join(tmp, "ai_terminal_assistant-master")
+    removed = [rel for rel in old_files if rel not in manifest]
+    new_state = {"url": url, "etag": etag, "last_modified": last_modified,
+                 "files": manifest, "requirements": manifest.get("requirements.txt")}
+    if not changed and not removed:
+        shutil.rmtree(staged)
+        if os.path.isdir(install_dir):
+            save_state(install_dir, new_state)
+        print("✓ Already up to date.")
+        return
 
+    print(f"✓ {len(changed)} file(s) changed, {len(removed)} removed.")
+    if not assume_yes:
         confirm = input("\n[!] New version is ready. Do you want to install it? [y/N]: ").strip().lower()
         if confirm != "y":
+            shutil.rmtree(staged)
             print("! Update cancelled. Keeping existing version.")
             return
 
-        print("✓ Installing latest version...")
-        for item in os.listdir(new_code):
-            s = os.path.join(new_code, item)
-            d = os.path.join(INSTALL_DIR, item)
-
-            if os.path.abspath(s) == os.path.abspath(__file__):
-                continue
+    print("✓ Installing latest version...")
+    save_state(staged, new_state)
+    try:
+        swap_in(staged, install_dir)
+    except OSError as e:
+        shutil.rmtree(staged, ignore_errors=True)
+        print(f"x Installing failed, existing version kept: {e}")
+        return
 
-            try:
-                if os.path.isdir(s):
-                    if os.path.exists(d):
-                        shutil.rmtree(d)
-                    shutil.copytree(s, d)
-                else:
-                    shutil.copy2(s, d)
-            except Exception as e:
-                print(f"x Verifying failed. Try again! '{item}': {e}")
-                return
-
-        print("✓ Verifying files...")
-        req_file = os.path.join(INSTALL_DIR, "requirements.txt")
-        if os.path.exists(PIP_PATH) and os.path.exists(req_file):
-            subprocess.run([PIP_PATH, "install", "-r", req_file])
-        else:
-            print("x Cannot find pip or requirements.txt.")
-
-        print("\n✓ Update complete. You can now run 'ait chat'.")
+    _sync_requirements(state.get("requirements"), new_state, install_dir, venv_dir)
+    print("\n✓ Update complete. You can now run 'ait chat'. ('ait update --rollback' restores the previous version.)")
 
 if __name__ == "__main__":
-    run_update()
+    parser = argparse.ArgumentParser(description="Update the AI Terminal Assistant")
+    parser.add_argument("--url", default=GITHUB_ZIP_URL, help="Archive to update from")
+    parser.add_argument("--dir", default=INSTALL_DIR, help="Install directory")
+    parser.add_argument("--venv", default=VENV_DIR, help="Virtualenv whose pip installs requirements")
+    parser.add_argument("-y", "--yes", action="store_true", help="Install without asking")
+    parser.add_argument("--rollback", action="store_true", help="Switch back to the previous version")
+    args = parser.parse_args()
+    if args.rollback:
+        rollback(os.path.abspath(args.dir), args.venv)
+    else:
+        run_update(args.url, args.dir, args.venv, args.yes)